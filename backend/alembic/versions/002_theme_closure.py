@@ -0,0 +1,57 @@
+"""Theme hierarchy closure table and GIN indexes for theme queries
+
+Revision ID: 002_theme_closure
+Revises: 001_initial
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002_theme_closure'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create theme_closure table
+    op.create_table(
+        'theme_closure',
+        sa.Column('ancestor_id', sa.String(length=50), nullable=False),
+        sa.Column('descendant_id', sa.String(length=50), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['themes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['themes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_theme_closure_descendant', 'theme_closure', ['descendant_id'])
+
+    # Populate from existing themes
+    op.execute("""
+        WITH RECURSIVE closure(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM themes
+            UNION ALL
+            SELECT t.parent_theme_id, c.descendant_id, c.depth + 1
+            FROM closure c
+            JOIN themes t ON t.id = c.ancestor_id
+            WHERE t.parent_theme_id IS NOT NULL AND c.depth < 32
+        )
+        INSERT INTO theme_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, MIN(depth)
+        FROM closure
+        GROUP BY ancestor_id, descendant_id
+    """)
+
+    # GIN indexes for array overlap (&&) queries on themes and topics
+    op.create_index('ix_story_themes', 'stories', ['themes'], postgresql_using='gin')
+    op.create_index('ix_chunk_topics', 'tafseer_chunks', ['topics'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunk_topics', table_name='tafseer_chunks')
+    op.drop_index('ix_story_themes', table_name='stories')
+    op.drop_table('theme_closure')
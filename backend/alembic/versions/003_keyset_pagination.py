@@ -0,0 +1,27 @@
+"""Composite (juz_no, id) index for keyset pagination of juz listings
+
+Revision ID: 003_keyset_pagination
+Revises: 002_theme_closure
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '003_keyset_pagination'
+down_revision: Union[str, None] = '002_theme_closure'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # "WHERE juz_no = ? AND id > ? ORDER BY id" becomes a single range scan
+    op.drop_index('ix_verse_juz', table_name='quran_verses')
+    op.create_index('ix_verse_juz', 'quran_verses', ['juz_no', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_verse_juz', table_name='quran_verses')
+    op.create_index('ix_verse_juz', 'quran_verses', ['juz_no'])
@@ -0,0 +1,42 @@
+"""Tafseer verse ranges as int4range with a GiST index
+
+Revision ID: 004_tafseer_verse_range
+Revises: 003_keyset_pagination
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '004_tafseer_verse_range'
+down_revision: Union[str, None] = '003_keyset_pagination'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Generated column, so every writer keeps it in sync with verse_start_id/verse_end_id
+    op.add_column(
+        'tafseer_chunks',
+        sa.Column(
+            'verse_range',
+            postgresql.INT4RANGE(),
+            sa.Computed("int4range(verse_start_id, verse_end_id, '[]')", persisted=True),
+            nullable=True,
+        ),
+    )
+
+    # The btree on (verse_start_id, verse_end_id) cannot answer
+    # "start <= id AND end >= id" without scanning; GiST answers @> and && directly
+    op.drop_index('ix_chunk_verse_range', table_name='tafseer_chunks')
+    op.create_index('ix_chunk_verse_range', 'tafseer_chunks', ['verse_range'], postgresql_using='gist')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunk_verse_range', table_name='tafseer_chunks')
+    op.drop_column('tafseer_chunks', 'verse_range')
+    op.create_index('ix_chunk_verse_range', 'tafseer_chunks', ['verse_start_id', 'verse_end_id'])
@@ -0,0 +1,120 @@
+"""Range-partition audit_logs by month with a BRIN index on created_at
+
+Revision ID: 005_partition_audit_logs
+Revises: 004_tafseer_verse_range
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '005_partition_audit_logs'
+down_revision: Union[str, None] = '004_tafseer_verse_range'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, created_at, action, entity_type, entity_id, actor, message, details, "
+    "status, error_message, duration_ms, request_id, ip_address"
+)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # A table cannot be partitioned in place: rebuild it and copy the rows
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_old")
+    op.execute("ALTER TABLE audit_logs_old RENAME CONSTRAINT audit_logs_pkey TO audit_logs_old_pkey")
+    for index in ("ix_audit_action_time", "ix_audit_entity", "ix_audit_status",
+                  "ix_audit_logs_action", "ix_audit_logs_created_at"):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute("UPDATE audit_logs_old SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50),
+            entity_id VARCHAR(100),
+            actor VARCHAR(100) NOT NULL,
+            message TEXT,
+            details JSONB,
+            status VARCHAR(20),
+            error_message TEXT,
+            duration_ms INTEGER,
+            request_id VARCHAR(50),
+            ip_address VARCHAR(50),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+
+    # Monthly partitions from the oldest existing row through two months ahead,
+    # plus a default partition so an insert never fails for lack of one
+    # (maintenance moves its rows out when their month's partition is created)
+    oldest = conn.exec_driver_sql("SELECT min(created_at) FROM audit_logs_old").scalar()
+    today = date.today().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else today
+    while month <= _add_months(today, 2):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_p{month.year:04d}{month.month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    # BRIN on the append-only timestamp replaces the btree indexes on
+    # created_at, action and status; the composite lookups stay
+    op.execute("CREATE INDEX ix_audit_action_time ON audit_logs (action, created_at)")
+    op.execute("CREATE INDEX ix_audit_entity ON audit_logs (entity_type, entity_id)")
+    op.execute("CREATE INDEX ix_audit_created_brin ON audit_logs USING brin (created_at)")
+
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_old")
+    op.execute("DROP TABLE audit_logs_old")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    for index in ("ix_audit_action_time", "ix_audit_entity", "ix_audit_created_brin"):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50),
+            entity_id VARCHAR(100),
+            actor VARCHAR(100) NOT NULL,
+            message TEXT,
+            details JSONB,
+            status VARCHAR(20),
+            error_message TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            duration_ms INTEGER,
+            request_id VARCHAR(50),
+            ip_address VARCHAR(50),
+            PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned")
+
+    op.create_index('ix_audit_action_time', 'audit_logs', ['action', 'created_at'])
+    op.create_index('ix_audit_entity', 'audit_logs', ['entity_type', 'entity_id'])
+    op.create_index('ix_audit_status', 'audit_logs', ['status'])
+    op.create_index('ix_audit_logs_action', 'audit_logs', ['action'])
+    op.create_index('ix_audit_logs_created_at', 'audit_logs', ['created_at'])
@@ -0,0 +1,222 @@
+"""
+Precompressed corpus artifacts for the verse reading routes.
+
+scripts/index/build_corpus_artifacts.py renders every sura, page and juz
+response (per translation variant) once, after seed_quran.py, and writes:
+
+1. The JSON body, named by its content hash
+2. gzip and brotli copies of it
+3. manifest.json mapping each route key to its ETag and files
+
+The routes check this store before touching the database. A request that
+matches a prebuilt variant is answered from the manifest alone (304 on
+If-None-Match) or with the stored bytes in the best encoding the client
+accepts. Files are immutable (content-hashed names), so a rebuild only
+swaps the manifest and workers pick it up on the next request.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core.conditional import not_modified
+from app.core.config import settings
+
+MANIFEST_NAME = "manifest.json"
+ENCODING_PREFERENCE = ["br", "gzip"]  # Best first; identity is always available
+
+# Juz artifacts are rendered as the default keyset pages of /juz/{juz_no}
+JUZ_ARTIFACT_PAGE_SIZE = 50
+
+
+@dataclass
+class Artifact:
+    """One prebuilt response."""
+    etag: str  # Content hash of the identity body
+    files: Dict[str, str]  # Encoding ("identity", "gzip", "br") -> path relative to the root
+    headers: Dict[str, str] = field(default_factory=dict)  # Extra headers (e.g. X-Next-Cursor)
+
+    def etag_for(self, encoding: str) -> str:
+        """Strong ETag per content-coding, as each encoding is a different byte stream."""
+        if encoding == "identity":
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+
+def artifact_variant(
+    include_translations: bool = True,
+    language: Optional[str] = None,
+    translator: Optional[str] = None,
+) -> Optional[str]:
+    """Variant name for a translation filter, or None if it is never prebuilt."""
+    if translator:
+        return None
+    if not include_translations:
+        return "none"
+    return language or "all"
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """Pick the best available content-coding the client accepts."""
+    if not accept_encoding:
+        return "identity"
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+class CorpusArtifactStore:
+    """
+    Manifest plus a bounded in-memory cache of artifact bodies.
+
+    Cached bodies are returned as the same bytes objects on every hit, so
+    a hot sura costs a dict lookup, not a query and a serialization.
+    """
+
+    def __init__(self, root: Optional[str] = None, cache_bytes: Optional[int] = None):
+        self.root = Path(root or settings.corpus_artifacts_dir)
+        self.cache_bytes = (
+            cache_bytes if cache_bytes is not None
+            else settings.corpus_artifacts_cache_mb * 1024 * 1024
+        )
+        self._artifacts: Dict[str, Artifact] = {}
+        self._manifest_mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._built_at: Optional[str] = None
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_size = 0
+
+    def load(self) -> int:
+        """(Re)load the manifest. Returns the number of artifacts (0 if none are built)."""
+        manifest_path = self.root / MANIFEST_NAME
+        try:
+            mtime = manifest_path.stat().st_mtime
+        except OSError:
+            self._artifacts = {}
+            self._manifest_mtime = None
+            return 0
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self._artifacts = {
+            key: Artifact(etag=entry["etag"], files=entry["files"], headers=entry.get("headers", {}))
+            for key, entry in manifest.get("artifacts", {}).items()
+        }
+        self._built_at = manifest.get("built_at")
+        self._manifest_mtime = mtime
+        self._bodies.clear()
+        self._cached_size = 0
+        return len(self._artifacts)
+
+    def _refresh(self) -> None:
+        """Reload when the manifest was rebuilt (checked at most once a second)."""
+        now = time.monotonic()
+        if now - self._checked_at < 1.0:
+            return
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.root / MANIFEST_NAME).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._manifest_mtime:
+            try:
+                count = self.load()
+                print(f"Corpus artifacts: loaded {count} from {self.root}")
+            except Exception as e:
+                print(f"Corpus artifacts: failed to load manifest ({e})")
+                self._artifacts = {}
+
+    def get(self, key: str) -> Optional[Artifact]:
+        """Look up an artifact by route key, e.g. "sura/2/en"."""
+        if not settings.corpus_artifacts_enabled:
+            return None
+        self._refresh()
+        return self._artifacts.get(key)
+
+    def read(self, artifact: Artifact, encoding: str) -> bytes:
+        """Get an artifact body, from memory when cached."""
+        path = artifact.files[encoding]
+        body = self._bodies.get(path)
+        if body is not None:
+            self._bodies.move_to_end(path)
+            return body
+
+        with open(self.root / path, "rb") as f:
+            body = f.read()
+
+        if len(body) <= self.cache_bytes:
+            self._bodies[path] = body
+            self._cached_size += len(body)
+            while self._cached_size > self.cache_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self._cached_size -= len(evicted)
+        return body
+
+    def respond(self, key: str, request: Request) -> Optional[Response]:
+        """
+        Serve a prebuilt response, or None to fall back to the database.
+
+        Answers 304 when If-None-Match matches, without reading the body.
+        """
+        artifact = self.get(key)
+        if artifact is None:
+            return None
+
+        encoding = choose_encoding(request.headers.get("accept-encoding"), artifact.files)
+        etag = artifact.etag_for(encoding)
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": f"public, max-age={settings.corpus_artifacts_max_age}",
+            **artifact.headers,
+        }
+
+        if not_modified(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        try:
+            body = self.read(artifact, encoding)
+        except OSError as e:
+            print(f"Corpus artifacts: missing file for {key} ({e})")
+            return None
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def snapshot(self) -> dict:
+        """Get store state for reporting."""
+        if not self._artifacts:
+            return {"loaded": False, "root": str(self.root)}
+        return {
+            "loaded": True,
+            "artifacts": len(self._artifacts),
+            "built_at": self._built_at,
+            "cached_bodies": len(self._bodies),
+            "cached_bytes": self._cached_size,
+        }
+
+
+# Shared store for this worker
+corpus_artifacts = CorpusArtifactStore()
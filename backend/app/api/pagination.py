@@ -0,0 +1,61 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token holding the sort key of the last
+row returned plus the scope (endpoint and filters) it belongs to, so the
+next page is a "WHERE key > last_key" range scan instead of an OFFSET
+that rescans earlier rows. List endpoints return the token in the
+X-Next-Cursor header so their response bodies stay unchanged.
+"""
+import base64
+import hashlib
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _scope_hash(scope: str) -> str:
+    return hashlib.sha1(scope.encode("utf-8")).hexdigest()[:8]
+
+
+def encode_cursor(scope: str, key: Sequence[Any]) -> str:
+    """Encode the sort key of the last returned row."""
+    payload = json.dumps({"s": _scope_hash(scope), "k": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(scope: str, cursor: Optional[str]) -> Optional[List[Any]]:
+    """
+    Decode a cursor into the last sort key, or None for the first page.
+
+    Raises HTTPException(400) for malformed cursors or cursors issued for
+    a different endpoint or filter set.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = payload["k"]
+        matches = payload["s"] == _scope_hash(scope)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not matches or not isinstance(key, list):
+        raise HTTPException(status_code=400, detail="Cursor does not belong to this query")
+    return key
+
+
+def paginate(rows: Sequence[Any], limit: int) -> Tuple[List[Any], bool]:
+    """Split rows fetched with LIMIT limit+1 into (page, has_more)."""
+    return list(rows[:limit]), len(rows) > limit
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """Expose the continuation token, if there is a next page."""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
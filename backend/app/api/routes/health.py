@@ -69,6 +69,31 @@ async def detailed_health_check(
         health_status["services"]["redis"] = {"status": "unhealthy", "error": str(e)}
         health_status["status"] = "unhealthy"
 
+    # LLM prompt-cache accounting (informational, does not affect status)
+    from app.rag.gateway import llm_gateway
+    from app.rag.llm import prompt_cache_stats
+    health_status["services"]["llm"] = {
+        "provider": settings.llm_provider,
+        "prompt_cache": prompt_cache_stats.snapshot(),
+        "gateway": llm_gateway.snapshot(),
+    }
+
+    # Per-stage RAG latency over recent questions (informational)
+    from app.rag.tracing import rag_stage_stats
+    health_status["services"]["rag_stages"] = rag_stage_stats.snapshot()
+
+    # In-memory story graph (informational)
+    from app.graph.story_graph import story_graph_cache
+    health_status["services"]["story_graph"] = story_graph_cache.snapshot()
+
+    # Prebuilt corpus responses (informational)
+    from app.api.artifacts import corpus_artifacts
+    health_status["services"]["corpus_artifacts"] = corpus_artifacts.snapshot()
+
+    # Audit sink queue (informational)
+    from app.db.audit_sink import audit_sink
+    health_status["services"]["audit_sink"] = audit_sink.snapshot()
+
     return health_status
 
 
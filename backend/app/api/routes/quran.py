@@ -1,20 +1,54 @@
 """
 Quran API routes for verses, translations, and tafseer.
 """
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel, Field
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field, TypeAdapter
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
 
+from app.api.artifacts import JUZ_ARTIFACT_PAGE_SIZE, artifact_variant, corpus_artifacts
+from app.api.pagination import decode_cursor, encode_cursor, paginate, set_next_cursor
+from app.core.conditional import CacheValidators, conditional_get
+from app.core.config import settings
 from app.db.database import get_async_session
 from app.models.quran import QuranVerse, Translation
+from app.models.story import ThemeClosure
 from app.models.tafseer import TafseerChunk, TafseerSource
+from app.validators.sura_names import sura_resolver
 
 router = APIRouter()
 
+# Conditional GET (ETag / Last-Modified) for routes that only read seeded data
+quran_data = conditional_get("quran")
+tafseer_data = conditional_get("tafseer")
+tafseer_and_stories_data = conditional_get("tafseer", "stories")
+
+
+def translations_option(
+    include_translations: bool = True,
+    language: Optional[str] = None,
+    translator: Optional[str] = None,
+):
+    """
+    Loader option for QuranVerse.translations.
+
+    Language and translator filters are applied in SQL (served by the
+    (verse_id, language, translator) unique index), so only the requested
+    translations are fetched.
+    """
+    if not include_translations:
+        return noload(QuranVerse.translations)
+
+    translations = QuranVerse.translations
+    if language:
+        translations = translations.and_(Translation.language == language)
+    if translator:
+        translations = translations.and_(Translation.translator == translator)
+    return selectinload(translations)
+
 
 # Pydantic schemas
 class TranslationResponse(BaseModel):
@@ -58,6 +92,24 @@ class TafseerChunkResponse(BaseModel):
         from_attributes = True
 
 
+class VerseBatchRequest(BaseModel):
+    """Batch verse request."""
+    references: List[str] = Field(
+        ...,
+        min_length=1,
+        description='Verse references and ranges, e.g. ["2:255", "3:18-19", "Al-Ikhlas:1-4"]',
+    )
+    include_translations: bool = True
+    language: Optional[str] = Field(None, description="Filter translations by language")
+
+
+class VerseBatchResponse(BaseModel):
+    """Batch verse response."""
+    verses: List[VerseResponse]  # Unique, in Mushaf order
+    references: dict  # Reference -> verse IDs, in request order
+    invalid: List[str] = []  # References that could not be parsed
+
+
 class SuraMetadata(BaseModel):
     """Sura metadata response."""
     sura_no: int
@@ -67,8 +119,25 @@ class SuraMetadata(BaseModel):
     revelation_type: Optional[str] = None
 
 
+# Bulk serializers for corpus read endpoints. Validating a whole list from
+# ORM attributes and dumping it in one pydantic-core call, then returning
+# the bytes as a raw Response, skips the per-row model_validate and the
+# second validation FastAPI does against response_model (which is kept on
+# the routes for the OpenAPI schema only).
+VERSE_LIST_ADAPTER = TypeAdapter(List[VerseResponse])
+VERSE_BATCH_ADAPTER = TypeAdapter(VerseBatchResponse)
+
+
+def verses_json_response(verses: Sequence[QuranVerse]) -> Response:
+    """Serialize a list of ORM verses straight to a JSON response."""
+    body = VERSE_LIST_ADAPTER.dump_json(
+        VERSE_LIST_ADAPTER.validate_python(verses, from_attributes=True)
+    )
+    return Response(content=body, media_type="application/json")
+
+
 # Routes
-@router.get("/metadata")
+@router.get("/metadata", dependencies=[Depends(quran_data)])
 async def get_quran_metadata(
     session: AsyncSession = Depends(get_async_session),
 ):
@@ -109,47 +178,150 @@ async def get_quran_metadata(
 @router.get("/suras/{sura_no}", response_model=List[VerseResponse])
 async def get_sura_verses(
     sura_no: int,
+    request: Request,
     include_translations: bool = Query(True, description="Include translations"),
     language: Optional[str] = Query(None, description="Filter translations by language"),
+    translator: Optional[str] = Query(None, description="Filter translations by translator"),
+    limit: Optional[int] = Query(None, ge=1, le=300, description="Page size (default: whole sura)"),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    validators: CacheValidators = Depends(quran_data),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
     Get all verses for a specific sura.
+
+    With `limit`, returns one page and the next page's token in the
+    X-Next-Cursor header (keyset on the (sura_no, aya_no) index).
+    Whole-sura requests are served from prebuilt artifacts when available.
     """
     if sura_no < 1 or sura_no > 114:
         raise HTTPException(status_code=400, detail="Sura number must be between 1 and 114")
 
-    query = select(QuranVerse).where(QuranVerse.sura_no == sura_no).order_by(QuranVerse.aya_no)
+    variant = artifact_variant(include_translations, language, translator)
+    if variant and not limit and not cursor:
+        prebuilt = corpus_artifacts.respond(f"sura/{sura_no}/{variant}", request)
+        if prebuilt is not None:
+            return validators.apply(prebuilt)
+
+    scope = f"sura:{sura_no}"
+    last = decode_cursor(scope, cursor)
 
-    if include_translations:
-        query = query.options(selectinload(QuranVerse.translations))
+    query = (
+        select(QuranVerse)
+        .where(QuranVerse.sura_no == sura_no)
+        .order_by(QuranVerse.aya_no)
+        .options(translations_option(include_translations, language, translator))
+    )
+    if last is not None:
+        query = query.where(QuranVerse.aya_no > last[0])
+    if limit:
+        query = query.limit(limit + 1)
 
     result = await session.execute(query)
     verses = result.scalars().all()
 
-    if not verses:
+    if not verses and last is None:
         raise HTTPException(status_code=404, detail=f"Sura {sura_no} not found")
 
-    # Filter translations by language if specified
-    response = []
-    for verse in verses:
-        verse_data = VerseResponse.model_validate(verse)
-        if language and verse.translations:
-            verse_data.translations = [
-                TranslationResponse.model_validate(t)
-                for t in verse.translations
-                if t.language == language
-            ]
-        response.append(verse_data)
+    has_more = False
+    if limit:
+        verses, has_more = paginate(verses, limit)
 
-    return response
+    response = verses_json_response(verses)
+    if has_more:
+        set_next_cursor(response, encode_cursor(scope, [verses[-1].aya_no]))
+    return validators.apply(response)
+
+
+@router.post("/verses/batch", response_model=VerseBatchResponse)
+async def get_verses_batch(
+    request: VerseBatchRequest,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get many verses and verse ranges in one call.
+
+    References use the citation formats ("2:255", "3:18-19", or a sura
+    name such as "Yasin:1-5"). All verses are fetched with one query on
+    the (sura_no, aya_no) index; translations are filtered in SQL.
+    """
+    if len(request.references) > settings.verse_batch_max_refs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.verse_batch_max_refs} references per request",
+        )
 
+    parsed = {}
+    invalid = []
+    for reference in request.references:
+        result = sura_resolver.parse_reference(reference)
+        if result is None:
+            invalid.append(reference)
+        else:
+            parsed[reference] = result
+
+    # Merge overlapping ranges per sura so each becomes one index range scan
+    ranges = {}
+    for sura_no, aya_start, aya_end in sorted(parsed.values()):
+        merged = ranges.setdefault(sura_no, [])
+        if merged and aya_start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], aya_end)
+        else:
+            merged.append([aya_start, aya_end])
+
+    total = sum(end - start + 1 for merged in ranges.values() for start, end in merged)
+    if total > settings.verse_batch_max_verses:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.verse_batch_max_verses} verses per request",
+        )
+
+    verses = []
+    if ranges:
+        query = (
+            select(QuranVerse)
+            .where(or_(*[
+                and_(QuranVerse.sura_no == sura_no, QuranVerse.aya_no.between(start, end))
+                for sura_no, merged in ranges.items()
+                for start, end in merged
+            ]))
+            .order_by(QuranVerse.id)
+        )
+        query = query.options(
+            translations_option(request.include_translations, request.language)
+        )
 
-@router.get("/verses/{sura_no}/{aya_no}", response_model=VerseResponse)
+        result = await session.execute(query)
+        verses = result.scalars().all()
+
+    verse_ids = {(v.sura_no, v.aya_no): v.id for v in verses}
+    references = {
+        reference: [
+            verse_ids[(sura_no, aya_no)]
+            for aya_no in range(aya_start, aya_end + 1)
+            if (sura_no, aya_no) in verse_ids
+        ]
+        for reference, (sura_no, aya_start, aya_end) in parsed.items()
+    }
+
+    batch = VERSE_BATCH_ADAPTER.validate_python(
+        {"verses": verses, "references": references, "invalid": invalid},
+        from_attributes=True,
+    )
+    return Response(content=VERSE_BATCH_ADAPTER.dump_json(batch), media_type="application/json")
+
+
+@router.get(
+    "/verses/{sura_no}/{aya_no}",
+    response_model=VerseResponse,
+    dependencies=[Depends(quran_data)],
+)
 async def get_verse(
     sura_no: int,
     aya_no: int,
     include_translations: bool = Query(True),
+    language: Optional[str] = Query(None, description="Filter translations by language"),
+    translator: Optional[str] = Query(None, description="Filter translations by translator"),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
@@ -158,10 +330,7 @@ async def get_verse(
     query = select(QuranVerse).where(
         QuranVerse.sura_no == sura_no,
         QuranVerse.aya_no == aya_no,
-    )
-
-    if include_translations:
-        query = query.options(selectinload(QuranVerse.translations))
+    ).options(translations_option(include_translations, language, translator))
 
     result = await session.execute(query)
     verse = result.scalar_one_or_none()
@@ -177,19 +346,32 @@ async def get_verse(
 @router.get("/page/{page_no}", response_model=List[VerseResponse])
 async def get_page_verses(
     page_no: int,
+    request: Request,
+    include_translations: bool = Query(True, description="Include translations"),
+    language: Optional[str] = Query(None, description="Filter translations by language"),
+    translator: Optional[str] = Query(None, description="Filter translations by translator"),
+    validators: CacheValidators = Depends(quran_data),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
     Get all verses on a specific page of the Mushaf.
+
+    Served from prebuilt artifacts when available.
     """
     if page_no < 1 or page_no > 604:
         raise HTTPException(status_code=400, detail="Page number must be between 1 and 604")
 
+    variant = artifact_variant(include_translations, language, translator)
+    if variant:
+        prebuilt = corpus_artifacts.respond(f"page/{page_no}/{variant}", request)
+        if prebuilt is not None:
+            return validators.apply(prebuilt)
+
     query = (
         select(QuranVerse)
         .where(QuranVerse.page_no == page_no)
         .order_by(QuranVerse.id)
-        .options(selectinload(QuranVerse.translations))
+        .options(translations_option(include_translations, language, translator))
     )
 
     result = await session.execute(query)
@@ -198,72 +380,105 @@ async def get_page_verses(
     if not verses:
         raise HTTPException(status_code=404, detail=f"Page {page_no} not found")
 
-    return [VerseResponse.model_validate(v) for v in verses]
+    return validators.apply(verses_json_response(verses))
 
 
 @router.get("/juz/{juz_no}", response_model=List[VerseResponse])
 async def get_juz_verses(
     juz_no: int,
+    request: Request,
     limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    include_translations: bool = Query(True, description="Include translations"),
+    language: Optional[str] = Query(None, description="Filter translations by language"),
+    translator: Optional[str] = Query(None, description="Filter translations by translator"),
+    validators: CacheValidators = Depends(quran_data),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
     Get verses for a specific juz (with pagination).
+
+    The next page's token is returned in the X-Next-Cursor header. Cursor
+    pages are keyset range scans on the (juz_no, id) index, so deep pages
+    cost the same as the first. Default-size pages are served from
+    prebuilt artifacts when available.
     """
     if juz_no < 1 or juz_no > 30:
         raise HTTPException(status_code=400, detail="Juz number must be between 1 and 30")
 
+    scope = f"juz:{juz_no}"
+    last = decode_cursor(scope, cursor)
+
+    variant = artifact_variant(include_translations, language, translator)
+    if variant and limit == JUZ_ARTIFACT_PAGE_SIZE and not offset:
+        after_id = last[0] if last is not None else 0
+        prebuilt = corpus_artifacts.respond(f"juz/{juz_no}/{variant}/{after_id}", request)
+        if prebuilt is not None:
+            return validators.apply(prebuilt)
+
     query = (
         select(QuranVerse)
         .where(QuranVerse.juz_no == juz_no)
         .order_by(QuranVerse.id)
-        .offset(offset)
-        .limit(limit)
+        .limit(limit + 1)
+        .options(translations_option(include_translations, language, translator))
     )
+    if last is not None:
+        query = query.where(QuranVerse.id > last[0])
+    elif offset:
+        query = query.offset(offset)
 
     result = await session.execute(query)
-    verses = result.scalars().all()
+    verses, has_more = paginate(result.scalars().all(), limit)
 
-    return [VerseResponse.model_validate(v) for v in verses]
+    response = verses_json_response(verses)
+    if has_more:
+        set_next_cursor(response, encode_cursor(scope, [verses[-1].id]))
+    return validators.apply(response)
 
 
-@router.get("/tafseer/{sura_no}/{aya_no}", response_model=List[TafseerChunkResponse])
-async def get_verse_tafseer(
-    sura_no: int,
-    aya_no: int,
-    sources: Optional[List[str]] = Query(None, description="Filter by source IDs"),
+@router.get(
+    "/tafseer/by-theme/{theme_id}",
+    response_model=List[TafseerChunkResponse],
+    dependencies=[Depends(tafseer_and_stories_data)],
+)
+async def get_tafseer_by_theme(
+    theme_id: str,
     language: Optional[str] = Query(None, description="Filter by language (ar/en)"),
+    limit: int = Query(50, ge=1, le=200),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
-    Get tafseer for a specific verse.
+    Get tafseer chunks whose topics include a theme or any of its subthemes.
     """
-    # First get the verse ID
-    verse_result = await session.execute(
-        select(QuranVerse.id).where(
-            QuranVerse.sura_no == sura_no,
-            QuranVerse.aya_no == aya_no,
-        )
-    )
-    verse_id = verse_result.scalar_one_or_none()
-
-    if not verse_id:
-        raise HTTPException(status_code=404, detail=f"Verse {sura_no}:{aya_no} not found")
-
-    # Get tafseer chunks
-    query = select(TafseerChunk).where(
-        TafseerChunk.verse_start_id <= verse_id,
-        TafseerChunk.verse_end_id >= verse_id,
+    query = (
+        select(TafseerChunk)
+        .where(TafseerChunk.topics.overlap(ThemeClosure.subtree_array(theme_id)))
+        .order_by(TafseerChunk.verse_start_id)
+        .limit(limit)
     )
-
-    if sources:
-        query = query.where(TafseerChunk.source_id.in_(sources))
-
     result = await session.execute(query)
     chunks = result.scalars().all()
 
-    # Filter by language if specified
+    return [
+        TafseerChunkResponse(
+            chunk_id=chunk.chunk_id,
+            source_id=chunk.source_id,
+            verse_reference=chunk.verse_reference,
+            content_ar=chunk.content_ar if language != "en" else None,
+            content_en=chunk.content_en if language != "ar" else None,
+            scholarly_consensus=chunk.scholarly_consensus,
+        )
+        for chunk in chunks
+    ]
+
+
+def tafseer_chunk_responses(
+    chunks: Sequence[TafseerChunk],
+    language: Optional[str] = None,
+) -> List[TafseerChunkResponse]:
+    """Build chunk responses, skipping chunks without content in the requested language."""
     response = []
     for chunk in chunks:
         if language == "ar" and not chunk.content_ar:
@@ -281,11 +496,131 @@ async def get_verse_tafseer(
                 scholarly_consensus=chunk.scholarly_consensus,
             )
         )
-
     return response
 
 
-@router.get("/tafseer/sources", response_model=List[dict])
+async def tafseer_for_verse_ids(
+    session: AsyncSession,
+    start_id: int,
+    end_id: int,
+    sources: Optional[List[str]] = None,
+) -> Sequence[TafseerChunk]:
+    """
+    Get every chunk whose verse range overlaps [start_id, end_id].
+
+    One GiST range-overlap scan on verse_range (a single verse is the
+    stabbing case start_id == end_id).
+    """
+    if start_id == end_id:
+        condition = TafseerChunk.verse_range.contains(start_id)
+    else:
+        condition = TafseerChunk.verse_range.overlaps(func.int4range(start_id, end_id, "[]"))
+
+    query = (
+        select(TafseerChunk)
+        .where(condition)
+        .order_by(TafseerChunk.verse_start_id, TafseerChunk.source_id, TafseerChunk.chunk_order)
+    )
+    if sources:
+        query = query.where(TafseerChunk.source_id.in_(sources))
+
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+@router.get(
+    "/tafseer/page/{page_no}",
+    response_model=List[TafseerChunkResponse],
+    dependencies=[Depends(tafseer_data)],
+)
+async def get_page_tafseer(
+    page_no: int,
+    sources: Optional[List[str]] = Query(None, description="Filter by source IDs"),
+    language: Optional[str] = Query(None, description="Filter by language (ar/en)"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get tafseer for every verse on a Mushaf page, in Mushaf order.
+    """
+    if page_no < 1 or page_no > 604:
+        raise HTTPException(status_code=400, detail="Page number must be between 1 and 604")
+
+    bounds = await session.execute(
+        select(func.min(QuranVerse.id), func.max(QuranVerse.id)).where(QuranVerse.page_no == page_no)
+    )
+    start_id, end_id = bounds.one()
+    if start_id is None:
+        raise HTTPException(status_code=404, detail=f"Page {page_no} not found")
+
+    chunks = await tafseer_for_verse_ids(session, start_id, end_id, sources)
+    return tafseer_chunk_responses(chunks, language)
+
+
+@router.get(
+    "/tafseer/range/{reference}",
+    response_model=List[TafseerChunkResponse],
+    dependencies=[Depends(tafseer_data)],
+)
+async def get_range_tafseer(
+    reference: str,
+    sources: Optional[List[str]] = Query(None, description="Filter by source IDs"),
+    language: Optional[str] = Query(None, description="Filter by language (ar/en)"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get tafseer for a verse range such as "2:255-257" or "Yasin:1-12".
+    """
+    parsed = sura_resolver.parse_reference(reference)
+    if parsed is None:
+        raise HTTPException(status_code=400, detail=f"Invalid verse reference: {reference}")
+    sura_no, aya_start, aya_end = parsed
+
+    bounds = await session.execute(
+        select(func.min(QuranVerse.id), func.max(QuranVerse.id)).where(
+            QuranVerse.sura_no == sura_no,
+            QuranVerse.aya_no.between(aya_start, aya_end),
+        )
+    )
+    start_id, end_id = bounds.one()
+    if start_id is None:
+        raise HTTPException(status_code=404, detail=f"Verses {reference} not found")
+
+    chunks = await tafseer_for_verse_ids(session, start_id, end_id, sources)
+    return tafseer_chunk_responses(chunks, language)
+
+
+@router.get(
+    "/tafseer/{sura_no}/{aya_no}",
+    response_model=List[TafseerChunkResponse],
+    dependencies=[Depends(tafseer_data)],
+)
+async def get_verse_tafseer(
+    sura_no: int,
+    aya_no: int,
+    sources: Optional[List[str]] = Query(None, description="Filter by source IDs"),
+    language: Optional[str] = Query(None, description="Filter by language (ar/en)"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get tafseer for a specific verse.
+    """
+    # First get the verse ID
+    verse_result = await session.execute(
+        select(QuranVerse.id).where(
+            QuranVerse.sura_no == sura_no,
+            QuranVerse.aya_no == aya_no,
+        )
+    )
+    verse_id = verse_result.scalar_one_or_none()
+
+    if not verse_id:
+        raise HTTPException(status_code=404, detail=f"Verse {sura_no}:{aya_no} not found")
+
+    chunks = await tafseer_for_verse_ids(session, verse_id, verse_id, sources)
+    return tafseer_chunk_responses(chunks, language)
+
+
+@router.get("/tafseer/sources", response_model=List[dict], dependencies=[Depends(tafseer_data)])
 async def get_tafseer_sources(
     session: AsyncSession = Depends(get_async_session),
 ):
@@ -309,28 +644,39 @@ async def get_tafseer_sources(
     ]
 
 
-@router.get("/search")
+@router.get("/search", dependencies=[Depends(quran_data)])
 async def search_quran(
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Continuation token (next_cursor)"),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
     Search Quran text (simplified search, not full-text).
+
+    Results are in Mushaf order; pass `next_cursor` back as `cursor` for
+    the next page.
     """
+    scope = f"search:{q}"
+    last = decode_cursor(scope, cursor)
+
     # Simple LIKE search on simplified text
     query = (
         select(QuranVerse)
         .where(QuranVerse.text_imlaei.ilike(f"%{q}%"))
-        .limit(limit)
+        .order_by(QuranVerse.id)
+        .limit(limit + 1)
     )
+    if last is not None:
+        query = query.where(QuranVerse.id > last[0])
 
     result = await session.execute(query)
-    verses = result.scalars().all()
+    verses, has_more = paginate(result.scalars().all(), limit)
 
     return {
         "query": q,
         "count": len(verses),
+        "next_cursor": encode_cursor(scope, [verses[-1].id]) if has_more else None,
         "results": [
             {
                 "id": v.id,
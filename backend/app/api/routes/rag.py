@@ -4,20 +4,36 @@ RAG API routes for grounded Quranic Q&A.
 CRITICAL: All responses MUST be grounded in retrieved sources.
 NEVER generate tafseer without proper citations.
 """
+import asyncio
+import dataclasses
+import json
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_async_session
+from app.db.audit_sink import audit_sink, new_request_id
+from app.db.database import get_async_session, get_async_session_context
+from app.core.conditional import conditional_get
 from app.core.config import settings
+from app.core.rate_limit import get_client_id
+from app.models.audit import AuditAction
+from app.rag.coalescing import normalize_request_key, rag_coalescer
+from app.rag.gateway import LLMSaturatedError, LLMUnavailableError
+from app.rag.llm import llm_configured
 from app.rag.pipeline import RAGPipeline
-from app.rag.types import QueryIntent
+from app.rag.types import QueryIntent, GroundedResponse as PipelineResponse
+from app.workers.rag_jobs import enqueue_rag_query, get_rag_job_state
 
 router = APIRouter()
 
+# Conditional GET (ETag / Last-Modified) for routes that only read seeded data
+static_data = conditional_get()
+tafseer_data = conditional_get("tafseer")
+
 
 # Request/Response schemas
 class AskRequest(BaseModel):
@@ -27,6 +43,7 @@ class AskRequest(BaseModel):
     include_scholarly_debate: bool = Field(default=True)
     preferred_sources: List[str] = Field(default=[])
     max_sources: int = Field(default=5, ge=1, le=20)
+    debug: bool = Field(default=False, description="Include per-stage timings and token usage")
 
     @field_validator("question")
     @classmethod
@@ -58,6 +75,30 @@ class GroundedResponse(BaseModel):
     related_queries: List[str] = []
     intent: str
     processing_time_ms: int
+    debug: Optional[dict] = None  # Per-stage timings and token usage (debug requests only)
+
+
+class JobSubmitted(BaseModel):
+    """Accepted async RAG job."""
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+
+class JobState(BaseModel):
+    """Async RAG job status, with the response once finished."""
+    job_id: str
+    status: str  # "queued", "started", "finished", "failed", ...
+    enqueued_at: Optional[str] = None
+    result: Optional[GroundedResponse] = None
+    error: Optional[str] = None
+
+
+class ValidateCitationsRequest(BaseModel):
+    """Request body for citation validation."""
+    answer: str = Field(..., description="Answer text with citations")
+    retrieved_chunk_ids: List[str] = Field(..., description="List of retrieved chunk IDs")
 
 
 class ValidationResult(BaseModel):
@@ -67,13 +108,99 @@ class ValidationResult(BaseModel):
     invalid_citations: List[str]
     missing_citations: List[str]
     coverage_score: float
+    matched_chunk_ids: List[str] = []
+
+
+async def _run_pipeline_query(request: AskRequest) -> PipelineResponse:
+    """
+    Run the RAG pipeline with its own session.
+
+    The session belongs to the computation rather than the request, so a
+    coalesced computation outlives any single caller that started it.
+    """
+    async with get_async_session_context() as session:
+        pipeline = RAGPipeline(session)
+        return await pipeline.query(
+            question=request.question,
+            language=request.language,
+            include_scholarly_debate=request.include_scholarly_debate,
+            preferred_sources=request.preferred_sources,
+            max_sources=request.max_sources,
+            priority="high",  # Interactive requests take the highest LLM lane
+        )
+
+
+def _debug_requested(request: AskRequest) -> bool:
+    """Whether to return the debug block (per-stage timings) for a question."""
+    return request.debug and settings.rag_debug_enabled
+
+
+def _audit_rag_query(request: AskRequest, request_id: str, ip_address: str) -> None:
+    """Queue the audit row for an incoming question (no I/O on the request path)."""
+    audit_sink.emit(
+        AuditAction.RAG_QUERY,
+        actor="api",
+        entity_type="rag_question",
+        message=request.question,
+        details={
+            "language": request.language,
+            "include_scholarly_debate": request.include_scholarly_debate,
+            "preferred_sources": request.preferred_sources,
+            "max_sources": request.max_sources,
+        },
+        request_id=request_id,
+        ip_address=ip_address,
+    )
+
+
+def _audit_rag_response(
+    result: PipelineResponse,
+    request_id: str,
+    ip_address: str,
+    streamed: bool = False,
+    coalesced: bool = False,
+) -> None:
+    """Queue the audit row for an answer."""
+    audit_sink.emit(
+        AuditAction.RAG_RESPONSE,
+        actor="api",
+        entity_type="rag_answer",
+        message=f"intent={result.intent} confidence={result.confidence:.2f}",
+        details={
+            "intent": result.intent,
+            "confidence": result.confidence,
+            "citations": [c.chunk_id for c in result.citations],
+            "warnings": result.warnings,
+            "streamed": streamed,
+            "coalesced": coalesced,
+        },
+        status="warning" if result.warnings else "success",
+        duration_ms=result.processing_time_ms,
+        request_id=request_id,
+        ip_address=ip_address,
+    )
+
+
+def _audit_rag_failure(request_id: str, ip_address: str, start_time: datetime, error: Exception) -> None:
+    """Queue the audit row for a question that failed."""
+    audit_sink.emit(
+        AuditAction.RAG_RESPONSE,
+        actor="api",
+        entity_type="rag_answer",
+        status="failure",
+        error_message=str(error),
+        duration_ms=int((datetime.now() - start_time).total_seconds() * 1000),
+        request_id=request_id,
+        ip_address=ip_address,
+    )
 
 
 # Routes
 @router.post("/ask", response_model=GroundedResponse)
 async def ask_question(
     request: AskRequest,
-    session: AsyncSession = Depends(get_async_session),
+    response: Response,
+    http_request: Request,
 ):
     """
     Ask a question about the Quran with grounded, cited response.
@@ -83,47 +210,234 @@ async def ask_question(
     - Citations are MANDATORY and validated
     - If evidence is insufficient, returns safe refusal
     - For fiqh questions, clearly states this is informational only
+
+    Identical concurrent questions are coalesced into one pipeline run.
+    With "debug": true the response includes per-stage timings (intent,
+    expansion, qdrant, fts, fusion, context, llm, validation, claim_support)
+    and token usage.
     """
     start_time = datetime.now()
 
-    # Check for API key
-    if not settings.anthropic_api_key:
+    # Check for API key (or the local stub LLM)
+    if not llm_configured():
         raise HTTPException(
             status_code=503,
             detail="RAG service not configured. ANTHROPIC_API_KEY required."
         )
 
-    try:
-        # Initialize RAG pipeline
-        pipeline = RAGPipeline(session)
+    request_id = new_request_id()
+    ip_address = get_client_id(http_request.scope)
+    _audit_rag_query(request, request_id, ip_address)
 
-        # Process query
-        result = await pipeline.query(
+    try:
+        key = normalize_request_key(
             question=request.question,
             language=request.language,
             include_scholarly_debate=request.include_scholarly_debate,
             preferred_sources=request.preferred_sources,
             max_sources=request.max_sources,
         )
+        shared_result, shared = await rag_coalescer.run(
+            key, lambda: _run_pipeline_query(request)
+        )
+
+        # Copy before setting per-request fields on a possibly shared result
+        result = dataclasses.replace(shared_result)
+        response.headers["X-RAG-Coalesced"] = "true" if shared else "false"
 
         # Calculate processing time
         processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
         result.processing_time_ms = processing_time
 
-        return result
+        _audit_rag_response(result, request_id, ip_address, coalesced=shared)
+        return result.to_dict(include_debug=_debug_requested(request))
+
+    except LLMSaturatedError as e:
+        _audit_rag_failure(request_id, ip_address, start_time, e)
+        raise HTTPException(
+            status_code=503,
+            detail="RAG service is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    except LLMUnavailableError as e:
+        _audit_rag_failure(request_id, ip_address, start_time, e)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Language model unavailable: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
     except Exception as e:
         # Log error and return safe response
+        _audit_rag_failure(request_id, ip_address, start_time, e)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing question: {str(e)}"
         )
 
 
+@router.post("/ask/stream")
+async def ask_question_stream(request: AskRequest, http_request: Request):
+    """
+    Ask a question and stream the answer as Server-Sent Events.
+
+    Emits "delta" events with answer text and "citation" events as each
+    citation (or uncited paragraph) is validated, then a final "result"
+    event with the validated response, or "error". If too many citations
+    fail validation, generation is stopped early and the result is a
+    safe refusal.
+    """
+    if not llm_configured():
+        raise HTTPException(
+            status_code=503,
+            detail="RAG service not configured. ANTHROPIC_API_KEY required."
+        )
+
+    request_id = new_request_id()
+    ip_address = get_client_id(http_request.scope)
+    _audit_rag_query(request, request_id, ip_address)
+
+    async def events():
+        start_time = datetime.now()
+        try:
+            async with get_async_session_context() as session:
+                pipeline = RAGPipeline(session)
+                async for kind, payload in pipeline.stream_query(
+                    question=request.question,
+                    language=request.language,
+                    include_scholarly_debate=request.include_scholarly_debate,
+                    preferred_sources=request.preferred_sources,
+                    max_sources=request.max_sources,
+                    priority="high",
+                ):
+                    if kind == "delta":
+                        data = {"text": payload}
+                    elif kind == "citation":
+                        data = payload.to_dict()
+                    else:
+                        payload.processing_time_ms = int(
+                            (datetime.now() - start_time).total_seconds() * 1000
+                        )
+                        _audit_rag_response(payload, request_id, ip_address, streamed=True)
+                        data = payload.to_dict(include_debug=_debug_requested(request))
+                    yield f"event: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        except (LLMSaturatedError, LLMUnavailableError) as e:
+            _audit_rag_failure(request_id, ip_address, start_time, e)
+            data = {"error": str(e), "retry_after": e.retry_after}
+            yield f"event: error\ndata: {json.dumps(data)}\n\n"
+
+        except Exception as e:
+            _audit_rag_failure(request_id, ip_address, start_time, e)
+            data = {"error": f"Error processing question: {str(e)}"}
+            yield f"event: error\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs", response_model=JobSubmitted, status_code=202)
+async def submit_question_job(request: AskRequest):
+    """
+    Submit a question for asynchronous processing.
+
+    Returns a job ID immediately; an rq worker runs the RAG pipeline.
+    Poll /jobs/{job_id} or subscribe to /jobs/{job_id}/events for the
+    result. Identical questions share one job.
+    """
+    if not llm_configured():
+        raise HTTPException(
+            status_code=503,
+            detail="RAG service not configured. ANTHROPIC_API_KEY required."
+        )
+
+    try:
+        job = await asyncio.to_thread(
+            enqueue_rag_query,
+            question=request.question,
+            language=request.language,
+            include_scholarly_debate=request.include_scholarly_debate,
+            preferred_sources=request.preferred_sources,
+            max_sources=request.max_sources,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Job queue unavailable: {str(e)}")
+
+    status = job.get_status()
+    return JobSubmitted(
+        job_id=job.id,
+        status=status.value if hasattr(status, "value") else str(status),
+        status_url=f"/api/v1/rag/jobs/{job.id}",
+        events_url=f"/api/v1/rag/jobs/{job.id}/events",
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobState)
+async def get_question_job(job_id: str):
+    """
+    Get the status of an async question job, with its response once finished.
+    """
+    state = await asyncio.to_thread(get_rag_job_state, job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return state
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_question_job(
+    job_id: str,
+    poll_interval: float = Query(0.5, ge=0.1, le=5.0),
+):
+    """
+    Subscribe to an async question job as Server-Sent Events.
+
+    Emits a "status" event on every status change, then a final "result"
+    or "error" event.
+    """
+    state = await asyncio.to_thread(get_rag_job_state, job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+
+    async def events():
+        nonlocal state
+        last_status = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.rag_job_timeout_seconds
+
+        while state is not None:
+            if state["status"] != last_status:
+                last_status = state["status"]
+                yield f"event: status\ndata: {json.dumps({'status': last_status})}\n\n"
+
+            if state["status"] == "finished":
+                yield f"event: result\ndata: {json.dumps(state['result'], ensure_ascii=False)}\n\n"
+                return
+            if state["status"] in ("failed", "stopped", "canceled"):
+                yield f"event: error\ndata: {json.dumps({'error': state['error']})}\n\n"
+                return
+            if loop.time() > deadline:
+                yield f"event: error\ndata: {json.dumps({'error': 'Timed out waiting for job'})}\n\n"
+                return
+
+            await asyncio.sleep(poll_interval)
+            state = await asyncio.to_thread(get_rag_job_state, job_id)
+
+        yield f"event: error\ndata: {json.dumps({'error': 'Job expired'})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/validate-citations", response_model=ValidationResult)
 async def validate_citations(
-    answer: str = Field(..., description="Answer text with citations"),
-    retrieved_chunk_ids: List[str] = Field(..., description="List of retrieved chunk IDs"),
+    request: ValidateCitationsRequest,
     session: AsyncSession = Depends(get_async_session),
 ):
     """
@@ -134,7 +448,20 @@ async def validate_citations(
     from app.validators.citation_validator import CitationValidator
 
     validator = CitationValidator(session)
-    result = await validator.validate(answer, retrieved_chunk_ids)
+    result = await validator.validate(request.answer, request.retrieved_chunk_ids)
+
+    audit_sink.emit(
+        AuditAction.CITATION_VALIDATION,
+        actor="api",
+        entity_type="rag_answer",
+        details={
+            "valid": len(result.valid_citations),
+            "invalid": result.invalid_citations,
+            "missing": len(result.missing_citations),
+            "coverage_score": result.coverage_score,
+        },
+        status="success" if result.is_valid else "warning",
+    )
 
     return ValidationResult(
         is_valid=result.is_valid,
@@ -142,10 +469,11 @@ async def validate_citations(
         invalid_citations=result.invalid_citations,
         missing_citations=result.missing_citations,
         coverage_score=result.coverage_score,
+        matched_chunk_ids=result.matched_chunk_ids,
     )
 
 
-@router.get("/intents")
+@router.get("/intents", dependencies=[Depends(static_data)])
 async def get_query_intents():
     """
     Get available query intent types.
@@ -192,7 +520,7 @@ async def get_query_intents():
     }
 
 
-@router.get("/sample-questions")
+@router.get("/sample-questions", dependencies=[Depends(static_data)])
 async def get_sample_questions(
     language: str = Query("en", pattern="^(ar|en)$"),
 ):
@@ -241,7 +569,7 @@ async def get_sample_questions(
     return {"language": language, "samples": samples.get(language, samples["en"])}
 
 
-@router.get("/sources")
+@router.get("/sources", dependencies=[Depends(tafseer_data)])
 async def get_available_sources(
     session: AsyncSession = Depends(get_async_session),
 ):
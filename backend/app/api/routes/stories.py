@@ -1,19 +1,30 @@
 """
 Stories API routes for Quranic narratives and connections.
 """
-from typing import List, Optional
+from typing import List, Optional, Set
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.api.pagination import decode_cursor, encode_cursor, paginate, set_next_cursor
+from app.core.conditional import conditional_get, not_modified
+from app.core.config import settings
 from app.db.database import get_async_session
-from app.models.story import Story, StorySegment, StoryConnection, Theme
+from app.graph.story_graph import graph_etag_headers, story_graph_cache
+from app.models.quran import QuranVerse
+from app.models.story import Story, StorySegment, StoryConnection, Theme, ThemeClosure
+from app.validators.sura_names import sura_resolver
 
 router = APIRouter()
 
+# Conditional GET (ETag / Last-Modified) for routes that only read seeded data
+stories_data = conditional_get("stories")
+stories_and_quran_data = conditional_get("stories", "quran")
+static_data = conditional_get()
+
 
 # Pydantic schemas
 class SegmentResponse(BaseModel):
@@ -99,6 +110,8 @@ class StoryGraphEdge(BaseModel):
     target: str
     type: str
     label: Optional[str]
+    strength: Optional[float] = None
+    shared_themes: Optional[List[str]] = None
 
 
 class StoryGraphResponse(BaseModel):
@@ -107,17 +120,68 @@ class StoryGraphResponse(BaseModel):
     edges: List[StoryGraphEdge]
 
 
+class StoryBadge(BaseModel):
+    """A story segment covering some verses (for per-verse story badges)."""
+    story_id: str
+    story_name_ar: str
+    story_name_en: str
+    segment_id: str
+    aspect: Optional[str]
+    sura_no: int
+    aya_start: int
+    aya_end: int
+
+
+class VerseStoriesResponse(BaseModel):
+    """Stories touching one verse reference."""
+    reference: str
+    sura_no: int
+    aya_start: int
+    aya_end: int
+    stories: List[StoryBadge]
+
+
+class PageStoriesResponse(BaseModel):
+    """Story badges for every verse on a Mushaf page."""
+    page_no: int
+    verses: dict  # "sura:aya" -> segment IDs covering that verse
+    segments: List[StoryBadge]
+
+
+class GraphNeighborhoodResponse(StoryGraphResponse):
+    """Segments within k hops of a seed segment."""
+    segment_id: str
+    depth: int
+    truncated: bool
+
+
+class GraphPathResponse(StoryGraphResponse):
+    """Shortest path between two segments (nodes in path order)."""
+    found: bool
+    hops: int
+    cost: Optional[float]
+
+
 # Routes
-@router.get("/", response_model=List[StoryResponse])
+@router.get("/", response_model=List[StoryResponse], dependencies=[Depends(stories_data)])
 async def list_stories(
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category"),
     theme: Optional[str] = Query(None, description="Filter by theme"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size (default: all stories)"),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
     List all Quranic stories with optional filtering.
+
+    With `limit`, pages are keyed on (name_en, id) and the next page's
+    token is returned in the X-Next-Cursor header.
     """
-    query = select(Story).order_by(Story.name_en)
+    scope = f"stories:{category}:{theme}"
+    last = decode_cursor(scope, cursor)
+
+    query = select(Story).order_by(Story.name_en, Story.id)
 
     if category:
         query = query.where(Story.category == category)
@@ -125,13 +189,23 @@ async def list_stories(
     if theme:
         query = query.where(Story.themes.contains([theme]))
 
+    if last is not None:
+        query = query.where(tuple_(Story.name_en, Story.id) > tuple_(*last))
+    if limit:
+        query = query.limit(limit + 1)
+
     result = await session.execute(query)
     stories = result.scalars().all()
 
+    if limit:
+        stories, has_more = paginate(stories, limit)
+        if has_more:
+            set_next_cursor(response, encode_cursor(scope, [stories[-1].name_en, stories[-1].id]))
+
     return [StoryResponse.model_validate(s) for s in stories]
 
 
-@router.get("/categories")
+@router.get("/categories", dependencies=[Depends(static_data)])
 async def get_story_categories():
     """
     Get available story categories.
@@ -147,9 +221,10 @@ async def get_story_categories():
     }
 
 
-@router.get("/themes", response_model=List[ThemeResponse])
+@router.get("/themes", response_model=List[ThemeResponse], dependencies=[Depends(stories_data)])
 async def list_themes(
     parent_id: Optional[str] = Query(None, description="Filter by parent theme"),
+    include_subthemes: bool = Query(False, description="With parent_id: all descendants, not only direct children"),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
@@ -157,7 +232,12 @@ async def list_themes(
     """
     query = select(Theme).order_by(Theme.name_en)
 
-    if parent_id:
+    if parent_id and include_subthemes:
+        query = query.join(ThemeClosure, ThemeClosure.descendant_id == Theme.id).where(
+            ThemeClosure.ancestor_id == parent_id,
+            ThemeClosure.depth >= 1,
+        )
+    elif parent_id:
         query = query.where(Theme.parent_theme_id == parent_id)
 
     result = await session.execute(query)
@@ -166,7 +246,276 @@ async def list_themes(
     return [ThemeResponse.model_validate(t) for t in themes]
 
 
-@router.get("/{story_id}", response_model=StoryDetailResponse)
+@router.get(
+    "/themes/{theme_id}/stories",
+    response_model=List[StoryResponse],
+    dependencies=[Depends(stories_data)],
+)
+async def get_stories_by_theme(
+    theme_id: str,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get stories tagged with a theme or any of its subthemes.
+    """
+    query = (
+        select(Story)
+        .where(Story.themes.overlap(ThemeClosure.subtree_array(theme_id)))
+        .order_by(Story.name_en)
+    )
+    result = await session.execute(query)
+    stories = result.scalars().all()
+
+    return [StoryResponse.model_validate(s) for s in stories]
+
+
+@router.get(
+    "/themes/{theme_id}/segments",
+    response_model=List[SegmentResponse],
+    dependencies=[Depends(stories_data)],
+)
+async def get_segments_by_theme(
+    theme_id: str,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get segments of stories tagged with a theme or any of its subthemes.
+    """
+    query = (
+        select(StorySegment)
+        .join(Story, StorySegment.story_id == Story.id)
+        .where(Story.themes.overlap(ThemeClosure.subtree_array(theme_id)))
+        .order_by(StorySegment.sura_no, StorySegment.aya_start)
+    )
+    result = await session.execute(query)
+    segments = result.scalars().all()
+
+    return [SegmentResponse.model_validate(s) for s in segments]
+
+
+@router.get("/graph", response_model=StoryGraphResponse)
+async def get_corpus_graph(
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get every story, segment and connection as one graph.
+
+    Served from the in-memory story graph, with an ETag.
+    """
+    graph = await story_graph_cache.get(session)
+    payload = graph.corpus_payload()
+
+    headers = graph_etag_headers(payload.etag)
+    if not_modified(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+def _story_badge(graph, segment) -> StoryBadge:
+    """Build a StoryBadge for a graph segment."""
+    story = graph.stories.get(segment.story_id)
+    return StoryBadge(
+        story_id=segment.story_id,
+        story_name_ar=story.name_ar if story else "",
+        story_name_en=story.name_en if story else segment.story_id,
+        segment_id=segment.id,
+        aspect=segment.aspect,
+        sura_no=segment.sura_no,
+        aya_start=segment.aya_start,
+        aya_end=segment.aya_end,
+    )
+
+
+@router.get(
+    "/by-verse",
+    response_model=List[VerseStoriesResponse],
+    dependencies=[Depends(stories_data)],
+)
+async def get_stories_by_verse(
+    refs: List[str] = Query(..., description="Verse references, e.g. 2:255 or 12:4-6 (repeat or comma-separate)"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get the stories whose segments cover each verse reference.
+
+    Served from the in-memory verse-to-segment index.
+    """
+    references = [r.strip() for value in refs for r in value.split(",") if r.strip()]
+    if len(references) > settings.verse_batch_max_refs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.verse_batch_max_refs} references per request",
+        )
+
+    graph = await story_graph_cache.get(session)
+
+    response = []
+    for reference in references:
+        parsed = sura_resolver.parse_reference(reference)
+        if parsed is None:
+            raise HTTPException(status_code=400, detail=f"Invalid verse reference '{reference}'")
+
+        sura_no, aya_start, aya_end = parsed
+        response.append(VerseStoriesResponse(
+            reference=reference,
+            sura_no=sura_no,
+            aya_start=aya_start,
+            aya_end=aya_end,
+            stories=[
+                _story_badge(graph, segment)
+                for segment in graph.segments_in_range(sura_no, aya_start, aya_end)
+            ],
+        ))
+
+    return response
+
+
+@router.get(
+    "/by-page/{page_no}",
+    response_model=PageStoriesResponse,
+    dependencies=[Depends(stories_and_quran_data)],
+)
+async def get_stories_by_page(
+    page_no: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get story badges for all verses on a Mushaf page in one call.
+    """
+    if page_no < 1 or page_no > 604:
+        raise HTTPException(status_code=400, detail="Page number must be between 1 and 604")
+
+    result = await session.execute(
+        select(QuranVerse.sura_no, QuranVerse.aya_no)
+        .where(QuranVerse.page_no == page_no)
+        .order_by(QuranVerse.id)
+    )
+    verses = result.all()
+    if not verses:
+        raise HTTPException(status_code=404, detail=f"Page {page_no} not found")
+
+    graph = await story_graph_cache.get(session)
+
+    # A page spans at most a few suras; look up each sura's aya range once
+    ranges = {}
+    for sura_no, aya_no in verses:
+        low, high = ranges.get(sura_no, (aya_no, aya_no))
+        ranges[sura_no] = (min(low, aya_no), max(high, aya_no))
+
+    segments = []
+    for sura_no, (low, high) in ranges.items():
+        segments.extend(graph.segments_in_range(sura_no, low, high))
+
+    verse_map = {}
+    for sura_no, aya_no in verses:
+        verse_map[f"{sura_no}:{aya_no}"] = [
+            s.id for s in segments
+            if s.sura_no == sura_no and s.aya_start <= aya_no <= s.aya_end
+        ]
+
+    return PageStoriesResponse(
+        page_no=page_no,
+        verses=verse_map,
+        segments=[_story_badge(graph, s) for s in segments],
+    )
+
+
+def _theme_filter(themes: Optional[List[str]]) -> Optional[Set[str]]:
+    """Parse repeated or comma-separated theme query parameters."""
+    if not themes:
+        return None
+    return {t.strip() for value in themes for t in value.split(",") if t.strip()} or None
+
+
+@router.get(
+    "/graph/neighborhood",
+    response_model=GraphNeighborhoodResponse,
+    dependencies=[Depends(stories_data)],
+)
+async def get_segment_neighborhood(
+    segment_id: str = Query(..., description="Seed segment ID"),
+    depth: int = Query(2, ge=1, description="Number of hops"),
+    themes: Optional[List[str]] = Query(None, description="Only follow connections sharing one of these themes"),
+    max_nodes: int = Query(200, ge=1, description="Maximum segments returned"),
+    max_fanout: int = Query(25, ge=1, description="Strongest connections followed per segment"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get all segments within k hops of a segment, across stories.
+
+    Connections are followed in both directions. Each node's data
+    includes its `distance` (hops) from the seed.
+    """
+    graph = await story_graph_cache.get(session)
+    if segment_id not in graph.segments:
+        raise HTTPException(status_code=404, detail=f"Segment '{segment_id}' not found")
+
+    result = graph.neighborhood(
+        [segment_id],
+        depth=min(depth, settings.story_graph_max_depth),
+        themes=_theme_filter(themes),
+        max_nodes=min(max_nodes, settings.story_graph_max_nodes),
+        max_fanout=max_fanout,
+    )
+    data = graph.subgraph(
+        result.distances,
+        result.edge_ids,
+        node_data={s: {"distance": d} for s, d in result.distances.items()},
+    )
+
+    return GraphNeighborhoodResponse(
+        segment_id=segment_id,
+        depth=min(depth, settings.story_graph_max_depth),
+        truncated=result.truncated,
+        **data,
+    )
+
+
+@router.get("/graph/path", response_model=GraphPathResponse, dependencies=[Depends(stories_data)])
+async def get_segment_path(
+    source: str = Query(..., description="Start segment ID"),
+    target: str = Query(..., description="End segment ID"),
+    themes: Optional[List[str]] = Query(None, description="Only follow connections sharing one of these themes"),
+    weighted: bool = Query(True, description="Prefer strong connections (cost 1/strength) over fewest hops"),
+    max_depth: int = Query(6, ge=1, description="Maximum number of hops"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Find how two segments are linked through story connections.
+
+    Returns the cheapest path (or an empty result with found=false).
+    """
+    graph = await story_graph_cache.get(session)
+    for segment_id in (source, target):
+        if segment_id not in graph.segments:
+            raise HTTPException(status_code=404, detail=f"Segment '{segment_id}' not found")
+
+    path = graph.shortest_path(
+        source,
+        target,
+        themes=_theme_filter(themes),
+        weighted=weighted,
+        max_depth=min(max_depth, settings.story_graph_max_depth),
+        max_nodes=settings.story_graph_max_nodes,
+    )
+    if path is None:
+        return GraphPathResponse(nodes=[], edges=[], found=False, hops=0, cost=None)
+
+    return GraphPathResponse(
+        found=True,
+        hops=len(path.edge_ids),
+        cost=round(path.cost, 4),
+        **graph.subgraph(path.segment_ids, path.edge_ids),
+    )
+
+
+@router.get(
+    "/{story_id}",
+    response_model=StoryDetailResponse,
+    dependencies=[Depends(stories_data)],
+)
 async def get_story(
     story_id: str,
     include_segments: bool = Query(True),
@@ -199,7 +548,11 @@ async def get_story(
     return response
 
 
-@router.get("/{story_id}/connections", response_model=List[ConnectionResponse])
+@router.get(
+    "/{story_id}/connections",
+    response_model=List[ConnectionResponse],
+    dependencies=[Depends(stories_data)],
+)
 async def get_story_connections(
     story_id: str,
     session: AsyncSession = Depends(get_async_session),
@@ -231,92 +584,31 @@ async def get_story_connections(
 @router.get("/{story_id}/graph", response_model=StoryGraphResponse)
 async def get_story_graph(
     story_id: str,
+    if_none_match: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_async_session),
 ):
     """
     Get story as a graph structure for visualization.
 
     Returns nodes (segments) and edges (connections) suitable for
-    graph visualization libraries like Cytoscape.js.
+    graph visualization libraries like Cytoscape.js. Connections in both
+    directions are included, with the segments of other stories they
+    link to. Served from the in-memory story graph, with an ETag.
     """
-    # Get story with segments
-    story_result = await session.execute(
-        select(Story)
-        .where(Story.id == story_id)
-        .options(selectinload(Story.segments))
-    )
-    story = story_result.scalar_one_or_none()
+    graph = await story_graph_cache.get(session)
+    payload = graph.story_payload(story_id)
 
-    if not story:
+    if payload is None:
         raise HTTPException(status_code=404, detail=f"Story '{story_id}' not found")
 
-    nodes = []
-    edges = []
-
-    # Add story node
-    nodes.append(
-        StoryGraphNode(
-            id=story.id,
-            type="story",
-            label=story.name_en,
-            data={
-                "name_ar": story.name_ar,
-                "category": story.category,
-                "themes": story.themes or [],
-            },
-        )
-    )
-
-    # Add segment nodes
-    segment_ids = []
-    for segment in story.segments:
-        segment_ids.append(segment.id)
-        nodes.append(
-            StoryGraphNode(
-                id=segment.id,
-                type="segment",
-                label=f"{segment.sura_no}:{segment.aya_start}-{segment.aya_end}",
-                data={
-                    "narrative_order": segment.narrative_order,
-                    "aspect": segment.aspect,
-                    "summary_en": segment.summary_en,
-                    "summary_ar": segment.summary_ar,
-                },
-            )
-        )
-        # Edge from story to segment
-        edges.append(
-            StoryGraphEdge(
-                source=story.id,
-                target=segment.id,
-                type="contains",
-                label=None,
-            )
-        )
-
-    # Get connections between segments
-    if segment_ids:
-        conn_result = await session.execute(
-            select(StoryConnection).where(
-                StoryConnection.source_segment_id.in_(segment_ids)
-            )
-        )
-        connections = conn_result.scalars().all()
-
-        for conn in connections:
-            edges.append(
-                StoryGraphEdge(
-                    source=conn.source_segment_id,
-                    target=conn.target_segment_id,
-                    type=conn.connection_type,
-                    label=conn.connection_type.replace("_", " ").title(),
-                )
-            )
+    headers = graph_etag_headers(payload.etag)
+    if not_modified(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
 
-    return StoryGraphResponse(nodes=nodes, edges=edges)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
 
-@router.get("/by-figure/{figure}")
+@router.get("/by-figure/{figure}", dependencies=[Depends(stories_data)])
 async def get_stories_by_figure(
     figure: str,
     session: AsyncSession = Depends(get_async_session),
@@ -335,7 +627,7 @@ async def get_stories_by_figure(
     }
 
 
-@router.get("/by-sura/{sura_no}")
+@router.get("/by-sura/{sura_no}", dependencies=[Depends(stories_data)])
 async def get_stories_in_sura(
     sura_no: int,
     session: AsyncSession = Depends(get_async_session),
@@ -346,17 +638,11 @@ async def get_stories_in_sura(
     if sura_no < 1 or sura_no > 114:
         raise HTTPException(status_code=400, detail="Sura must be between 1 and 114")
 
-    query = (
-        select(StorySegment)
-        .where(StorySegment.sura_no == sura_no)
-        .order_by(StorySegment.aya_start)
-    )
-    result = await session.execute(query)
-    segments = result.scalars().all()
+    graph = await story_graph_cache.get(session)
 
     # Group by story
     story_map = {}
-    for seg in segments:
+    for seg in graph.segments_in_range(sura_no):
         if seg.story_id not in story_map:
             story_map[seg.story_id] = []
         story_map[seg.story_id].append(SegmentResponse.model_validate(seg))
@@ -0,0 +1,136 @@
+"""
+Response compression for JSON and text payloads.
+
+Verse and tafseer bodies are mostly Arabic UTF-8 (2-3 bytes per letter,
+more with harakat) and repeat the same words and keys, so they compress
+very well. This middleware:
+1. Compresses complete (single-message) responses above a size threshold
+   whose content type is on the allowlist, with brotli when the client
+   accepts it and gzip otherwise
+2. Passes through streaming responses (SSE, files) untouched
+3. Passes through bodies that are already encoded, e.g. the precompressed
+   corpus artifacts, so those are served as stored
+"""
+import gzip
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies above this size are compressed in a worker thread
+THREAD_THRESHOLD_BYTES = 256 * 1024
+
+
+def accepted_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, or None."""
+    if not accept_encoding:
+        return None
+
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the configured levels."""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete JSON/text responses."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.content_types = tuple(
+            t.strip() for t in settings.compression_content_types.split(",") if t.strip()
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            if start_message is None:  # Already sent (should not happen)
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._compressible(start, body):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) > THREAD_THRESHOLD_BYTES:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Strong validators are per byte stream; the encoded body is a new one
+                headers["ETag"] = f"W/{etag}"
+
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, start: Message, body: bytes) -> bool:
+        """Whether a complete response should be compressed."""
+        if len(body) < settings.compression_min_bytes:
+            return False
+        if start.get("status", 200) in (204, 206, 304):
+            return False
+
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "text/event-stream":
+            return False
+        return content_type.startswith(self.content_types)
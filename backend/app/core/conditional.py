@@ -0,0 +1,168 @@
+"""
+HTTP conditional requests for read-only routes.
+
+Route responses only change when a seed or index script bumps the data
+version of a dataset they read (see app/db/data_version.py), so:
+
+1. The ETag is a hash of those versions plus the build id, which is
+   derived from the application source, so a deploy that changes a
+   code-defined response (intents, categories, ...) changes its ETag
+2. Last-Modified is the time of the latest bump
+3. A matching If-None-Match / If-Modified-Since is answered with 304
+   from a dependency, before the route queries or serializes anything
+
+Versions are cached per worker for a few seconds, so most revalidations
+cost neither a database query nor a Redis round trip.
+"""
+import hashlib
+import time
+from functools import lru_cache
+from pathlib import Path
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from app.core.config import settings
+from app.db.data_version import get_data_stamps
+
+
+@lru_cache(maxsize=1)
+def build_id() -> str:
+    """
+    Build id mixed into every ETag.
+
+    settings.http_cache_build_id when set; otherwise a hash of the app
+    package's source files, computed once per process. Every worker of a
+    deploy gets the same id, and any code change gives a new one.
+    """
+    if settings.http_cache_build_id:
+        return settings.http_cache_build_id
+
+    digest = hashlib.sha1()
+    root = Path(__file__).resolve().parent.parent  # The app package
+    for path in sorted(root.rglob("*.py")):
+        digest.update(str(path.relative_to(root)).encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(
+        tag == "*" or tag == opaque or tag == f"W/{opaque}"
+        for tag in candidates
+    )
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: Optional[int]) -> bool:
+    """Check an If-Modified-Since header against a unix timestamp."""
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return last_modified <= since
+
+
+@dataclass
+class CacheValidators:
+    """Validators and cache headers for one response."""
+    etag: Optional[str] = None
+    last_modified: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def matches(self, request: Request) -> bool:
+        """Whether the client's cached copy is still current."""
+        if self.etag is None:
+            return False
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            return not_modified(if_none_match, self.etag)
+        return not_modified_since(request.headers.get("if-modified-since"), self.last_modified)
+
+    def apply(self, response: Response) -> Response:
+        """Add the headers to a response a route builds itself (keeps its own ETag)."""
+        for name, value in self.headers.items():
+            if name.lower() not in response.headers:
+                response.headers[name] = value
+        return response
+
+
+class DataVersionCache:
+    """Per-worker cache of dataset stamps, refreshed every few seconds."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else settings.data_version_check_seconds
+        )
+        self._stamps: Dict[Tuple[str, ...], Tuple[float, Dict[str, Tuple[int, Optional[int]]]]] = {}
+
+    async def get(self, datasets: Tuple[str, ...]) -> Optional[Dict[str, Tuple[int, Optional[int]]]]:
+        cached = self._stamps.get(datasets)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.ttl_seconds:
+            return cached[1]
+
+        stamps = await get_data_stamps(datasets)
+        if stamps is None:
+            return None
+        self._stamps[datasets] = (now, stamps)
+        return stamps
+
+
+data_version_cache = DataVersionCache()
+
+
+async def cache_validators(datasets: Sequence[str]) -> CacheValidators:
+    """Build validators for a response that depends on the given datasets."""
+    datasets = tuple(sorted(datasets))
+    if not settings.http_cache_enabled:
+        return CacheValidators()
+
+    stamps = await data_version_cache.get(datasets)
+    if stamps is None:
+        # Redis is down: without versions there is nothing safe to validate against
+        return CacheValidators(headers={"Cache-Control": "no-cache"})
+
+    parts = [build_id()] + [f"{d}={stamps[d][0]}" for d in datasets]
+    etag = 'W/"' + hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16] + '"'
+    modified = [stamps[d][1] for d in datasets if stamps[d][1] is not None]
+    last_modified = max(modified) if modified else None
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age}",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return CacheValidators(etag=etag, last_modified=last_modified, headers=headers)
+
+
+def conditional_get(*datasets: str):
+    """
+    Dependency factory for read-only GET routes.
+
+    Raises a 304 when the client's copy is current; otherwise sets the
+    validators on the response and returns them (routes that return a
+    Response object themselves call validators.apply()).
+    """
+    async def dependency(request: Request, response: Response) -> CacheValidators:
+        validators = await cache_validators(datasets)
+        if validators.matches(request):
+            # Same Vary as the 200, which compression may encode per Accept-Encoding
+            raise HTTPException(
+                status_code=304,
+                headers={**validators.headers, "Vary": "Accept-Encoding"},
+            )
+        for name, value in validators.headers.items():
+            response.headers[name] = value
+        return validators
+
+    return dependency
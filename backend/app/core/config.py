@@ -36,18 +36,99 @@ class Settings(BaseSettings):
     anthropic_api_key: Optional[str] = None
     anthropic_model: str = "claude-sonnet-4-20250514"
 
+    # LLM
+    llm_provider: str = "anthropic"  # "anthropic" or "stub" (local, no API key)
+    llm_prompt_cache_enabled: bool = True  # Cache the static system prompt
+    llm_cache_sources: bool = True  # Also cache the retrieved sources section
+
+    # LLM gateway (per-worker limits on concurrent Messages API calls)
+    llm_max_concurrency: int = 8
+    llm_max_queue: int = 32  # Waiting calls per priority lane before rejecting
+    llm_queue_timeout_seconds: float = 30.0
+    llm_max_retries: int = 3  # Retries on 429 (rate limited) / 529 (overloaded)
+    llm_retry_base_seconds: float = 1.0
+    llm_retry_max_seconds: float = 20.0
+
     # Embedding Model
     embedding_model_multilingual: str = "intfloat/multilingual-e5-large"
     embedding_dimension: int = 1024
 
+    # Claim support (do cited chunks support the cited sentences?)
+    claim_support_enabled: bool = True  # Check every RAG answer
+    # Opt-in: loads the embedding model (~2 GB) at startup and embeds claims on CPU
+    claim_support_embeddings_enabled: bool = False  # False = keyword overlap only
+    # Minimum cosine similarity when embeddings are on. E5 cosine scores sit in
+    # a narrow high band (unrelated text often scores 0.7+), so this is only a
+    # starting point: tune it on labelled answers before relying on the warning.
+    claim_support_threshold: float = 0.8
+    claim_support_chunk_cache_size: int = 2048  # Chunk vectors kept between answers
+
     # RAG Configuration
     rag_top_k: int = 10
     rag_min_confidence: float = 0.5
     rag_citation_required: bool = True
+    rag_stream_max_invalid_citations: int = 3  # Abort a streamed answer after this many (0 = never)
+    rag_debug_enabled: bool = True  # Allow "debug": true on /rag/ask to return per-stage timings
+    rag_trace_log: bool = True  # Log per-stage timings of every question
+    rag_stage_stats_window: int = 500  # Recent samples per stage kept for percentiles
+
+    # Request coalescing (identical in-flight /rag/ask questions)
+    rag_coalesce_enabled: bool = True
+    rag_coalesce_redis: bool = False  # Also coalesce across workers via a Redis lock
+    rag_coalesce_lock_ttl_seconds: int = 60
+    rag_coalesce_result_ttl_seconds: int = 10
+
+    # Async RAG jobs (rq workers)
+    rag_job_queue: str = "default"
+    rag_job_timeout_seconds: int = 300
+    rag_job_result_ttl_seconds: int = 3600
+
+    # Batch verse lookups
+    verse_batch_max_refs: int = 100  # References per request
+    verse_batch_max_verses: int = 1000  # Verses per request (after expanding ranges)
+
+    # HTTP caching of read-only routes (ETags follow the seed/index data versions)
+    http_cache_enabled: bool = True
+    http_cache_max_age: int = 60  # Cache-Control max-age (seconds) before revalidating
+    http_cache_build_id: str = ""  # Empty = hash of the app source (changes on every code deploy)
+    data_version_check_seconds: float = 5.0  # How long workers trust their copy of the data versions
+
+    # Response compression (complete JSON/text responses; SSE streams pass through)
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024  # Smaller bodies are sent as-is
+    compression_content_types: str = "application/json,text/"  # Comma-separated prefixes
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5  # 0-11; higher is smaller but much slower
+
+    # Precompressed sura/page/juz responses (scripts/index/build_corpus_artifacts.py)
+    corpus_artifacts_enabled: bool = True
+    corpus_artifacts_dir: str = "../data/artifacts"  # Relative to the backend directory
+    corpus_artifacts_cache_mb: int = 64  # Bodies kept in memory per worker
+    corpus_artifacts_max_age: int = 3600  # Cache-Control max-age (seconds)
+
+    # Story graph (in-memory, rebuilt when seed_stories.py bumps the data version)
+    story_graph_check_seconds: float = 5.0
+    story_graph_max_depth: int = 6  # Traversal hop limit
+    story_graph_max_nodes: int = 2000  # Segments visited per traversal
+
+    # Audit sink (batched background inserts into audit_logs)
+    audit_enabled: bool = True
+    audit_queue_size: int = 10000  # Rows held in memory before the drop policy applies
+    audit_batch_size: int = 500  # Rows per INSERT
+    audit_flush_seconds: float = 2.0
+    audit_drop_policy: str = "drop_oldest"  # or "drop_newest"
+    audit_put_timeout_seconds: float = 0.05  # How long put() waits for room in a full queue
+    audit_retention_months: int = 6  # Monthly partitions older than this are dropped (0 = keep all)
+    audit_partition_months_ahead: int = 2  # Partitions created ahead of time
+    audit_maintenance_hours: float = 6.0  # How often the API runs partition maintenance
 
     # Safety
     max_query_length: int = 1000
-    rate_limit_per_minute: int = 30
+    rate_limit_per_minute: int = 30  # Default per-client budget for API routes
+    rate_limit_enabled: bool = True
+    rate_limit_rag_per_minute: int = 5  # LLM-backed questions (/rag/ask)
+    rate_limit_read_per_minute: int = 300  # Verse and story reads
+    rate_limit_trust_forwarded_for: bool = False  # Only behind a trusted proxy
 
 
 @lru_cache
@@ -0,0 +1,239 @@
+"""
+Distributed rate limiting for API routes.
+
+Token buckets per (client, route budget):
+1. Stored in Redis and updated atomically by a Lua script, so all
+   workers share one budget per client
+2. Falls back to in-process buckets while Redis is unavailable
+3. Responses carry RateLimit-Limit / RateLimit-Remaining /
+   RateLimit-Reset headers; rejected requests get 429 + Retry-After
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.db.redis import get_async_redis
+
+
+# Refill the bucket for elapsed time, then try to take `cost` tokens.
+# Uses the Redis server clock so all workers agree on time.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass
+class RateLimitRule:
+    """A route budget: requests per minute per client."""
+    name: str
+    limit_per_minute: int
+    path_prefixes: Tuple[str, ...]
+    methods: Optional[Tuple[str, ...]] = None  # None = any method
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods and method not in self.methods:
+            return False
+        return path.startswith(self.path_prefixes)
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of charging one request against a bucket."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: int  # Until the bucket is full again
+    retry_after: int  # Until the next request would be allowed
+
+
+def build_rules() -> List[RateLimitRule]:
+    """
+    Route budgets, most specific first.
+
+    LLM-backed questions get a much lower budget than cheap reads.
+    """
+    return [
+        RateLimitRule(
+            name="rag_ask",
+            limit_per_minute=settings.rate_limit_rag_per_minute,
+            path_prefixes=("/api/v1/rag/ask", "/api/v1/rag/jobs"),
+            methods=("POST",),
+        ),
+        RateLimitRule(
+            name="read",
+            limit_per_minute=settings.rate_limit_read_per_minute,
+            path_prefixes=("/api/v1/quran", "/api/v1/stories"),
+            methods=("GET", "HEAD"),
+        ),
+        RateLimitRule(
+            name="default",
+            limit_per_minute=settings.rate_limit_per_minute,
+            path_prefixes=("/api/",),
+        ),
+    ]
+
+
+class InMemoryTokenBuckets:
+    """Per-process token buckets, used while Redis is unavailable."""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, capacity: int, rate_per_ms: float, cost: int = 1) -> Tuple[bool, float]:
+        now = time.monotonic() * 1000
+        tokens, ts = self._buckets.pop(key, (float(capacity), now))
+        tokens = min(capacity, tokens + max(0.0, now - ts) * rate_per_ms)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return allowed, tokens
+
+
+class RateLimiter:
+    """Token-bucket limiter backed by Redis with an in-memory fallback."""
+
+    KEY_PREFIX = "ratelimit:"
+    REDIS_RETRY_SECONDS = 30.0
+
+    def __init__(self):
+        self._script = None
+        self._fallback = InMemoryTokenBuckets()
+        self._redis_down_until = 0.0
+
+    async def _take_redis(self, key: str, capacity: int, rate_per_ms: float) -> Tuple[bool, float]:
+        if self._script is None:
+            self._script = get_async_redis().register_script(TOKEN_BUCKET_LUA)
+        allowed, tokens = await self._script(
+            keys=[self.KEY_PREFIX + key],
+            args=[capacity, rate_per_ms, 1],
+        )
+        return bool(int(allowed)), float(tokens)
+
+    async def hit(self, client_id: str, rule: RateLimitRule) -> RateLimitDecision:
+        """Charge one request from client_id against rule's budget."""
+        capacity = max(rule.limit_per_minute, 1)
+        rate_per_ms = capacity / 60000.0
+        key = f"{rule.name}:{client_id}"
+
+        allowed, tokens = None, 0.0
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, tokens = await self._take_redis(key, capacity, rate_per_ms)
+            except Exception as e:
+                print(f"Rate limiter: Redis unavailable, using in-memory buckets ({e})")
+                self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+                self._script = None
+
+        if allowed is None:
+            allowed, tokens = self._fallback.take(key, capacity, rate_per_ms)
+
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=capacity,
+            remaining=max(0, math.floor(tokens)),
+            reset_seconds=math.ceil((capacity - tokens) / rate_per_ms / 1000),
+            retry_after=0 if allowed else max(1, math.ceil((1 - tokens) / rate_per_ms / 1000)),
+        )
+
+
+def get_client_id(scope: Scope) -> str:
+    """Identify the client (first X-Forwarded-For hop if trusted, else peer IP)."""
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing per-client, per-route token buckets."""
+
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter()
+        self.rules = build_rules()
+
+    def _match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        rule = self._match(method, scope["path"]) if method != "OPTIONS" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await self.limiter.hit(get_client_id(scope), rule)
+        limit_headers = {
+            "RateLimit-Limit": str(decision.limit),
+            "RateLimit-Remaining": str(decision.remaining),
+            "RateLimit-Reset": str(decision.reset_seconds),
+        }
+
+        if not decision.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "error": "Too many requests",
+                    "detail": f"Rate limit exceeded for '{rule.name}' "
+                              f"({decision.limit} requests per minute)",
+                },
+                headers={**limit_headers, "Retry-After": str(decision.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in limit_headers.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
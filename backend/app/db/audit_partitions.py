@@ -0,0 +1,190 @@
+"""
+Monthly partitions and retention for audit_logs.
+
+audit_logs is range-partitioned on created_at (migration 005):
+1. ensure_audit_partitions() creates the partitions for the current month
+   and the next few, so inserts rarely land in the default partition; rows
+   that did land there are moved into their month's partition when it is
+   created (Postgres refuses the new partition otherwise)
+2. drop_expired_audit_partitions() detaches and drops whole months older
+   than the retention window, instead of running DELETEs, and deletes
+   expired rows from the default partition
+3. maintain_audit_partitions() does both under an advisory lock, so
+   workers running it at the same time do not race; the drops run in
+   their own transaction, so a failed create does not block retention
+
+The API runs maintenance at startup and periodically from the audit sink;
+scripts/maintenance/audit_partitions.py runs it from cron.
+"""
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+AUDIT_TABLE = "audit_logs"
+DEFAULT_PARTITION = "audit_logs_default"
+PARTITION_PATTERN = re.compile(r"^audit_logs_p(\d{4})(\d{2})$")
+MAINTENANCE_LOCK_ID = 727_001  # pg_advisory_xact_lock key
+
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month `count` months after `month`."""
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{AUDIT_TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def partition_bounds(month: date) -> Tuple[date, date]:
+    """[start, end) of a monthly partition."""
+    start = date(month.year, month.month, 1)
+    return start, add_months(start, 1)
+
+
+async def list_audit_partitions(session: AsyncSession) -> List[str]:
+    """Names of the monthly partitions currently attached to audit_logs."""
+    result = await session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ),
+        {"table": AUDIT_TABLE},
+    )
+    return sorted(name for name in result.scalars().all() if PARTITION_PATTERN.match(name))
+
+
+async def _default_partition_exists(session: AsyncSession) -> bool:
+    result = await session.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION}
+    )
+    return bool(result.scalar())
+
+
+async def _create_partition(session: AsyncSession, month: date, has_default: bool) -> None:
+    """Create one monthly partition, moving its rows out of the default partition."""
+    name = partition_name(month)
+    start, end = partition_bounds(month)
+    create = (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {AUDIT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    in_range = "created_at >= :start AND created_at < :end"
+    bounds = {"start": start, "end": end}
+
+    stranded = False
+    if has_default:
+        result = await session.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"), bounds
+        )
+        stranded = bool(result.scalar())
+    if not stranded:
+        await session.execute(text(create))
+        return
+
+    # Detach the default partition so the new one can claim the range, move
+    # the rows across, then reattach it (this rescans the default partition)
+    await session.execute(text(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    await session.execute(text(create))
+    await session.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds
+    )
+    await session.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    await session.execute(
+        text(f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+
+
+async def ensure_audit_partitions(
+    session: AsyncSession,
+    months_ahead: Optional[int] = None,
+    today: Optional[date] = None,
+) -> List[str]:
+    """Create missing partitions from this month through `months_ahead`. Returns those created."""
+    months_ahead = settings.audit_partition_months_ahead if months_ahead is None else months_ahead
+    current = (today or datetime.utcnow().date()).replace(day=1)
+    existing = set(await list_audit_partitions(session))
+    has_default = await _default_partition_exists(session)
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        await _create_partition(session, month, has_default)
+        created.append(name)
+    return created
+
+
+async def drop_expired_audit_partitions(
+    session: AsyncSession,
+    retention_months: Optional[int] = None,
+    today: Optional[date] = None,
+) -> List[str]:
+    """
+    Drop partitions that end before the retention window. Returns those dropped.
+
+    Rows older than the window in the default partition are deleted too.
+    """
+    retention_months = settings.audit_retention_months if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months((today or datetime.utcnow().date()).replace(day=1), -retention_months)
+    dropped = []
+    for name in await list_audit_partitions(session):
+        match = PARTITION_PATTERN.match(name)
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if partition_bounds(month)[1] > cutoff:
+            continue
+        await session.execute(text(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {name}"))
+        await session.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+
+    if await _default_partition_exists(session):
+        await session.execute(
+            text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff"),
+            {"cutoff": cutoff},
+        )
+    return dropped
+
+
+async def lock_audit_maintenance(session: AsyncSession) -> None:
+    """Take the maintenance advisory lock until the current transaction ends."""
+    await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_ID})
+
+
+async def maintain_audit_partitions(
+    session: AsyncSession,
+    retention_months: Optional[int] = None,
+) -> Tuple[List[str], List[str]]:
+    """
+    Create upcoming partitions, then drop expired ones.
+
+    Each step is its own locked transaction. If the creates fail, the drops
+    still run and the create error is raised afterwards.
+    """
+    create_error = None
+    try:
+        await lock_audit_maintenance(session)
+        created = await ensure_audit_partitions(session)
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        created, create_error = [], e
+
+    await lock_audit_maintenance(session)
+    dropped = await drop_expired_audit_partitions(session, retention_months=retention_months)
+    await session.commit()
+
+    if create_error is not None:
+        raise create_error
+    return created, dropped
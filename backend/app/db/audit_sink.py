@@ -0,0 +1,239 @@
+"""
+Background audit sink with batched inserts.
+
+AuditLog.log adds a row to the caller's session, which puts an insert in
+the request's transaction. Request paths (e.g. every RAG question) use
+this sink instead:
+1. emit() appends the row to a bounded in-process queue (no I/O)
+2. A background task flushes the queue every few seconds, or as soon as
+   a batch fills, with one multi-row INSERT per batch
+3. When the queue is full, the drop policy sheds audit rows rather than
+   slowing requests; put() can wait briefly for room first
+4. Shutdown lets an in-progress flush finish, then flushes whatever is
+   still queued
+5. Every few hours the same task runs audit partition maintenance
+   (next months' partitions, retention drops)
+
+Auditing is best effort: failed batches are counted and dropped.
+"""
+import asyncio
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.audit_partitions import maintain_audit_partitions
+from app.models.audit import AuditLog
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+# How long stop() waits for an in-progress flush before cancelling it
+STOP_TIMEOUT_SECONDS = 10.0
+
+# Every row carries every column so a batch is a single multi-row INSERT
+AUDIT_COLUMNS = (
+    "action", "actor", "entity_type", "entity_id", "message", "details", "status",
+    "error_message", "created_at", "duration_ms", "request_id", "ip_address",
+)
+
+
+def new_request_id() -> str:
+    """Short id tying together the audit rows of one request."""
+    return uuid.uuid4().hex[:16]
+
+
+class AuditSink:
+    """Bounded queue of audit rows, written in batches by a background task."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        max_queue: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        drop_policy: Optional[str] = None,
+    ):
+        self._session_factory = session_factory
+        self.max_queue = max_queue or settings.audit_queue_size
+        self.batch_size = batch_size or settings.audit_batch_size
+        self.flush_seconds = flush_seconds or settings.audit_flush_seconds
+        self.drop_policy = drop_policy or settings.audit_drop_policy
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._maintained_at: Optional[float] = None
+
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    def _get_session_factory(self) -> Callable:
+        if self._session_factory is None:
+            from app.db.database import AsyncSessionLocal
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    @staticmethod
+    def _row(action: str, actor: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict.fromkeys(AUDIT_COLUMNS)
+        row.update(fields)
+        row["action"] = str(getattr(action, "value", action))
+        row["actor"] = actor
+        row["status"] = row["status"] or "success"
+        row["created_at"] = row["created_at"] or datetime.utcnow()
+        return row
+
+    def emit(self, action: str, actor: str = "system", **fields: Any) -> bool:
+        """
+        Queue an audit row without blocking. Returns False if it was dropped.
+
+        Takes the same fields as AuditLog.log, plus request_id and ip_address.
+        """
+        if not settings.audit_enabled:
+            return False
+
+        row = self._row(action, actor, fields)
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if self.drop_policy == DROP_NEWEST:
+                return False
+            self._queue.popleft()
+
+        self._queue.append(row)
+        self.emitted += 1
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    async def put(
+        self,
+        action: str,
+        actor: str = "system",
+        timeout: Optional[float] = None,
+        **fields: Any,
+    ) -> bool:
+        """Like emit(), but first wait up to `timeout` seconds for room in a full queue."""
+        timeout = settings.audit_put_timeout_seconds if timeout is None else timeout
+        if len(self._queue) >= self.max_queue and self._space is not None and timeout > 0:
+            self._space.clear()
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._space.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.emit(action, actor, **fields)
+
+    async def start(self) -> None:
+        """Start the background flusher (call from the app lifespan)."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out everything still queued."""
+        if self._task is not None:
+            # Let the flusher finish its current batch and exit
+            self._stopping.set()
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout=STOP_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                # Stuck (e.g. database unreachable): cancel; flush() requeues its
+                # batch unless the commit had already started
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                return  # stop() drains the queue
+
+            if (
+                self._maintained_at is None
+                or time.monotonic() - self._maintained_at >= settings.audit_maintenance_hours * 3600
+            ):
+                await self.maintain()
+            await self.flush()
+
+    async def maintain(self) -> None:
+        """Create upcoming audit partitions and drop expired ones."""
+        self._maintained_at = time.monotonic()
+        try:
+            async with self._get_session_factory()() as session:
+                created, dropped = await maintain_audit_partitions(session)
+        except Exception as e:
+            print(f"Audit partitions: maintenance failed ({e})")
+            return
+        if created or dropped:
+            print(f"Audit partitions: created {created or 'none'}, dropped {dropped or 'none'}")
+
+    async def flush(self) -> int:
+        """Write queued rows in batches. Returns the number written."""
+        written = 0
+        while self._queue:
+            count = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(count)]
+            if self._space is not None:
+                self._space.set()
+
+            committing = False
+            try:
+                async with self._get_session_factory()() as session:
+                    await session.execute(insert(AuditLog), batch)
+                    committing = True
+                    await session.commit()
+            except asyncio.CancelledError:
+                if committing:
+                    # The commit may have landed; writing the batch again
+                    # could duplicate it, so count it as failed instead
+                    self.failed += len(batch)
+                    print(f"Audit sink: {len(batch)} rows cancelled mid-commit, may be lost")
+                else:
+                    # Put the batch back so the final flush still writes it
+                    self._queue.extendleft(reversed(batch))
+                raise
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Audit sink: dropped {len(batch)} rows ({e})")
+                break
+
+            self.written += len(batch)
+            written += len(batch)
+        return written
+
+    def snapshot(self) -> dict:
+        """Get sink state for reporting."""
+        return {
+            "running": self._task is not None,
+            "queued": len(self._queue),
+            "emitted": self.emitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+# Shared sink for this worker
+audit_sink = AuditSink()
@@ -0,0 +1,62 @@
+"""
+Data-version stamps for in-memory caches of seeded data.
+
+Seed scripts bump a per-dataset counter in Redis after committing;
+API workers compare it with the version their cache was built from and
+rebuild when it changes. This works across processes and machines.
+The same stamps back the HTTP validators (ETag, Last-Modified) of the
+read-only routes.
+"""
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.db.redis import get_async_redis, get_sync_redis
+
+DATA_VERSION_PREFIX = "tadabbur:data_version:"
+DATA_MODIFIED_PREFIX = "tadabbur:data_modified:"
+
+
+def bump_data_version(dataset: str) -> int:
+    """Mark a dataset as changed (sync, for seed scripts). Returns the new version."""
+    client = get_sync_redis()
+    version = int(client.incr(DATA_VERSION_PREFIX + dataset))
+    client.set(DATA_MODIFIED_PREFIX + dataset, int(time.time()))
+    return version
+
+
+async def get_data_version(dataset: str) -> Optional[int]:
+    """Get the current version of a dataset (0 if never bumped, None if Redis is unavailable)."""
+    try:
+        value = await get_async_redis().get(DATA_VERSION_PREFIX + dataset)
+    except Exception as e:
+        print(f"Data version check failed for {dataset}: {e}")
+        return None
+    return int(value) if value is not None else 0
+
+
+async def get_data_stamps(
+    datasets: Sequence[str],
+) -> Optional[Dict[str, Tuple[int, Optional[int]]]]:
+    """
+    Get (version, modified unix time) for several datasets in one round trip.
+
+    Returns None if Redis is unavailable.
+    """
+    if not datasets:
+        return {}
+
+    keys = [DATA_VERSION_PREFIX + d for d in datasets] + [DATA_MODIFIED_PREFIX + d for d in datasets]
+    try:
+        values = await get_async_redis().mget(keys)
+    except Exception as e:
+        print(f"Data version check failed for {', '.join(datasets)}: {e}")
+        return None
+
+    count = len(datasets)
+    return {
+        dataset: (
+            int(values[i]) if values[i] is not None else 0,
+            int(values[count + i]) if values[count + i] is not None else None,
+        )
+        for i, dataset in enumerate(datasets)
+    }
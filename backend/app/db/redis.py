@@ -0,0 +1,62 @@
+"""
+Redis connection management.
+
+A REDIS_URL of "fakeredis://" selects an in-process Redis stand-in
+(requires the fakeredis dev dependency) for local runs and tests.
+"""
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_async_redis: Optional[aioredis.Redis] = None
+_sync_redis: Optional[redis.Redis] = None
+_fake_server = None
+
+
+def is_fake_redis() -> bool:
+    """Check whether the in-process Redis stand-in is configured."""
+    return settings.redis_url.startswith("fakeredis://")
+
+
+def _get_fake_server():
+    """Shared fake server, so sync and async clients see the same data."""
+    global _fake_server
+    if _fake_server is None:
+        import fakeredis
+        _fake_server = fakeredis.FakeServer()
+    return _fake_server
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Get the shared async Redis client (created lazily)."""
+    global _async_redis
+    if _async_redis is None:
+        if is_fake_redis():
+            import fakeredis
+            _async_redis = fakeredis.FakeAsyncRedis(server=_get_fake_server())
+        else:
+            _async_redis = aioredis.from_url(settings.redis_url)
+    return _async_redis
+
+
+def get_sync_redis() -> redis.Redis:
+    """Get the shared sync Redis client (used by rq)."""
+    global _sync_redis
+    if _sync_redis is None:
+        if is_fake_redis():
+            import fakeredis
+            _sync_redis = fakeredis.FakeRedis(server=_get_fake_server())
+        else:
+            _sync_redis = redis.Redis.from_url(settings.redis_url)
+    return _sync_redis
+
+
+async def close_async_redis() -> None:
+    """Close the shared async Redis client."""
+    global _async_redis
+    if _async_redis is not None:
+        await _async_redis.close()
+        _async_redis = None
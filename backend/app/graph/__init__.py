@@ -0,0 +1 @@
+# Story graph package
@@ -0,0 +1,596 @@
+"""
+In-memory story graph.
+
+Stories, segments and connections are loaded once into a StoryGraph with
+adjacency lists in both directions. Per-story and whole-corpus graph
+payloads are serialized once per build and served with ETags.
+
+A per-sura interval index over segment aya ranges answers "which
+stories touch these verses" without a query.
+
+Traversal (k-hop neighborhoods, shortest paths, theme-constrained)
+runs over an undirected adjacency list of (neighbor, edge index) pairs,
+ordered by connection strength, with depth and fan-out limits.
+
+StoryGraphCache rebuilds the graph when the "stories" data version
+changes (bumped by scripts/ingest/seed_stories.py); the version is
+checked at most every story_graph_check_seconds.
+"""
+import asyncio
+import hashlib
+import heapq
+from bisect import bisect_right
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.data_version import get_data_version
+from app.models.story import Story, StorySegment, StoryConnection
+
+DATASET = "stories"
+
+
+@dataclass
+class GraphStory:
+    """A story node."""
+    id: str
+    name_ar: str
+    name_en: str
+    category: str
+    themes: List[str]
+    segment_ids: List[str] = field(default_factory=list)  # In narrative order
+
+
+@dataclass
+class GraphSegment:
+    """A segment node."""
+    id: str
+    story_id: str
+    narrative_order: int
+    segment_type: Optional[str]
+    aspect: Optional[str]
+    sura_no: int
+    aya_start: int
+    aya_end: int
+    summary_ar: Optional[str]
+    summary_en: Optional[str]
+
+    @property
+    def label(self) -> str:
+        return f"{self.sura_no}:{self.aya_start}-{self.aya_end}"
+
+    @property
+    def verse_reference(self) -> str:
+        if self.aya_start == self.aya_end:
+            return f"{self.sura_no}:{self.aya_start}"
+        return f"{self.sura_no}:{self.aya_start}-{self.aya_end}"
+
+
+@dataclass
+class GraphEdge:
+    """A connection between two segments."""
+    id: int
+    source: str
+    target: str
+    type: str
+    strength: float
+    shared_themes: List[str]
+
+    @property
+    def label(self) -> str:
+        return self.type.replace("_", " ").title()
+
+
+@dataclass
+class GraphNeighborhood:
+    """Result of a k-hop traversal."""
+    distances: Dict[str, int]  # Segment ID -> hops from the seed
+    edge_ids: List[int]  # Indexes into StoryGraph.edges
+    truncated: bool  # Stopped at the node limit
+
+
+@dataclass
+class GraphPath:
+    """Result of a shortest-path query."""
+    segment_ids: List[str]  # From source to target
+    edge_ids: List[int]  # Indexes into StoryGraph.edges, one per hop
+    cost: float
+
+
+# Lower bound on strength when converting it to a path cost
+MIN_EDGE_STRENGTH = 0.05
+
+
+@dataclass
+class GraphPayload:
+    """A serialized graph response."""
+    body: bytes
+    etag: str
+
+
+def _payload(data: dict) -> GraphPayload:
+    """Serialize a graph response once and derive its ETag."""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return GraphPayload(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+
+
+class StoryGraph:
+    """
+    Immutable snapshot of the story graph.
+
+    Adjacency lists map a segment ID to indexes into `edges`, for
+    outgoing and incoming connections separately.
+    """
+
+    def __init__(
+        self,
+        stories: List[GraphStory],
+        segments: List[GraphSegment],
+        edges: List[GraphEdge],
+        version: Optional[int] = None,
+    ):
+        self.version = version
+        self.built_at = time.time()
+
+        self.stories: Dict[str, GraphStory] = {s.id: s for s in stories}
+        self.segments: Dict[str, GraphSegment] = {s.id: s for s in segments}
+        self.edges: List[GraphEdge] = [
+            e for e in edges if e.source in self.segments and e.target in self.segments
+        ]
+
+        for segment in sorted(segments, key=lambda s: s.narrative_order):
+            story = self.stories.get(segment.story_id)
+            if story is not None:
+                story.segment_ids.append(segment.id)
+
+        self.out_edges: Dict[str, List[int]] = {}
+        self.in_edges: Dict[str, List[int]] = {}
+        for i, edge in enumerate(self.edges):
+            self.out_edges.setdefault(edge.source, []).append(i)
+            self.in_edges.setdefault(edge.target, []).append(i)
+
+        # Undirected adjacency for traversal, strongest connections first
+        self.adjacency: Dict[str, List[Tuple[str, int]]] = {}
+        for i, edge in enumerate(self.edges):
+            self.adjacency.setdefault(edge.source, []).append((edge.target, i))
+            self.adjacency.setdefault(edge.target, []).append((edge.source, i))
+        for neighbors in self.adjacency.values():
+            neighbors.sort(key=lambda item: -self.edges[item[1]].strength)
+
+        # Verse -> segment interval index: per sura, segments sorted by
+        # aya_start with a running maximum of aya_end
+        self._verse_index: Dict[int, Tuple[List[int], List[int], List[GraphSegment]]] = {}
+        by_sura: Dict[int, List[GraphSegment]] = {}
+        for segment in segments:
+            by_sura.setdefault(segment.sura_no, []).append(segment)
+        for sura_no, items in by_sura.items():
+            items.sort(key=lambda s: (s.aya_start, s.aya_end))
+            starts, max_ends = [], []
+            running = 0
+            for item in items:
+                running = max(running, item.aya_end)
+                starts.append(item.aya_start)
+                max_ends.append(running)
+            self._verse_index[sura_no] = (starts, max_ends, items)
+
+        # Serialized payloads, built on first request
+        self._story_payloads: Dict[str, GraphPayload] = {}
+        self._corpus_payload: Optional[GraphPayload] = None
+
+    @classmethod
+    async def load(cls, session: AsyncSession, version: Optional[int] = None) -> "StoryGraph":
+        """Load the whole graph with three column-only queries."""
+        story_rows = (await session.execute(
+            select(Story.id, Story.name_ar, Story.name_en, Story.category, Story.themes)
+        )).all()
+        segment_rows = (await session.execute(
+            select(
+                StorySegment.id,
+                StorySegment.story_id,
+                StorySegment.narrative_order,
+                StorySegment.segment_type,
+                StorySegment.aspect,
+                StorySegment.sura_no,
+                StorySegment.aya_start,
+                StorySegment.aya_end,
+                StorySegment.summary_ar,
+                StorySegment.summary_en,
+            )
+        )).all()
+        edge_rows = (await session.execute(
+            select(
+                StoryConnection.id,
+                StoryConnection.source_segment_id,
+                StoryConnection.target_segment_id,
+                StoryConnection.connection_type,
+                StoryConnection.strength,
+                StoryConnection.shared_themes,
+            ).order_by(StoryConnection.id)
+        )).all()
+
+        return cls(
+            stories=[
+                GraphStory(r.id, r.name_ar, r.name_en, r.category, list(r.themes or []))
+                for r in story_rows
+            ],
+            segments=[GraphSegment(*r) for r in segment_rows],
+            edges=[
+                GraphEdge(
+                    id=r.id,
+                    source=r.source_segment_id,
+                    target=r.target_segment_id,
+                    type=r.connection_type,
+                    strength=r.strength if r.strength is not None else 1.0,
+                    shared_themes=list(r.shared_themes or []),
+                )
+                for r in edge_rows
+            ],
+            version=version,
+        )
+
+    def segment_edges(self, segment_id: str) -> List[GraphEdge]:
+        """Outgoing and incoming connections of a segment."""
+        return [
+            self.edges[i]
+            for i in self.out_edges.get(segment_id, []) + self.in_edges.get(segment_id, [])
+        ]
+
+    # -------------------------------------------------------------------------
+    # Verse lookups
+    # -------------------------------------------------------------------------
+
+    def segments_in_range(
+        self,
+        sura_no: int,
+        aya_start: int = 1,
+        aya_end: int = 10_000,
+    ) -> List[GraphSegment]:
+        """
+        Segments whose aya range overlaps [aya_start, aya_end] in a sura.
+
+        Walks back from the last segment starting at or before aya_end and
+        stops once the running maximum end falls below aya_start, so cost
+        is proportional to the number of candidates, not the sura.
+        """
+        entry = self._verse_index.get(sura_no)
+        if entry is None:
+            return []
+
+        starts, max_ends, items = entry
+        matches = []
+        i = bisect_right(starts, aya_end) - 1
+        while i >= 0 and max_ends[i] >= aya_start:
+            if items[i].aya_end >= aya_start:
+                matches.append(items[i])
+            i -= 1
+        matches.reverse()
+        return matches
+
+    # -------------------------------------------------------------------------
+    # Traversal
+    # -------------------------------------------------------------------------
+
+    def neighbors(
+        self,
+        segment_id: str,
+        themes: Optional[Set[str]] = None,
+        max_fanout: Optional[int] = None,
+    ) -> List[Tuple[str, int]]:
+        """
+        (neighbor, edge index) pairs of a segment, strongest first.
+
+        With `themes`, only connections sharing at least one of them are
+        followed; `max_fanout` keeps the strongest connections only.
+        """
+        neighbors = self.adjacency.get(segment_id, [])
+        if themes:
+            neighbors = [
+                (neighbor, i) for neighbor, i in neighbors
+                if themes.intersection(self.edges[i].shared_themes)
+            ]
+        return neighbors[:max_fanout] if max_fanout else neighbors
+
+    def neighborhood(
+        self,
+        segment_ids: Iterable[str],
+        depth: int,
+        themes: Optional[Set[str]] = None,
+        max_nodes: int = 500,
+        max_fanout: Optional[int] = None,
+    ) -> GraphNeighborhood:
+        """
+        Segments within `depth` hops of the seeds (breadth-first).
+
+        Every connection between two returned segments that was examined
+        is included. Stops adding segments at `max_nodes`.
+        """
+        distances = {s: 0 for s in segment_ids if s in self.segments}
+        edge_ids: Set[int] = set()
+        truncated = False
+        frontier = list(distances)
+
+        for hop in range(1, depth + 1):
+            next_frontier = []
+            for segment_id in frontier:
+                for neighbor, i in self.neighbors(segment_id, themes, max_fanout):
+                    if neighbor not in distances:
+                        if len(distances) >= max_nodes:
+                            truncated = True
+                            continue
+                        distances[neighbor] = hop
+                        next_frontier.append(neighbor)
+                    edge_ids.add(i)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        return GraphNeighborhood(distances, sorted(edge_ids), truncated)
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        themes: Optional[Set[str]] = None,
+        weighted: bool = True,
+        max_depth: int = 6,
+        max_nodes: int = 5000,
+    ) -> Optional[GraphPath]:
+        """
+        Cheapest path between two segments within `max_depth` hops.
+
+        Weighted paths cost 1/strength per connection (Dijkstra), so
+        strong connections are preferred; unweighted paths count hops.
+        Returns None if no path is found within the limits.
+
+        Search states are (segment, hops), not segments: a costlier way
+        to reach a segment in fewer hops is kept, since it may be the only
+        one that can still reach the target within `max_depth`. A state
+        is pruned only when the segment was already reached as cheaply in
+        no more hops.
+        """
+        if source not in self.segments or target not in self.segments:
+            return None
+
+        # Segment -> cheapest cost found per hop count
+        best: Dict[str, List[float]] = {source: [0.0] + [float("inf")] * max_depth}
+        previous: Dict[Tuple[str, int], Tuple[Tuple[str, int], int]] = {}
+        heap = [(0.0, 0, source)]
+        settled = 0
+
+        while heap:
+            cost, hops, segment_id = heapq.heappop(heap)
+            if segment_id == target:
+                return self._build_path((target, hops), previous, cost)
+            if cost > best[segment_id][hops] or hops >= max_depth:
+                continue
+
+            settled += 1
+            if settled > max_nodes:
+                break
+
+            for neighbor, i in self.neighbors(segment_id, themes):
+                step = (
+                    1.0 / max(self.edges[i].strength, MIN_EDGE_STRENGTH)
+                    if weighted
+                    else 1.0
+                )
+                new_cost = cost + step
+                new_hops = hops + 1
+                costs = best.get(neighbor)
+                if costs is None:
+                    costs = best[neighbor] = [float("inf")] * (max_depth + 1)
+                if min(costs[:new_hops + 1]) <= new_cost:
+                    continue  # Dominated: as cheap in no more hops
+                costs[new_hops] = new_cost
+                previous[(neighbor, new_hops)] = ((segment_id, hops), i)
+                heapq.heappush(heap, (new_cost, new_hops, neighbor))
+
+        return None
+
+    @staticmethod
+    def _build_path(
+        end: Tuple[str, int],
+        previous: Dict[Tuple[str, int], Tuple[Tuple[str, int], int]],
+        cost: float,
+    ) -> GraphPath:
+        """Walk (segment, hops) states back from the target to the source."""
+        segment_ids = [end[0]]
+        edge_ids = []
+        state = end
+        while state in previous:
+            state, i = previous[state]
+            segment_ids.append(state[0])
+            edge_ids.append(i)
+        segment_ids.reverse()
+        edge_ids.reverse()
+        return GraphPath(segment_ids, edge_ids, cost)
+
+    def subgraph(
+        self,
+        segment_ids: Iterable[str],
+        edge_ids: Iterable[int],
+        node_data: Optional[Dict[str, dict]] = None,
+    ) -> dict:
+        """Build a StoryGraphResponse-shaped dict for part of the graph."""
+        nodes = []
+        for segment_id in segment_ids:
+            node = self._segment_node(self.segments[segment_id])
+            if node_data and segment_id in node_data:
+                node["data"].update(node_data[segment_id])
+            nodes.append(node)
+        edges = [self._connection_edge(self.edges[i]) for i in edge_ids]
+        return {"nodes": nodes, "edges": edges}
+
+    # -------------------------------------------------------------------------
+    # Response payloads (shape of StoryGraphResponse)
+    # -------------------------------------------------------------------------
+
+    def story_payload(self, story_id: str) -> Optional[GraphPayload]:
+        """Graph of one story: its segments and all their connections."""
+        story = self.stories.get(story_id)
+        if story is None:
+            return None
+
+        payload = self._story_payloads.get(story_id)
+        if payload is None:
+            nodes = [self._story_node(story)]
+            edges = []
+            node_ids = {story.id}
+
+            for segment_id in story.segment_ids:
+                nodes.append(self._segment_node(self.segments[segment_id]))
+                node_ids.add(segment_id)
+                edges.append(self._contains_edge(story.id, segment_id))
+
+            seen_edges = set()
+            for segment_id in story.segment_ids:
+                for edge in self.segment_edges(segment_id):
+                    if edge.id in seen_edges:
+                        continue
+                    seen_edges.add(edge.id)
+
+                    # Include segments of other stories this one connects to
+                    for endpoint in (edge.source, edge.target):
+                        if endpoint not in node_ids:
+                            node_ids.add(endpoint)
+                            nodes.append(self._segment_node(self.segments[endpoint]))
+                    edges.append(self._connection_edge(edge))
+
+            payload = _payload({"nodes": nodes, "edges": edges})
+            self._story_payloads[story_id] = payload
+
+        return payload
+
+    def corpus_payload(self) -> GraphPayload:
+        """Graph of every story, segment and connection."""
+        if self._corpus_payload is None:
+            nodes = []
+            edges = []
+            for story in self.stories.values():
+                nodes.append(self._story_node(story))
+                for segment_id in story.segment_ids:
+                    nodes.append(self._segment_node(self.segments[segment_id]))
+                    edges.append(self._contains_edge(story.id, segment_id))
+            edges.extend(self._connection_edge(edge) for edge in self.edges)
+
+            self._corpus_payload = _payload({"nodes": nodes, "edges": edges})
+
+        return self._corpus_payload
+
+    @staticmethod
+    def _story_node(story: GraphStory) -> dict:
+        return {
+            "id": story.id,
+            "type": "story",
+            "label": story.name_en,
+            "data": {
+                "name_ar": story.name_ar,
+                "category": story.category,
+                "themes": story.themes,
+            },
+        }
+
+    @staticmethod
+    def _segment_node(segment: GraphSegment) -> dict:
+        return {
+            "id": segment.id,
+            "type": "segment",
+            "label": segment.label,
+            "data": {
+                "story_id": segment.story_id,
+                "narrative_order": segment.narrative_order,
+                "segment_type": segment.segment_type,
+                "aspect": segment.aspect,
+                "summary_en": segment.summary_en,
+                "summary_ar": segment.summary_ar,
+            },
+        }
+
+    @staticmethod
+    def _contains_edge(story_id: str, segment_id: str) -> dict:
+        return {"source": story_id, "target": segment_id, "type": "contains", "label": None}
+
+    @staticmethod
+    def _connection_edge(edge: GraphEdge) -> dict:
+        return {
+            "source": edge.source,
+            "target": edge.target,
+            "type": edge.type,
+            "label": edge.label,
+            "strength": edge.strength,
+            "shared_themes": edge.shared_themes,
+        }
+
+
+class StoryGraphCache:
+    """
+    Process-wide holder of the current StoryGraph.
+
+    get() returns the cached graph, rebuilding it when the data version
+    has changed since it was built.
+    """
+
+    def __init__(self, check_seconds: Optional[float] = None):
+        self.check_seconds = (
+            settings.story_graph_check_seconds if check_seconds is None else check_seconds
+        )
+        self._graph: Optional[StoryGraph] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, session: AsyncSession) -> StoryGraph:
+        """Get the current graph, rebuilding it if stale."""
+        graph = self._graph
+        if graph is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return graph
+
+        async with self._lock:
+            if self._graph is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return self._graph
+
+            version = await get_data_version(DATASET)
+            self._checked_at = time.monotonic()
+
+            # Keep serving the current graph if the version is unknown or unchanged
+            if self._graph is not None and (version is None or version == self._graph.version):
+                return self._graph
+
+            self._graph = await StoryGraph.load(session, version=version)
+            print(
+                f"Story graph: built {len(self._graph.stories)} stories, "
+                f"{len(self._graph.segments)} segments, {len(self._graph.edges)} connections "
+                f"(data version {version})"
+            )
+            return self._graph
+
+    def invalidate(self) -> None:
+        """Drop the cached graph; the next get() rebuilds it."""
+        self._graph = None
+
+    def snapshot(self) -> dict:
+        """Get cache state for reporting."""
+        graph = self._graph
+        if graph is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": graph.version,
+            "stories": len(graph.stories),
+            "segments": len(graph.segments),
+            "connections": len(graph.edges),
+            "built_at": graph.built_at,
+        }
+
+
+# Shared cache for this worker
+story_graph_cache = StoryGraphCache()
+
+
+def graph_etag_headers(etag: str) -> Dict[str, str]:
+    """Response headers for a graph payload."""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
@@ -3,6 +3,7 @@ Tadabbur-AI FastAPI Application
 
 RAG-grounded Quranic knowledge platform with story connections.
 """
+import asyncio
 import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -11,7 +12,17 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.api.artifacts import corpus_artifacts
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.rate_limit import RateLimitMiddleware
+from app.db.audit_sink import audit_sink
+from app.db.database import get_async_session_context
+from app.db.redis import close_async_redis
+from app.graph.story_graph import story_graph_cache
+from app.rag.embeddings import load_embedder
+from app.validators.sura_names import sura_resolver
 from app.api.routes import quran, stories, rag, health
 
 
@@ -26,10 +37,42 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     print(f"Environment: {settings.environment}")
     print(f"Debug: {settings.debug}")
 
+    # Add sura names from the Quran corpus to the citation resolver
+    try:
+        async with get_async_session_context() as session:
+            count = await sura_resolver.load_from_corpus(session)
+        print(f"Sura name resolver: loaded {count} suras from corpus")
+    except Exception as e:
+        print(f"Sura name resolver: using built-in table only ({e})")
+
+    # Build the in-memory story graph
+    try:
+        async with get_async_session_context() as session:
+            await story_graph_cache.get(session)
+    except Exception as e:
+        print(f"Story graph: will build on first request ({e})")
+
+    # Prebuilt sura/page/juz responses (optional; routes fall back to the database)
+    try:
+        count = corpus_artifacts.load()
+        print(f"Corpus artifacts: loaded {count} from {corpus_artifacts.root}")
+    except Exception as e:
+        print(f"Corpus artifacts: disabled ({e})")
+
+    # Embedding model for claim support (opt-in), loaded here so no request waits on it
+    if settings.claim_support_enabled and settings.claim_support_embeddings_enabled:
+        embedder = await asyncio.to_thread(load_embedder)
+        print(f"Claim support: {'embeddings' if embedder is not None else 'keyword overlap'}")
+
+    # Background audit writer
+    await audit_sink.start()
+
     yield
 
     # Shutdown
     print(f"Shutting down {settings.app_name}...")
+    await audit_sink.stop()
+    await close_async_redis()
 
 
 app = FastAPI(
@@ -41,6 +84,13 @@ app = FastAPI(
     redoc_url="/redoc" if settings.debug else None,
 )
 
+# Compression (innermost, so it sees complete route responses; precompressed
+# artifacts and SSE streams pass through)
+app.add_middleware(CompressionMiddleware)
+
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -48,6 +98,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After", NEXT_CURSOR_HEADER],
 )
 
 
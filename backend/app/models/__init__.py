@@ -3,7 +3,7 @@ Database models for Tadabbur-AI.
 """
 from app.models.quran import QuranVerse, Translation
 from app.models.tafseer import TafseerSource, TafseerChunk
-from app.models.story import Story, StorySegment, StoryConnection, Theme
+from app.models.story import Story, StorySegment, StoryConnection, Theme, ThemeClosure
 from app.models.audit import AuditLog
 
 __all__ = [
@@ -15,5 +15,6 @@ __all__ = [
     "StorySegment",
     "StoryConnection",
     "Theme",
+    "ThemeClosure",
     "AuditLog",
 ]
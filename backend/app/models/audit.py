@@ -45,13 +45,18 @@ class AuditLog(Base):
     - Debugging pipeline failures
     - Monitoring RAG quality
     - Compliance and accountability
+
+    Range-partitioned by month on created_at (see app/db/audit_partitions.py),
+    so old months are dropped whole and indexes stay partition-sized.
     """
     __tablename__ = "audit_logs"
 
+    # The partition key must be part of the primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     # What happened
-    action = Column(String(50), nullable=False, index=True)
+    action = Column(String(50), nullable=False)
     entity_type = Column(String(50), nullable=True)  # "verse", "tafseer_chunk", "story"
     entity_id = Column(String(100), nullable=True)
 
@@ -67,7 +72,6 @@ class AuditLog(Base):
     error_message = Column(Text, nullable=True)
 
     # Timing
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     duration_ms = Column(Integer, nullable=True)
 
     # Context
@@ -77,7 +81,8 @@ class AuditLog(Base):
     __table_args__ = (
         Index("ix_audit_action_time", "action", "created_at"),
         Index("ix_audit_entity", "entity_type", "entity_id"),
-        Index("ix_audit_status", "status"),
+        Index("ix_audit_created_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     def __repr__(self):
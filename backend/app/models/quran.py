@@ -54,13 +54,14 @@ class QuranVerse(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    translations = relationship("Translation", back_populates="verse", lazy="selectin")
+    # Not loaded unless requested; routes load only the languages they need
+    translations = relationship("Translation", back_populates="verse", lazy="noload")
 
     __table_args__ = (
         UniqueConstraint("sura_no", "aya_no", name="uq_sura_aya"),
         Index("ix_verse_sura_aya", "sura_no", "aya_no"),
         Index("ix_verse_page", "page_no"),
-        Index("ix_verse_juz", "juz_no"),
+        Index("ix_verse_juz", "juz_no", "id"),
     )
 
     def __repr__(self):
@@ -3,6 +3,7 @@ Story and connection models for Quranic narrative tracking.
 """
 from datetime import datetime
 from enum import Enum
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy import (
     Column,
@@ -14,6 +15,8 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     CheckConstraint,
+    func,
+    select,
 )
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
@@ -68,6 +71,56 @@ class Theme(Base):
         return f"<Theme {self.id}: {self.name_en}>"
 
 
+class ThemeClosure(Base):
+    """
+    Transitive closure of the theme hierarchy.
+
+    One row per (ancestor, descendant) pair, including each theme with
+    itself at depth 0, so "theme X and all its subthemes" is a single
+    indexed lookup on ancestor_id. Rebuilt by seed_stories.py.
+    """
+    __tablename__ = "theme_closure"
+
+    ancestor_id = Column(String(50), ForeignKey("themes.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(String(50), ForeignKey("themes.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)  # 0 = same theme, 1 = child, ...
+
+    __table_args__ = (
+        Index("ix_theme_closure_descendant", "descendant_id"),
+    )
+
+    def __repr__(self):
+        return f"<ThemeClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>"
+
+    @classmethod
+    def subtree_array(cls, theme_id: str):
+        """ARRAY of a theme and all its subthemes, for && (overlap) filters."""
+        return func.array(
+            select(cls.descendant_id)
+            .where(cls.ancestor_id == theme_id)
+            .scalar_subquery()
+        )
+
+
+def compute_theme_closure(
+    parents: Dict[str, Optional[str]],
+) -> List[Tuple[str, str, int]]:
+    """
+    Compute (ancestor_id, descendant_id, depth) rows from a parent map.
+
+    Walks up from each theme; cycles and dangling parents are cut off.
+    """
+    rows = []
+    for theme_id in parents:
+        seen = set()
+        current, depth = theme_id, 0
+        while current is not None and current in parents and current not in seen:
+            seen.add(current)
+            rows.append((current, theme_id, depth))
+            current, depth = parents[current], depth + 1
+    return rows
+
+
 class Story(Base):
     """
     Quranic stories - major narratives mentioned in the Quran.
@@ -107,6 +160,11 @@ class Story(Base):
     # Relationships
     segments = relationship("StorySegment", back_populates="story", lazy="selectin")
 
+    __table_args__ = (
+        # For theme subtree queries (themes && ARRAY[...])
+        Index("ix_story_themes", "themes", postgresql_using="gin"),
+    )
+
     def __repr__(self):
         return f"<Story {self.id}: {self.name_en}>"
 
@@ -6,6 +6,7 @@ from typing import Optional
 
 from sqlalchemy import (
     Column,
+    Computed,
     Integer,
     String,
     Text,
@@ -15,7 +16,7 @@ from sqlalchemy import (
     Index,
     UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, INT4RANGE
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
@@ -83,6 +84,13 @@ class TafseerChunk(Base):
     verse_start_id = Column(Integer, ForeignKey("quran_verses.id"), nullable=False)
     verse_end_id = Column(Integer, ForeignKey("quran_verses.id"), nullable=False)
 
+    # Same range as an int4range (maintained by Postgres) for GiST stabbing
+    # and overlap queries: verse_range @> verse_id, verse_range && page range
+    verse_range = Column(
+        INT4RANGE,
+        Computed("int4range(verse_start_id, verse_end_id, '[]')", persisted=True),
+    )
+
     # Alternative reference (for convenience)
     sura_no = Column(Integer, nullable=False, index=True)
     aya_start = Column(Integer, nullable=False)
@@ -117,8 +125,9 @@ class TafseerChunk(Base):
 
     __table_args__ = (
         Index("ix_chunk_source", "source_id"),
-        Index("ix_chunk_verse_range", "verse_start_id", "verse_end_id"),
+        Index("ix_chunk_verse_range", "verse_range", postgresql_using="gist"),
         Index("ix_chunk_sura", "sura_no"),
+        Index("ix_chunk_topics", "topics", postgresql_using="gin"),
     )
 
     def __repr__(self):
@@ -0,0 +1,205 @@
+"""
+Request coalescing (single-flight) for identical RAG questions.
+
+Concurrent identical requests share one retrieval + LLM call:
+1. In-process: duplicates await the leader's asyncio task
+2. Across workers (optional): a Redis lock elects one leader, which
+   publishes its result for the other workers to pick up
+"""
+import asyncio
+import hashlib
+import json
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.redis import get_async_redis
+from app.rag.types import GroundedResponse
+
+
+def normalize_request_key(
+    question: str,
+    language: str,
+    include_scholarly_debate: bool,
+    preferred_sources: Optional[List[str]],
+    max_sources: int,
+) -> str:
+    """
+    Build a coalescing key from the request fields that affect the answer.
+
+    Whitespace and case differences in the question do not change the key.
+    """
+    normalized = {
+        "q": " ".join(question.split()).casefold(),
+        "lang": language,
+        "debate": include_scholarly_debate,
+        "sources": sorted(preferred_sources or []),
+        "max": max_sources,
+    }
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    In-process single-flight: at most one computation per key is in flight.
+
+    The computation runs in its own task, so a cancelled caller (e.g. a
+    disconnected client) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable],
+    ) -> Tuple[object, bool]:
+        """
+        Run fn once per key across concurrent callers.
+
+        Returns:
+            (result, shared) - shared is True if another caller led
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._release(key, t))
+        return await asyncio.shield(task), False
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    @property
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+
+class RAGRequestCoalescer:
+    """
+    Coalesces identical RAG queries within a worker and, optionally,
+    across workers through a Redis lock.
+    """
+
+    LOCK_PREFIX = "rag:coalesce:lock:"
+    RESULT_PREFIX = "rag:coalesce:result:"
+    POLL_INTERVAL_SECONDS = 0.1
+
+    def __init__(self):
+        self._local = SingleFlight()
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[GroundedResponse]],
+    ) -> Tuple[GroundedResponse, bool]:
+        """
+        Get the response for key, computing it at most once.
+
+        Returns:
+            (response, shared) - shared is True if the response was
+            computed for another request
+        """
+        if not settings.rag_coalesce_enabled:
+            return await fn(), False
+
+        if settings.rag_coalesce_redis:
+            return await self._local.do(key, lambda: self._run_distributed(key, fn))
+
+        return await self._local.do(key, fn)
+
+    async def _run_distributed(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[GroundedResponse]],
+    ) -> GroundedResponse:
+        """Elect one leader across workers; followers wait for its result."""
+        try:
+            redis = get_async_redis()
+            lock_key = self.LOCK_PREFIX + key
+            result_key = self.RESULT_PREFIX + key
+            token = uuid.uuid4().hex
+
+            acquired = await redis.set(
+                lock_key,
+                token,
+                nx=True,
+                px=settings.rag_coalesce_lock_ttl_seconds * 1000,
+            )
+        except Exception as e:
+            # Redis unavailable - degrade to in-process coalescing only
+            print(f"Coalescing lock error: {e}")
+            return await fn()
+
+        if acquired:
+            try:
+                response = await fn()
+                await self._publish(result_key, response)
+                return response
+            finally:
+                await self._release_lock(lock_key, token)
+
+        shared = await self._wait_for_leader(lock_key, result_key)
+        if shared is not None:
+            return shared
+
+        # Leader failed or timed out without a result
+        return await fn()
+
+    async def _publish(self, result_key: str, response: GroundedResponse) -> None:
+        try:
+            await get_async_redis().set(
+                result_key,
+                json.dumps(response.to_dict(), ensure_ascii=False),
+                ex=settings.rag_coalesce_result_ttl_seconds,
+            )
+        except Exception as e:
+            print(f"Coalescing publish error: {e}")
+
+    async def _release_lock(self, lock_key: str, token: str) -> None:
+        # Only delete the lock if we still hold it
+        release_script = (
+            "if redis.call('get', KEYS[1]) == ARGV[1] then "
+            "return redis.call('del', KEYS[1]) else return 0 end"
+        )
+        try:
+            await get_async_redis().eval(release_script, 1, lock_key, token)
+        except Exception as e:
+            print(f"Coalescing unlock error: {e}")
+
+    async def _wait_for_leader(
+        self,
+        lock_key: str,
+        result_key: str,
+    ) -> Optional[GroundedResponse]:
+        """Poll for the leader's result until the lock is released or expires."""
+        redis = get_async_redis()
+        deadline = (
+            asyncio.get_running_loop().time() + settings.rag_coalesce_lock_ttl_seconds
+        )
+
+        try:
+            while asyncio.get_running_loop().time() < deadline:
+                raw = await redis.get(result_key)
+                if raw is not None:
+                    return GroundedResponse.from_dict(json.loads(raw))
+                if not await redis.exists(lock_key):
+                    # Lock released - check once more for a published result
+                    raw = await redis.get(result_key)
+                    if raw is not None:
+                        return GroundedResponse.from_dict(json.loads(raw))
+                    return None
+                await asyncio.sleep(self.POLL_INTERVAL_SECONDS)
+        except Exception as e:
+            print(f"Coalescing wait error: {e}")
+
+        return None
+
+
+# Shared per-process coalescer
+rag_coalescer = RAGRequestCoalescer()
@@ -0,0 +1,101 @@
+"""
+Sentence embeddings for in-process similarity checks.
+
+The model (settings.embedding_model_multilingual) is loaded once per
+process: at API startup when a feature needs it, via load_embedder().
+Request paths call get_embedder(), which never loads it, so a request
+never waits on a model download. If sentence-transformers is not
+installed or the model is not loaded, get_embedder() returns None and
+callers fall back to lexical methods.
+"""
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+# Try to import sentence-transformers
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_EMBEDDINGS = True
+except ImportError:
+    HAS_EMBEDDINGS = False
+
+
+_embedder = None
+_embedder_failed = False
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Get the shared sentence transformer model, or None if it is not loaded."""
+    return _embedder
+
+
+def load_embedder():
+    """Load the shared model (blocking; call from startup or a script)."""
+    global _embedder, _embedder_failed
+
+    if _embedder is not None or _embedder_failed or not HAS_EMBEDDINGS:
+        return _embedder
+
+    with _embedder_lock:
+        if _embedder is None and not _embedder_failed:
+            try:
+                print(f"Loading embedding model: {settings.embedding_model_multilingual}")
+                _embedder = SentenceTransformer(settings.embedding_model_multilingual)
+            except Exception as e:
+                print(f"Embedding model unavailable, using keyword fallback: {e}")
+                _embedder_failed = True
+
+    return _embedder
+
+
+def embed_texts(
+    texts: List[str],
+    prefix: str = "",
+    batch_size: int = 32,
+) -> Optional[np.ndarray]:
+    """
+    Embed texts in one batched pass.
+
+    Returns an (n, dim) float32 array of L2-normalized rows, so cosine
+    similarity is a dot product, or None if no embedder is available.
+    E5 models expect a "query: " or "passage: " prefix.
+    """
+    embedder = get_embedder()
+    if embedder is None:
+        return None
+    if not texts:
+        return np.zeros((0, settings.embedding_dimension), dtype=np.float32)
+
+    vectors = embedder.encode(
+        [prefix + text for text in texts],
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def pairwise_cosine(
+    left: np.ndarray,
+    right: np.ndarray,
+    left_index: List[int],
+    right_index: List[int],
+) -> np.ndarray:
+    """
+    Cosine similarity of selected row pairs of two normalized matrices.
+
+    Computes left[left_index[k]] . right[right_index[k]] for every k in
+    one vectorized pass.
+    """
+    if not left_index:
+        return np.zeros(0, dtype=np.float32)
+    return np.einsum(
+        "ij,ij->i",
+        left[np.asarray(left_index)],
+        right[np.asarray(right_index)],
+    )
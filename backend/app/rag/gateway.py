@@ -0,0 +1,208 @@
+"""
+Concurrency-limited gateway for LLM calls.
+
+Bounds how many Messages API calls a worker makes at once:
+1. At most llm_max_concurrency calls run concurrently
+2. Further calls wait in per-priority lanes (high > default > low)
+3. When a lane is full, calls are rejected immediately (503 + Retry-After)
+4. 429 (rate limited) and 529 (overloaded) responses are retried with
+   exponential backoff and full jitter
+"""
+import asyncio
+import math
+from collections import deque
+from typing import Callable, Deque, Dict
+
+import anthropic
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.core.config import settings
+
+
+# Priority lanes, highest first
+PRIORITIES = ("high", "default", "low")
+
+# Upstream status codes worth retrying
+RETRYABLE_STATUS_CODES = {429, 529}
+
+
+class LLMSaturatedError(Exception):
+    """The gateway queue is full; the caller should retry later."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM gateway saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LLMUnavailableError(Exception):
+    """The upstream LLM call failed (after retries, where applicable)."""
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Check if an upstream error is a rate-limit or overload response."""
+    if isinstance(exc, anthropic.RateLimitError):
+        return True
+    if isinstance(exc, anthropic.APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+class LLMGateway:
+    """
+    Semaphore with priority lanes, bounded queues and fast rejection.
+
+    Slots are handed directly from a finishing call to the oldest waiter
+    in the highest non-empty lane, so high-priority calls never wait
+    behind low-priority ones.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        max_retries: int,
+        retry_base: float,
+        retry_max: float,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        self._active = 0
+        self._lanes: Dict[str, Deque[asyncio.Future]] = {p: deque() for p in PRIORITIES}
+        self._avg_call_seconds = 5.0  # EWMA, seeds the Retry-After estimate
+
+        self.rejected = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _retry_after(self) -> int:
+        """Estimate seconds until a slot frees up for a new caller."""
+        waves = (self.queued + 1) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(waves * self._avg_call_seconds))
+
+    async def _acquire(self, priority: str) -> None:
+        if priority not in self._lanes:
+            priority = "default"
+
+        if self._active < self.max_concurrency and self.queued == 0:
+            self._active += 1
+            return
+
+        lane = self._lanes[priority]
+        if len(lane) >= self.max_queue:
+            self.rejected += 1
+            raise LLMSaturatedError(self._retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(lane, waiter)
+            self.rejected += 1
+            raise LLMSaturatedError(self._retry_after())
+        except asyncio.CancelledError:
+            self._abandon(lane, waiter)
+            raise
+
+    def _abandon(self, lane: Deque[asyncio.Future], waiter: asyncio.Future) -> None:
+        """Withdraw a waiter; give its slot back if one was already handed over."""
+        if waiter.done() and not waiter.cancelled():
+            self._release()
+            return
+        waiter.cancel()
+        try:
+            lane.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self) -> None:
+        """Hand the slot to the next waiter, or free it."""
+        for priority in PRIORITIES:
+            lane = self._lanes[priority]
+            while lane:
+                waiter = lane.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self._active -= 1
+
+    async def call(self, fn: Callable, *args, priority: str = "default", **kwargs):
+        """
+        Run a blocking LLM client call under the concurrency limit.
+
+        The call runs in a worker thread so it does not block the event
+        loop. Raises LLMSaturatedError if no slot is available in time,
+        LLMUnavailableError if the upstream call fails.
+        """
+        await self._acquire(priority)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            retrying = AsyncRetrying(
+                retry=retry_if_exception(_is_retryable),
+                stop=stop_after_attempt(self.max_retries + 1),
+                wait=wait_random_exponential(multiplier=self.retry_base, max=self.retry_max),
+                before_sleep=self._on_retry,
+                reraise=True,
+            )
+            async for attempt in retrying:
+                with attempt:
+                    result = await asyncio.to_thread(fn, *args, **kwargs)
+
+            elapsed = loop.time() - started
+            self._avg_call_seconds = 0.8 * self._avg_call_seconds + 0.2 * elapsed
+            return result
+
+        except Exception as e:
+            self.failed += 1
+            retry_after = self._retry_after() if _is_retryable(e) else 5
+            raise LLMUnavailableError(f"LLM call failed: {e}", retry_after) from e
+
+        finally:
+            self._release()
+
+    def _on_retry(self, retry_state) -> None:
+        self.retried += 1
+
+    def snapshot(self) -> dict:
+        """Get gateway state for reporting."""
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queued": {p: len(lane) for p, lane in self._lanes.items()},
+            "max_queue_per_lane": self.max_queue,
+            "avg_call_seconds": round(self._avg_call_seconds, 3),
+            "rejected": self.rejected,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+# Shared per-process gateway
+llm_gateway = LLMGateway(
+    max_concurrency=settings.llm_max_concurrency,
+    max_queue=settings.llm_max_queue,
+    queue_timeout=settings.llm_queue_timeout_seconds,
+    max_retries=settings.llm_max_retries,
+    retry_base=settings.llm_retry_base_seconds,
+    retry_max=settings.llm_retry_max_seconds,
+)
@@ -0,0 +1,285 @@
+"""
+LLM client factory and prompt-cache accounting.
+
+Provides:
+1. create_llm_client() - Anthropic client or a local stub, per settings
+2. StubLLMClient - offline stand-in for the Messages API that reports the
+   same prompt-cache usage fields as the real API
+3. PromptCacheStats - process-wide cache hit/creation counters
+"""
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import anthropic
+
+from app.core.config import settings
+from app.rag.types import TokenUsage
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+@dataclass
+class PromptCacheStats:
+    """Cumulative prompt-cache accounting for this process."""
+    requests: int = 0
+    cache_hits: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, usage: TokenUsage) -> None:
+        """Add one call's usage to the totals."""
+        with self._lock:
+            self.requests += 1
+            self.cache_hits += 1 if usage.cache_hit else 0
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+            self.cache_creation_input_tokens += usage.cache_creation_input_tokens
+            self.cache_read_input_tokens += usage.cache_read_input_tokens
+
+    def snapshot(self) -> dict:
+        """Get a copy of the counters for reporting."""
+        with self._lock:
+            total_prompt = (
+                self.input_tokens
+                + self.cache_creation_input_tokens
+                + self.cache_read_input_tokens
+            )
+            return {
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "cache_creation_input_tokens": self.cache_creation_input_tokens,
+                "cache_read_input_tokens": self.cache_read_input_tokens,
+                "cache_read_ratio": (
+                    self.cache_read_input_tokens / total_prompt if total_prompt else 0.0
+                ),
+            }
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+# =============================================================================
+# Stub client
+# =============================================================================
+
+@dataclass
+class StubTextBlock:
+    """Mirrors anthropic.types.TextBlock."""
+    text: str
+    type: str = "text"
+
+
+@dataclass
+class StubUsage:
+    """Mirrors anthropic.types.Usage, including cache fields."""
+    input_tokens: int
+    output_tokens: int
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+
+@dataclass
+class StubMessage:
+    """Mirrors anthropic.types.Message."""
+    content: List[StubTextBlock]
+    usage: StubUsage
+    model: str
+    stop_reason: str = "end_turn"
+    role: str = "assistant"
+
+
+class StubMessageStream:
+    """Mirrors anthropic's MessageStream context manager (text_stream, get_final_message)."""
+
+    DELTA_SIZE = 16  # Characters per text delta
+
+    def __init__(self, message: StubMessage):
+        self._message = message
+
+    def __enter__(self) -> "StubMessageStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    @property
+    def text_stream(self):
+        text = self._message.content[0].text
+        for i in range(0, len(text), self.DELTA_SIZE):
+            yield text[i:i + self.DELTA_SIZE]
+
+    @property
+    def current_message_snapshot(self) -> StubMessage:
+        return self._message
+
+    def get_final_message(self) -> StubMessage:
+        return self._message
+
+
+class _StubMessages:
+    """The `client.messages` namespace of the stub client."""
+
+    # Matches the source headers written by RAGPipeline._build_context
+    SOURCE_HEADER_PATTERN = re.compile(r'\[Source: ([^|\]]+?) \| Verse: ([^|\]]+?) \|')
+
+    def __init__(self, client: "StubLLMClient"):
+        self._client = client
+
+    def stream(self, **kwargs) -> "StubMessageStream":
+        """Mirrors client.messages.stream(); yields the answer in small deltas."""
+        return StubMessageStream(self.create(**kwargs))
+
+    def create(
+        self,
+        model: str,
+        max_tokens: int,
+        messages: list,
+        system=None,
+        **kwargs,
+    ) -> StubMessage:
+        blocks = self._client._flatten(system, messages)
+        usage = self._client._account(model, blocks)
+
+        # Produce a grounded-looking answer citing the first sources provided
+        prompt_text = "".join(b["text"] for b in blocks)
+        sources = self.SOURCE_HEADER_PATTERN.findall(prompt_text)[:3]
+        if sources:
+            text = "\n\n".join(
+                f"According to the retrieved commentary, this passage is explained "
+                f"in the cited source [{name.strip()}, {ref.strip()}]."
+                for name, ref in sources
+            )
+        else:
+            text = "This requires further scholarly consultation based on available sources."
+
+        usage.output_tokens = min(estimate_tokens(text), max_tokens)
+        return StubMessage(content=[StubTextBlock(text=text)], usage=usage, model=model)
+
+
+class StubLLMClient:
+    """
+    Local stand-in for anthropic.Anthropic.
+
+    Simulates prefix-based prompt caching: each block marked with
+    cache_control is a breakpoint, the longest previously-written prefix
+    is reported as cache_read_input_tokens, and newly-written prefixes up
+    to the last breakpoint as cache_creation_input_tokens.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        min_cacheable_tokens: int = 1024,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.min_cacheable_tokens = min_cacheable_tokens
+        self.messages = _StubMessages(self)
+        self._cache: dict = {}  # prefix hash -> expiry (monotonic)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _flatten(system, messages: list) -> List[dict]:
+        """Flatten system and message content into a list of text blocks."""
+        blocks = []
+        if isinstance(system, str):
+            blocks.append({"text": system})
+        elif system:
+            blocks.extend(system)
+
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                blocks.append({"text": content})
+            else:
+                blocks.extend(content)
+
+        return blocks
+
+    def _account(self, model: str, blocks: List[dict]) -> StubUsage:
+        """Compute input/cache token usage for a request."""
+        now = time.monotonic()
+
+        digest = hashlib.sha256(model.encode("utf-8"))
+        total_tokens = 0
+        breakpoints = []  # (prefix hash, cumulative tokens)
+
+        for block in blocks:
+            digest.update(b"\x00" + block["text"].encode("utf-8"))
+            total_tokens += estimate_tokens(block["text"])
+            if block.get("cache_control"):
+                breakpoints.append((digest.hexdigest(), total_tokens))
+
+        with self._lock:
+            self._cache = {k: exp for k, exp in self._cache.items() if exp > now}
+
+            # Longest cached prefix is read (and its TTL refreshed)
+            read_tokens = 0
+            for key, upto in reversed(breakpoints):
+                if key in self._cache:
+                    read_tokens = upto
+                    self._cache[key] = now + self.ttl_seconds
+                    break
+
+            # Longer prefixes are written
+            written_upto = read_tokens
+            for key, upto in breakpoints:
+                if upto > read_tokens and upto >= self.min_cacheable_tokens:
+                    self._cache[key] = now + self.ttl_seconds
+                    written_upto = upto
+
+        creation_tokens = written_upto - read_tokens
+        return StubUsage(
+            input_tokens=total_tokens - read_tokens - creation_tokens,
+            output_tokens=0,
+            cache_creation_input_tokens=creation_tokens,
+            cache_read_input_tokens=read_tokens,
+        )
+
+
+# =============================================================================
+# Factory
+# =============================================================================
+
+_stub_client: Optional[StubLLMClient] = None
+
+
+def llm_configured() -> bool:
+    """Check whether an LLM backend is available."""
+    return settings.llm_provider == "stub" or bool(settings.anthropic_api_key)
+
+
+def create_llm_client():
+    """
+    Create the configured LLM client.
+
+    The stub client is shared process-wide so its prompt cache persists
+    across requests, like the real API's.
+    """
+    global _stub_client
+
+    if settings.llm_provider == "stub":
+        if _stub_client is None:
+            _stub_client = StubLLMClient()
+        return _stub_client
+
+    if settings.anthropic_api_key:
+        # LLMGateway retries 429/529 with jittered backoff; SDK retries on
+        # top of that would multiply the upstream attempts per call
+        return anthropic.Anthropic(api_key=settings.anthropic_api_key, max_retries=0)
+
+    return None
@@ -8,11 +8,12 @@ CRITICAL SAFETY RULES:
 4. If evidence is insufficient, return safe refusal
 5. For fiqh/rulings: informational summary only, no fatwa language
 """
-import re
-from typing import List, Optional
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-import anthropic
 
 from app.core.config import settings
 from app.rag.types import (
@@ -20,13 +21,27 @@ from app.rag.types import (
     RetrievedChunk,
     Citation,
     GroundedResponse,
+    TokenUsage,
     SAFE_REFUSAL_INSUFFICIENT,
     SAFE_REFUSAL_NO_SOURCES,
     SAFE_REFUSAL_FIQH,
 )
 from app.rag.retrieval import HybridRetriever
-from app.rag.prompts import GROUNDED_SYSTEM_PROMPT, build_user_prompt
-from app.validators.citation_validator import CitationValidator
+from app.rag.tracing import QueryTrace
+from app.rag.gateway import llm_gateway
+from app.rag.llm import create_llm_client, prompt_cache_stats
+from app.rag.prompts import (
+    GROUNDED_SYSTEM_PROMPT,
+    build_user_prompt,
+    build_cached_system_prompt,
+    build_user_content_blocks,
+)
+from app.validators.citation_parser import CitationMatcher, parse_citations
+from app.validators.citation_validator import (
+    CitationCoverageValidator,
+    CitationValidator,
+    StreamingCitationValidator,
+)
 
 
 class RAGPipeline:
@@ -41,18 +56,22 @@ class RAGPipeline:
     5. Generate response with strict grounding rules
     6. Validate all citations
     7. Return response with citations or safe refusal
+
+    Every step is timed into a QueryTrace, returned on the response as
+    `trace` and recorded in rag_stage_stats.
     """
 
     def __init__(self, session: AsyncSession):
         self.session = session
         self.retriever = HybridRetriever(session)
         self.validator = CitationValidator(session)
+        self.coverage_validator = CitationCoverageValidator(session)
 
-        # Initialize Anthropic client
-        if settings.anthropic_api_key:
-            self.client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-        else:
-            self.client = None
+        # Initialize LLM client (Anthropic, or local stub)
+        self.client = create_llm_client()
+
+        # Token usage of the most recent LLM call
+        self.last_usage: Optional[TokenUsage] = None
 
     async def query(
         self,
@@ -61,6 +80,7 @@ class RAGPipeline:
         include_scholarly_debate: bool = True,
         preferred_sources: List[str] = None,
         max_sources: int = 5,
+        priority: str = "default",
     ) -> GroundedResponse:
         """
         Process a question and return a grounded response.
@@ -71,12 +91,21 @@ class RAGPipeline:
             include_scholarly_debate: Include differing scholarly views
             preferred_sources: List of preferred tafseer source IDs
             max_sources: Maximum number of sources to retrieve
+            priority: LLM gateway lane ("high", "default", "low")
 
         Returns:
             GroundedResponse with answer, citations, and metadata
+
+        Raises:
+            LLMSaturatedError: The LLM gateway queue is full
+            LLMUnavailableError: The LLM call failed after retries
         """
+        trace = QueryTrace()
+
         # 1. Classify intent
-        intent = await self._classify_intent(question)
+        with trace.span("intent") as attrs:
+            intent = await self._classify_intent(question)
+            attrs["intent"] = intent.value
 
         # 2. Retrieve relevant chunks
         chunks = await self.retriever.retrieve(
@@ -85,29 +114,36 @@ class RAGPipeline:
             intent=intent,
             preferred_sources=preferred_sources or [],
             top_k=max_sources * 2,  # Retrieve more, then filter
+            trace=trace,
         )
 
         # 3. Check if we have enough evidence
         if not chunks:
-            return GroundedResponse(
+            result = GroundedResponse(
                 answer=SAFE_REFUSAL_NO_SOURCES,
                 citations=[],
                 confidence=0.0,
                 intent=intent.value,
                 warnings=["No relevant sources found"],
             )
+            return self._finish(result, trace)
 
         # 4. Build context from retrieved chunks
-        context = self._build_context(chunks, language)
+        with trace.span("context") as attrs:
+            context = self._build_context(chunks, language)
+            attrs["chars"] = len(context)
 
         # 5. Generate grounded response
-        raw_response = await self._generate_response(
-            question=question,
-            context=context,
-            intent=intent,
-            language=language,
-            include_scholarly_debate=include_scholarly_debate,
-        )
+        with trace.span("llm") as attrs:
+            raw_response = await self._generate_response(
+                question=question,
+                context=context,
+                intent=intent,
+                language=language,
+                include_scholarly_debate=include_scholarly_debate,
+                priority=priority,
+            )
+            attrs.update(self._usage_attrs())
 
         # 6. Parse and validate response
         chunk_ids = [c.chunk_id for c in chunks]
@@ -116,9 +152,166 @@ class RAGPipeline:
             chunks=chunks,
             chunk_ids=chunk_ids,
             intent=intent,
+            trace=trace,
+        )
+        validated.usage = self.last_usage
+
+        return self._finish(validated, trace)
+
+    async def stream_query(
+        self,
+        question: str,
+        language: str = "en",
+        include_scholarly_debate: bool = True,
+        preferred_sources: List[str] = None,
+        max_sources: int = 5,
+        priority: str = "default",
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Process a question, streaming the answer as it is generated.
+
+        Citations are validated incrementally; once too many are invalid
+        (rag_stream_max_invalid_citations) generation is stopped and the
+        answer is replaced by a safe refusal.
+
+        Yields:
+            ("delta", str) - answer text
+            ("citation", CitationEvent) - validation events
+            ("result", GroundedResponse) - final validated response (last)
+
+        Raises:
+            LLMSaturatedError: The LLM gateway queue is full
+            LLMUnavailableError: The LLM call failed after retries
+        """
+        trace = QueryTrace()
+
+        with trace.span("intent") as attrs:
+            intent = await self._classify_intent(question)
+            attrs["intent"] = intent.value
+
+        chunks = await self.retriever.retrieve(
+            query=question,
+            language=language,
+            intent=intent,
+            preferred_sources=preferred_sources or [],
+            top_k=max_sources * 2,
+            trace=trace,
         )
 
-        return validated
+        if not chunks or not self.client:
+            result = GroundedResponse(
+                answer=SAFE_REFUSAL_NO_SOURCES,
+                citations=[],
+                confidence=0.0,
+                intent=intent.value,
+                warnings=["No relevant sources found"],
+            )
+            yield "result", self._finish(result, trace)
+            return
+
+        with trace.span("context") as attrs:
+            context = self._build_context(chunks, language)
+            attrs["chars"] = len(context)
+        request = self._build_llm_request(
+            question=question,
+            context=context,
+            intent=intent,
+            language=language,
+            include_scholarly_debate=include_scholarly_debate,
+        )
+
+        stream_validator = StreamingCitationValidator(chunks, validator=self.validator)
+        loop = asyncio.get_running_loop()
+        deltas: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        llm_started = time.perf_counter()
+        first_token_ms = None
+        call = asyncio.create_task(llm_gateway.call(
+            self._stream_messages, request, loop, deltas, stop, priority=priority,
+        ))
+        call.add_done_callback(lambda _: deltas.put_nowait(None))
+
+        try:
+            while True:
+                delta = await deltas.get()
+                if delta is None:
+                    break
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - llm_started) * 1000, 2)
+                if stream_validator.aborted:
+                    continue  # Drain what was generated before the stop took effect
+
+                yield "delta", delta
+                for event in stream_validator.feed(delta):
+                    yield "citation", event
+                if stream_validator.aborted:
+                    stop.set()
+
+            message = await call
+        finally:
+            # Stop generating if the consumer went away
+            stop.set()
+
+        if message is not None:
+            self._record_usage(message)
+        trace.add(
+            "llm",
+            (time.perf_counter() - llm_started) * 1000,
+            first_token_ms=first_token_ms,
+            **(self._usage_attrs() if message is not None else {}),
+        )
+
+        if stream_validator.aborted:
+            result = GroundedResponse(
+                answer=SAFE_REFUSAL_INSUFFICIENT,
+                citations=[],
+                confidence=0.0,
+                intent=intent.value,
+                warnings=[
+                    f"Generation stopped: {stream_validator.invalid_count} "
+                    f"citations could not be validated"
+                ],
+            )
+        else:
+            result = await self._validate_and_parse_response(
+                raw_response=stream_validator.text,
+                chunks=chunks,
+                chunk_ids=[c.chunk_id for c in chunks],
+                intent=intent,
+                trace=trace,
+            )
+        result.usage = self.last_usage
+
+        yield "result", self._finish(result, trace)
+
+    def _stream_messages(
+        self,
+        request: dict,
+        loop: asyncio.AbstractEventLoop,
+        deltas: asyncio.Queue,
+        stop: threading.Event,
+    ):
+        """
+        Stream a Messages API call from a worker thread.
+
+        Text deltas are handed to the event loop as they arrive. Setting
+        `stop` closes the stream, which ends generation upstream.
+        """
+        emitted = False
+        try:
+            with self.client.messages.stream(**request) as stream:
+                for text in stream.text_stream:
+                    emitted = True
+                    loop.call_soon_threadsafe(deltas.put_nowait, text)
+                    if stop.is_set():
+                        return stream.current_message_snapshot
+                return stream.get_final_message()
+        except Exception as e:
+            if emitted:
+                # Partial output was already delivered; retrying would duplicate it
+                raise RuntimeError(f"Stream interrupted: {e}") from e
+            raise
 
     async def _classify_intent(self, question: str) -> QueryIntent:
         """
@@ -200,32 +393,100 @@ class RAGPipeline:
         intent: QueryIntent,
         language: str,
         include_scholarly_debate: bool,
+        priority: str = "default",
     ) -> str:
         """
         Generate response using Claude with strict grounding rules.
+
+        Calls go through the shared LLM gateway. Upstream failures raise
+        instead of being returned as answer text.
         """
         if not self.client:
             return SAFE_REFUSAL_NO_SOURCES
 
-        # Build user prompt
-        user_prompt = build_user_prompt(
+        request = self._build_llm_request(
             question=question,
             context=context,
+            intent=intent,
             language=language,
             include_scholarly_debate=include_scholarly_debate,
-            is_fiqh=intent == QueryIntent.RULING,
         )
+        response = await llm_gateway.call(
+            self.client.messages.create,
+            priority=priority,
+            **request,
+        )
+        self._record_usage(response)
 
-        try:
-            response = self.client.messages.create(
-                model=settings.anthropic_model,
-                max_tokens=2000,
-                system=GROUNDED_SYSTEM_PROMPT,
-                messages=[{"role": "user", "content": user_prompt}],
+        return response.content[0].text
+
+    def _build_llm_request(
+        self,
+        question: str,
+        context: str,
+        intent: QueryIntent,
+        language: str,
+        include_scholarly_debate: bool,
+    ) -> dict:
+        """Build Messages API keyword arguments for a grounded answer."""
+        is_fiqh = intent == QueryIntent.RULING
+
+        # Mark the static system prompt (and optionally the sources) as
+        # cacheable so repeated prefixes are not re-processed on every call
+        if settings.llm_prompt_cache_enabled:
+            system = build_cached_system_prompt()
+            user_content = build_user_content_blocks(
+                question=question,
+                context=context,
+                language=language,
+                include_scholarly_debate=include_scholarly_debate,
+                is_fiqh=is_fiqh,
+                cache_sources=settings.llm_cache_sources,
+            )
+        else:
+            system = GROUNDED_SYSTEM_PROMPT
+            user_content = build_user_prompt(
+                question=question,
+                context=context,
+                language=language,
+                include_scholarly_debate=include_scholarly_debate,
+                is_fiqh=is_fiqh,
             )
-            return response.content[0].text
-        except Exception as e:
-            return f"Error generating response: {str(e)}"
+
+        return {
+            "model": settings.anthropic_model,
+            "max_tokens": 2000,
+            "system": system,
+            "messages": [{"role": "user", "content": user_content}],
+        }
+
+    def _usage_attrs(self) -> dict:
+        """Token usage of the last LLM call, as span attributes."""
+        if self.last_usage is None:
+            return {}
+        return {
+            "input_tokens": self.last_usage.input_tokens,
+            "output_tokens": self.last_usage.output_tokens,
+            "cache_read_input_tokens": self.last_usage.cache_read_input_tokens,
+            "cache_creation_input_tokens": self.last_usage.cache_creation_input_tokens,
+        }
+
+    def _finish(self, result: GroundedResponse, trace: QueryTrace) -> GroundedResponse:
+        """Attach the finished trace to a response (and record it)."""
+        trace.finish()
+        result.trace = trace
+        return result
+
+    def _record_usage(self, response) -> None:
+        """Record token usage of an LLM response."""
+        self.last_usage = TokenUsage.from_response(response)
+        prompt_cache_stats.record(self.last_usage)
+        print(
+            f"LLM usage: input={self.last_usage.input_tokens} "
+            f"cache_read={self.last_usage.cache_read_input_tokens} "
+            f"cache_creation={self.last_usage.cache_creation_input_tokens} "
+            f"output={self.last_usage.output_tokens}"
+        )
 
     async def _validate_and_parse_response(
         self,
@@ -233,49 +494,64 @@ class RAGPipeline:
         chunks: List[RetrievedChunk],
         chunk_ids: List[str],
         intent: QueryIntent,
+        trace: Optional[QueryTrace] = None,
     ) -> GroundedResponse:
         """
         Validate citations and parse response into structured format.
         """
-        # Extract citations from response
-        citation_pattern = r'\[([^\]]+),\s*(\d+:\d+(?:-\d+)?)\]'
-        found_citations = re.findall(citation_pattern, raw_response)
+        trace = trace if trace is not None else QueryTrace()
+
+        # Parse and match citations once, against the in-memory chunks.
+        # Unresolvable references (unknown sura, aya past its end) are kept
+        # so they count as invalid, exactly as in the streaming validator.
+        with trace.span("validation") as attrs:
+            parsed = parse_citations(raw_response)
+            validation = self.validator.validate_parsed(
+                raw_response, parsed, CitationMatcher(chunks)
+            )
+            attrs["citations"] = len(parsed)
+            attrs["invalid"] = len(validation.invalid_citations)
 
-        # Map chunks by ID for quick lookup
+        # Build citation objects (one per matched chunk, in citation order)
         chunk_map = {c.chunk_id: c for c in chunks}
-
-        # Build citation objects
         citations = []
-        valid_citation_ids = set()
-
-        for source_name, verse_ref in found_citations:
-            # Find matching chunk
-            for chunk in chunks:
-                if (source_name.lower() in chunk.source_name.lower() or
-                    source_name.lower() in chunk.source_id.lower()):
-                    if chunk.chunk_id not in valid_citation_ids:
-                        citations.append(Citation(
-                            chunk_id=chunk.chunk_id,
-                            source_id=chunk.source_id,
-                            source_name=chunk.source_name,
-                            verse_reference=chunk.verse_reference,
-                            excerpt=chunk.content[:200] if chunk.content else "",
-                            relevance_score=chunk.relevance_score,
-                        ))
-                        valid_citation_ids.add(chunk.chunk_id)
-                    break
+        for chunk_id in validation.matched_chunk_ids:
+            chunk = chunk_map[chunk_id]
+            citations.append(Citation(
+                chunk_id=chunk.chunk_id,
+                source_id=chunk.source_id,
+                source_name=chunk.source_name,
+                verse_reference=chunk.verse_reference,
+                excerpt=chunk.content[:200] if chunk.content else "",
+                relevance_score=chunk.relevance_score,
+            ))
 
         # Calculate confidence
-        if len(found_citations) == 0:
+        if len(parsed) == 0:
             confidence = 0.3
             warnings = ["Response may lack proper citations"]
-        elif len(citations) < len(found_citations):
+        elif validation.invalid_citations:
             confidence = 0.6
             warnings = ["Some citations could not be validated"]
         else:
             confidence = 0.9
             warnings = []
 
+        # Check that cited chunks support the sentences citing them (one batch)
+        if settings.claim_support_enabled and citations:
+            with trace.span("claim_support") as attrs:
+                pairs = self.coverage_validator.extract_claim_pairs(raw_response, chunks)
+                supports = await self.coverage_validator.validate_claims_support(
+                    pairs, retrieved_chunks=chunks
+                )
+                attrs["claims"] = len(pairs)
+            unsupported = [s for s in supports if not s.is_supported]
+            if unsupported:
+                warnings.append(
+                    f"{len(unsupported)} of {len(supports)} cited claims may not be "
+                    f"fully supported by their sources"
+                )
+
         # Add fiqh warning if needed
         if intent == QueryIntent.RULING:
             warnings.append(SAFE_REFUSAL_FIQH)
@@ -44,15 +44,26 @@ GROUNDED_SYSTEM_PROMPT = """You are a Quranic knowledge assistant providing scho
 - Make definitive religious rulings"""
 
 
-def build_user_prompt(
+def build_sources_section(context: str) -> str:
+    """
+    Build the retrieved-sources section of the user prompt.
+
+    Kept separate from the question so it can be marked as a prompt-cache
+    breakpoint: repeated questions over the same verse context reuse it.
+    """
+    return f"""## RETRIEVED SOURCES:
+{context}
+"""
+
+
+def build_question_section(
     question: str,
-    context: str,
     language: str,
     include_scholarly_debate: bool,
     is_fiqh: bool,
 ) -> str:
     """
-    Build the user prompt with context and instructions.
+    Build the question and instructions section of the user prompt.
     """
     language_instruction = "Respond in English." if language == "en" else "أجب باللغة العربية."
 
@@ -76,9 +87,7 @@ Be especially careful to:
 - Note any conditions or contexts mentioned
 - Highlight any scholarly disagreement"""
 
-    return f"""## RETRIEVED SOURCES:
-{context}
-
+    return f"""
 ## QUESTION:
 {question}
 
@@ -95,6 +104,72 @@ Remember:
 Now provide your grounded response:"""
 
 
+def build_user_prompt(
+    question: str,
+    context: str,
+    language: str,
+    include_scholarly_debate: bool,
+    is_fiqh: bool,
+) -> str:
+    """
+    Build the user prompt with context and instructions.
+    """
+    return build_sources_section(context) + build_question_section(
+        question=question,
+        language=language,
+        include_scholarly_debate=include_scholarly_debate,
+        is_fiqh=is_fiqh,
+    )
+
+
+def build_cached_system_prompt() -> list:
+    """
+    Build the system prompt as content blocks with a cache breakpoint.
+
+    GROUNDED_SYSTEM_PROMPT is static, so it is written to the prompt cache
+    once and read on every subsequent call within the cache TTL.
+    """
+    return [
+        {
+            "type": "text",
+            "text": GROUNDED_SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+
+
+def build_user_content_blocks(
+    question: str,
+    context: str,
+    language: str,
+    include_scholarly_debate: bool,
+    is_fiqh: bool,
+    cache_sources: bool = True,
+) -> list:
+    """
+    Build the user prompt as content blocks: sources first, then question.
+
+    With cache_sources, the sources block is a second cache breakpoint, so
+    the system prompt plus an identical verse context is served from cache.
+    """
+    sources_block = {"type": "text", "text": build_sources_section(context)}
+    if cache_sources:
+        sources_block["cache_control"] = {"type": "ephemeral"}
+
+    return [
+        sources_block,
+        {
+            "type": "text",
+            "text": build_question_section(
+                question=question,
+                language=language,
+                include_scholarly_debate=include_scholarly_debate,
+                is_fiqh=is_fiqh,
+            ),
+        },
+    ]
+
+
 TRANSLATION_PROMPT = """You are a professional translator.
 Translate the following Arabic text into {language}.
 
@@ -10,6 +10,7 @@ from qdrant_client.models import Filter, FieldCondition, MatchValue
 
 from app.core.config import settings
 from app.models.tafseer import TafseerChunk, TafseerSource
+from app.rag.tracing import QueryTrace
 from app.rag.types import QueryIntent, RetrievedChunk
 
 
@@ -61,37 +62,51 @@ class HybridRetriever:
         intent: QueryIntent = QueryIntent.VERSE_MEANING,
         preferred_sources: List[str] = None,
         top_k: int = 10,
+        trace: Optional[QueryTrace] = None,
     ) -> List[RetrievedChunk]:
         """
         Retrieve relevant chunks using hybrid search.
+
+        Each step is timed as a span of `trace`, with its candidate count.
         """
+        trace = trace if trace is not None else QueryTrace()
+
         # 1. Expand query with Islamic terminology
-        expanded_terms = self._expand_query(query)
-        expanded_query = query + " " + " ".join(expanded_terms)
+        with trace.span("expansion") as attrs:
+            expanded_terms = self._expand_query(query)
+            expanded_query = query + " " + " ".join(expanded_terms)
+            attrs["terms"] = len(expanded_terms)
 
         # 2. Vector search
-        vector_results = await self._vector_search(
-            query=expanded_query,
-            language=language,
-            preferred_sources=preferred_sources,
-            top_k=top_k,
-        )
+        with trace.span("qdrant") as attrs:
+            vector_results = await self._vector_search(
+                query=expanded_query,
+                language=language,
+                preferred_sources=preferred_sources,
+                top_k=top_k,
+            )
+            attrs["candidates"] = len(vector_results)
 
         # 3. Keyword search
-        keyword_results = await self._keyword_search(
-            query=query,
-            expanded_terms=expanded_terms,
-            language=language,
-            preferred_sources=preferred_sources,
-            top_k=top_k,
-        )
+        with trace.span("fts") as attrs:
+            keyword_results = await self._keyword_search(
+                query=query,
+                expanded_terms=expanded_terms,
+                language=language,
+                preferred_sources=preferred_sources,
+                top_k=top_k,
+            )
+            attrs["candidates"] = len(keyword_results)
 
         # 4. Merge results with RRF
-        merged = self._reciprocal_rank_fusion(
-            vector_results,
-            keyword_results,
-            k=60,  # RRF constant
-        )
+        with trace.span("fusion") as attrs:
+            merged = self._reciprocal_rank_fusion(
+                vector_results,
+                keyword_results,
+                k=60,  # RRF constant
+            )
+            attrs["candidates"] = len(merged)
+            attrs["returned"] = min(len(merged), top_k)
 
         # 5. Limit to top_k
         return merged[:top_k]
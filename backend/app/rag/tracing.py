@@ -0,0 +1,143 @@
+"""
+Per-stage latency tracing for the RAG pipeline.
+
+processing_time_ms only says how long a question took in total. A
+QueryTrace records one span per stage (intent, query expansion, Qdrant,
+FTS, fusion, context, LLM, citation validation, claim support) with its
+duration and counts such as candidates returned or tokens used. Each
+finished trace is:
+1. Attached to the GroundedResponse (returned as "debug" when asked for)
+2. Logged as one line per question
+3. Added to rag_stage_stats, which keeps per-stage latency percentiles
+   for the health endpoint
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class StageSpan:
+    """Timing of one pipeline stage."""
+    name: str
+    duration_ms: float
+    attrs: Dict[str, Any] = field(default_factory=dict)  # Candidate counts, token usage, ...
+
+    def to_dict(self) -> dict:
+        return {"stage": self.name, "duration_ms": round(self.duration_ms, 2), **self.attrs}
+
+
+@dataclass
+class QueryTrace:
+    """Spans of one question, in the order the stages ran."""
+    spans: List[StageSpan] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_ms: Optional[float] = None  # Total, frozen by finish()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block as one stage.
+
+        Yields the span's attrs so the block can add counts as it learns them:
+
+            with trace.span("qdrant") as attrs:
+                results = search()
+                attrs["candidates"] = len(results)
+        """
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.spans.append(StageSpan(name, (time.perf_counter() - start) * 1000, attrs))
+
+    def add(self, name: str, duration_ms: float, **attrs: Any) -> None:
+        """Record a stage timed elsewhere (e.g. across a streaming loop)."""
+        self.spans.append(StageSpan(name, duration_ms, attrs))
+
+    def get(self, name: str) -> Optional[StageSpan]:
+        """The first span with a given stage name."""
+        return next((s for s in self.spans if s.name == name), None)
+
+    @property
+    def total_ms(self) -> float:
+        """Wall time of the question (so far, until finished)."""
+        if self.finished_ms is not None:
+            return self.finished_ms
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def finish(self) -> None:
+        """Stop the clock and record the trace in rag_stage_stats and the log."""
+        self.finished_ms = (time.perf_counter() - self.started_at) * 1000
+        rag_stage_stats.record(self)
+        if settings.rag_trace_log:
+            print(f"RAG stages: total={self.finished_ms:.1f}ms {self.log_line()}")
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for the API debug block."""
+        return {
+            "total_ms": round(self.total_ms, 2),
+            "stages": [s.to_dict() for s in self.spans],
+        }
+
+    def log_line(self) -> str:
+        """One-line summary, e.g. "intent=0.1ms qdrant=12.3ms(candidates=10) ..."."""
+        parts = []
+        for s in self.spans:
+            extra = ",".join(f"{k}={v}" for k, v in s.attrs.items() if v is not None)
+            parts.append(f"{s.name}={s.duration_ms:.1f}ms" + (f"({extra})" if extra else ""))
+        return " ".join(parts)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of unsorted values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+@dataclass
+class StageLatencyStats:
+    """Per-stage latency of recent questions in this process."""
+    window: int = 0  # Samples kept per stage (0 = settings.rag_stage_stats_window)
+    queries: int = 0
+    _samples: Dict[str, Deque[float]] = field(default_factory=dict, repr=False)
+    _counts: Dict[str, int] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, trace: QueryTrace) -> None:
+        """Add one finished trace (its spans, plus its total as stage "total")."""
+        with self._lock:
+            self.queries += 1
+            self._add("total", trace.total_ms)
+            for s in trace.spans:
+                self._add(s.name, s.duration_ms)
+
+    def _add(self, name: str, duration_ms: float) -> None:
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window or settings.rag_stage_stats_window)
+        samples.append(duration_ms)
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Get per-stage count and p50/p95/max over the window for reporting."""
+        with self._lock:
+            stages = {}
+            for name, samples in self._samples.items():
+                values = list(samples)
+                stages[name] = {
+                    "count": self._counts[name],
+                    "p50_ms": round(_percentile(values, 0.50), 2),
+                    "p95_ms": round(_percentile(values, 0.95), 2),
+                    "max_ms": round(max(values), 2),
+                }
+            return {"queries": self.queries, "stages": stages}
+
+
+rag_stage_stats = StageLatencyStats()
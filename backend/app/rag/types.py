@@ -5,6 +5,8 @@ from enum import Enum
 from typing import List, Optional
 from dataclasses import dataclass, field
 
+from app.rag.tracing import QueryTrace
+
 
 class QueryIntent(str, Enum):
     """Types of queries the RAG can handle."""
@@ -46,6 +48,43 @@ class Citation:
     relevance_score: float
 
 
+@dataclass
+class TokenUsage:
+    """Token accounting for a single LLM call, including prompt caching."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    @property
+    def cache_hit(self) -> bool:
+        """Whether any part of the prompt was served from cache."""
+        return self.cache_read_input_tokens > 0
+
+    @classmethod
+    def from_response(cls, response) -> "TokenUsage":
+        """Build from an Anthropic (or stub) Messages API response."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return cls()
+        return cls(
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+        )
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for logging and API responses."""
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_hit": self.cache_hit,
+        }
+
+
 @dataclass
 class GroundedResponse:
     """Response from RAG pipeline with mandatory citations."""
@@ -57,10 +96,16 @@ class GroundedResponse:
     related_queries: List[str] = field(default_factory=list)
     intent: str = "unknown"
     processing_time_ms: int = 0
+    usage: Optional[TokenUsage] = None
+    trace: Optional[QueryTrace] = None
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary for API response."""
-        return {
+    def to_dict(self, include_debug: bool = False) -> dict:
+        """
+        Convert to dictionary for API response.
+
+        include_debug adds a "debug" block with per-stage timings and token usage.
+        """
+        data = {
             "answer": self.answer,
             "citations": [
                 {
@@ -80,6 +125,29 @@ class GroundedResponse:
             "intent": self.intent,
             "processing_time_ms": self.processing_time_ms,
         }
+        if include_debug:
+            data["debug"] = self.debug_info()
+        return data
+
+    def debug_info(self) -> dict:
+        """Per-stage timings and token usage of the run that produced this response."""
+        info = self.trace.to_dict() if self.trace else {"total_ms": None, "stages": []}
+        info["usage"] = self.usage.to_dict() if self.usage else None
+        return info
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GroundedResponse":
+        """Rebuild a response from its to_dict() form."""
+        return cls(
+            answer=data["answer"],
+            citations=[Citation(**c) for c in data.get("citations", [])],
+            confidence=data["confidence"],
+            scholarly_consensus=data.get("scholarly_consensus"),
+            warnings=data.get("warnings", []),
+            related_queries=data.get("related_queries", []),
+            intent=data.get("intent", "unknown"),
+            processing_time_ms=data.get("processing_time_ms", 0),
+        )
 
 
 @dataclass
@@ -0,0 +1,143 @@
+"""
+Citation parsing and matching shared by the RAG pipeline and validators.
+
+One precompiled pattern extracts [Source, Reference] citations in a
+single pass; CitationMatcher resolves each to a retrieved chunk via a
+source alias map and a per-source verse-range index.
+"""
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.rag.types import RetrievedChunk
+from app.validators.sura_names import sura_resolver
+
+
+# Matches citations like [Ibn Kathir, 2:255] or [Al-Tabari, Al-Baqarah:45]
+CITATION_PATTERN = re.compile(
+    r'\[([^\],]+),\s*([^\]]+)\]',
+    re.UNICODE
+)
+
+
+@dataclass
+class ParsedCitation:
+    """A citation found in answer text."""
+    text: str  # Normalized form: "[Source, Reference]"
+    source_name: str
+    verse_ref: str
+    start: int  # Offsets of the citation in the answer
+    end: int
+    reference: Optional[Tuple[int, int, int]]  # (sura_no, aya_start, aya_end)
+
+
+def parse_citation_match(match: "re.Match", offset: int = 0) -> ParsedCitation:
+    """Build a ParsedCitation from a CITATION_PATTERN match."""
+    source_name, verse_ref = match.group(1), match.group(2)
+    return ParsedCitation(
+        text=f"[{source_name}, {verse_ref}]",
+        source_name=source_name,
+        verse_ref=verse_ref,
+        start=offset + match.start(),
+        end=offset + match.end(),
+        reference=sura_resolver.parse_reference(verse_ref),
+    )
+
+
+def parse_citations(text: str) -> List[ParsedCitation]:
+    """Extract all citations from text in one pass."""
+    return [parse_citation_match(m) for m in CITATION_PATTERN.finditer(text)]
+
+
+def normalize_source_name(name: str) -> str:
+    """
+    Normalize a source name or ID for comparison.
+
+    "Ibn Kathir", "ibn_kathir" and "Tafsir Ibn Kathir" all become "kathir".
+    """
+    name = " ".join(name.lower().replace("_", " ").replace("-", " ").split())
+    for prefix in ["tafsir ", "tafseer ", "al ", "ibn ", "imam "]:
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    return name
+
+
+class CitationMatcher:
+    """
+    Matches citations to retrieved chunks.
+
+    Source names and IDs (English and Arabic) are normalized into an alias
+    map; for each (source, sura) the chunk ranges are sorted by start aya
+    with a running maximum of end aya, so "is this cited range inside some
+    retrieved chunk?" is a single binary search: O(log n) per citation.
+    """
+
+    def __init__(self, chunks: Iterable[RetrievedChunk]):
+        # source alias -> set of canonical source IDs
+        self._aliases: Dict[str, Set[str]] = {}
+        # (source_id, sura_no) -> (starts, running max end, chunk at running max)
+        self._ranges: Dict[
+            Tuple[str, int], Tuple[List[int], List[int], List[RetrievedChunk]]
+        ] = {}
+
+        grouped: Dict[Tuple[str, int], List[RetrievedChunk]] = {}
+        for chunk in chunks:
+            for alias in (chunk.source_id, chunk.source_name, chunk.source_name_ar):
+                key = normalize_source_name(alias or "")
+                if key:
+                    self._aliases.setdefault(key, set()).add(chunk.source_id)
+            grouped.setdefault((chunk.source_id, chunk.sura_no), []).append(chunk)
+
+        for key, items in grouped.items():
+            items.sort(key=lambda c: c.aya_start)
+            starts, max_ends, max_chunks = [], [], []
+            best = None
+            for item in items:
+                if best is None or item.aya_end > best.aya_end:
+                    best = item
+                starts.append(item.aya_start)
+                max_ends.append(best.aya_end)
+                max_chunks.append(best)
+            self._ranges[key] = (starts, max_ends, max_chunks)
+
+    def resolve_source(self, source_name: str) -> Set[str]:
+        """Map a cited source name to the retrieved source IDs it refers to."""
+        key = normalize_source_name(source_name)
+        if not key:
+            return set()
+
+        exact = self._aliases.get(key)
+        if exact:
+            return exact
+
+        # Flexible fallback: substring match either way (few sources per answer)
+        matched: Set[str] = set()
+        for alias, source_ids in self._aliases.items():
+            if key in alias or alias in key:
+                matched |= source_ids
+        return matched
+
+    def find(
+        self,
+        source_name: str,
+        sura_no: int,
+        aya_start: int,
+        aya_end: int,
+    ) -> Optional[RetrievedChunk]:
+        """Find a retrieved chunk from this source whose range contains the citation."""
+        for source_id in self.resolve_source(source_name):
+            entry = self._ranges.get((source_id, sura_no))
+            if not entry:
+                continue
+            starts, max_ends, max_chunks = entry
+            i = bisect_right(starts, aya_start) - 1
+            if i >= 0 and max_ends[i] >= aya_end:
+                return max_chunks[i]
+        return None
+
+    def match(self, citation: ParsedCitation) -> Optional[RetrievedChunk]:
+        """Find the retrieved chunk supporting a parsed citation, if any."""
+        if citation.reference is None:
+            return None
+        return self.find(citation.source_name, *citation.reference)
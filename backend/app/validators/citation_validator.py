@@ -2,15 +2,42 @@
 Citation validation for RAG responses.
 
 CRITICAL: Ensures all citations in responses map to retrieved sources.
+
+Provides:
+1. CitationValidator - validates a complete answer
+2. StreamingCitationValidator - validates an answer incrementally as text
+   deltas arrive, and signals when generation should be aborted
+3. CitationCoverageValidator - checks that cited chunks support the claims
 """
+import asyncio
 import re
-from typing import List, Set, Tuple
-from dataclasses import dataclass
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from dataclasses import dataclass, field
 
+import numpy as np
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.tafseer import TafseerChunk
+from app.core.config import settings
+from app.models.tafseer import TafseerChunk, TafseerSource
+from app.rag.embeddings import embed_texts, get_embedder, pairwise_cosine
+from app.rag.types import RetrievedChunk
+from app.validators.citation_parser import (
+    CITATION_PATTERN,
+    CitationMatcher,
+    ParsedCitation,
+    normalize_source_name,
+    parse_citation_match,
+    parse_citations,
+)
+from app.validators.sura_names import sura_resolver
+
+
+# Sentence boundaries (Latin and Arabic punctuation, or blank lines)
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?\u061f\u06d4])\s+|\n{2,}')
 
 
 @dataclass
@@ -22,6 +49,27 @@ class CitationValidationResult:
     missing_citations: List[str]  # Paragraphs without citations
     coverage_score: float  # Percentage of text that is cited
     errors: List[str]
+    matched_chunk_ids: List[str] = field(default_factory=list)  # In citation order, unique
+
+
+@dataclass
+class CitationEvent:
+    """A validation event emitted while an answer streams."""
+    type: str  # "citation_valid", "citation_invalid", "paragraph_uncited", "abort"
+    message: str
+    citation: Optional[str] = None
+    chunk_id: Optional[str] = None
+    paragraph: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for SSE payloads."""
+        return {
+            "type": self.type,
+            "message": self.message,
+            "citation": self.citation,
+            "chunk_id": self.chunk_id,
+            "paragraph": self.paragraph,
+        }
 
 
 class CitationValidator:
@@ -33,18 +81,16 @@ class CitationValidator:
     """
 
     # Pattern to match citations like [Ibn Kathir, 2:255] or [Al-Tabari, Al-Baqarah:45]
-    CITATION_PATTERN = re.compile(
-        r'\[([^\],]+),\s*([^\]]+)\]',
-        re.UNICODE
-    )
+    CITATION_PATTERN = CITATION_PATTERN
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: Optional[AsyncSession] = None):
         self.session = session
 
     async def validate(
         self,
         response_text: str,
-        retrieved_chunk_ids: List[str],
+        retrieved_chunk_ids: Optional[List[str]] = None,
+        retrieved_chunks: Optional[List[RetrievedChunk]] = None,
     ) -> CitationValidationResult:
         """
         Validate all citations in the response.
@@ -52,18 +98,17 @@ class CitationValidator:
         Args:
             response_text: The RAG-generated response
             retrieved_chunk_ids: List of chunk IDs that were retrieved
+                (metadata is loaded from the database)
+            retrieved_chunks: The retrieved chunks themselves; when given,
+                no database round-trip is made
 
         Returns:
             CitationValidationResult with validation details
         """
-        errors = []
-        valid_citations = []
-        invalid_citations = []
+        # 1. Extract all citations from response (single pass)
+        citations = parse_citations(response_text)
 
-        # 1. Extract all citations from response
-        found_citations = self.CITATION_PATTERN.findall(response_text)
-
-        if not found_citations:
+        if not citations:
             return CitationValidationResult(
                 is_valid=False,
                 valid_citations=[],
@@ -73,35 +118,57 @@ class CitationValidator:
                 errors=["No citations found in response"],
             )
 
-        # 2. Get chunk metadata from database
-        chunk_metadata = await self._get_chunk_metadata(retrieved_chunk_ids)
-
-        # 3. Validate each citation
-        for source_name, verse_ref in found_citations:
-            citation_str = f"[{source_name}, {verse_ref}]"
-
-            # Check if this citation matches any retrieved chunk
-            is_matched = False
-            for chunk_id, metadata in chunk_metadata.items():
-                if self._citation_matches_chunk(source_name, verse_ref, metadata):
-                    is_matched = True
-                    valid_citations.append(citation_str)
-                    break
+        # 2. Index retrieved chunk ranges (from memory, or the database)
+        if retrieved_chunks is None:
+            retrieved_chunks = await self._get_chunks(retrieved_chunk_ids or [])
+        matcher = CitationMatcher(retrieved_chunks)
 
-            if not is_matched:
-                invalid_citations.append(citation_str)
-                errors.append(f"Citation {citation_str} not found in retrieved sources")
+        # 3-5. Validate citations, paragraph coverage and score
+        return self.validate_parsed(response_text, citations, matcher)
 
-        # 4. Check paragraph coverage
-        missing_citations = self._check_paragraph_coverage(response_text)
+    def validate_parsed(
+        self,
+        response_text: str,
+        citations: List[ParsedCitation],
+        matcher: CitationMatcher,
+    ) -> CitationValidationResult:
+        """
+        Validate already-parsed citations against a matcher.
 
-        # 5. Calculate coverage score
-        total_citations = len(found_citations)
+        Linear in the answer length plus O(log n) per citation.
+        """
+        errors = []
+        valid_citations = []
+        invalid_citations = []
+        matched_chunk_ids = []
+        seen_chunk_ids = set()
+
+        for citation in citations:
+            chunk = matcher.match(citation)
+            if chunk is not None:
+                valid_citations.append(citation.text)
+                if chunk.chunk_id not in seen_chunk_ids:
+                    seen_chunk_ids.add(chunk.chunk_id)
+                    matched_chunk_ids.append(chunk.chunk_id)
+            else:
+                invalid_citations.append(citation.text)
+                if citation.reference is None:
+                    reason = sura_resolver.reference_error(citation.verse_ref)
+                    errors.append(f"Citation {citation.text} is not a valid verse reference ({reason})")
+                else:
+                    errors.append(f"Citation {citation.text} not found in retrieved sources")
+
+        # Check paragraph coverage
+        missing_citations = self._check_paragraph_coverage(response_text, citations)
+
+        # Calculate coverage score
+        total_citations = len(citations)
         valid_count = len(valid_citations)
         coverage_score = valid_count / total_citations if total_citations > 0 else 0.0
 
         # Determine if response is valid
         is_valid = (
+            total_citations > 0 and
             len(invalid_citations) == 0 and
             len(missing_citations) == 0 and
             coverage_score >= 0.8
@@ -114,88 +181,53 @@ class CitationValidator:
             missing_citations=missing_citations,
             coverage_score=coverage_score,
             errors=errors,
+            matched_chunk_ids=matched_chunk_ids,
         )
 
-    async def _get_chunk_metadata(
+    async def _get_chunks(
         self,
         chunk_ids: List[str],
-    ) -> dict:
-        """Get metadata for chunks from database."""
-        if not chunk_ids:
-            return {}
+    ) -> List[RetrievedChunk]:
+        """Load chunk metadata (no content) from the database in one query."""
+        if not chunk_ids or self.session is None:
+            return []
 
         result = await self.session.execute(
-            select(TafseerChunk).where(TafseerChunk.chunk_id.in_(chunk_ids))
-        )
-        chunks = result.scalars().all()
-
-        return {
-            chunk.chunk_id: {
-                "source_id": chunk.source_id,
-                "sura_no": chunk.sura_no,
-                "aya_start": chunk.aya_start,
-                "aya_end": chunk.aya_end,
-                "verse_reference": chunk.verse_reference,
-            }
-            for chunk in chunks
-        }
-
-    def _citation_matches_chunk(
-        self,
-        source_name: str,
-        verse_ref: str,
-        chunk_metadata: dict,
-    ) -> bool:
-        """
-        Check if a citation matches a chunk's metadata.
-
-        Handles variations in source naming and verse reference formats.
-        """
-        source_lower = source_name.lower().strip()
-        source_id = chunk_metadata["source_id"].lower()
-
-        # Check source match (flexible matching)
-        source_match = (
-            source_lower in source_id or
-            source_id in source_lower or
-            self._normalize_source_name(source_lower) == self._normalize_source_name(source_id)
+            select(
+                TafseerChunk.chunk_id,
+                TafseerChunk.source_id,
+                TafseerChunk.sura_no,
+                TafseerChunk.aya_start,
+                TafseerChunk.aya_end,
+                TafseerSource.name_en,
+                TafseerSource.name_ar,
+            )
+            .join(TafseerSource, TafseerChunk.source_id == TafseerSource.id)
+            .where(TafseerChunk.chunk_id.in_(chunk_ids))
         )
 
-        if not source_match:
-            return False
-
-        # Check verse reference match
-        verse_ref = verse_ref.strip()
-
-        # Parse verse reference (could be "2:255" or "Al-Baqarah:255" or "2:255-260")
-        parsed_ref = self._parse_verse_reference(verse_ref)
-        if not parsed_ref:
-            return False
-
-        sura_no, aya_start, aya_end = parsed_ref
-
-        chunk_sura = chunk_metadata["sura_no"]
-        chunk_aya_start = chunk_metadata["aya_start"]
-        chunk_aya_end = chunk_metadata["aya_end"]
-
-        # Check if cited verse is within chunk's range
-        if sura_no != chunk_sura:
-            return False
-
-        # Citation must be within chunk's verse range
-        return (
-            aya_start >= chunk_aya_start and
-            aya_end <= chunk_aya_end
-        )
+        return [
+            RetrievedChunk(
+                chunk_id=row.chunk_id,
+                source_id=row.source_id,
+                source_name=row.name_en,
+                source_name_ar=row.name_ar,
+                verse_reference=(
+                    f"{row.sura_no}:{row.aya_start}"
+                    if row.aya_start == row.aya_end
+                    else f"{row.sura_no}:{row.aya_start}-{row.aya_end}"
+                ),
+                sura_no=row.sura_no,
+                aya_start=row.aya_start,
+                aya_end=row.aya_end,
+                content="",
+            )
+            for row in result.all()
+        ]
 
     def _normalize_source_name(self, name: str) -> str:
         """Normalize source name for comparison."""
-        # Remove common prefixes/suffixes
-        name = name.lower().strip()
-        for prefix in ["tafsir ", "tafseer ", "al-", "ibn ", "imam "]:
-            if name.startswith(prefix):
-                name = name[len(prefix):]
-        return name
+        return normalize_source_name(name)
 
     def _parse_verse_reference(
         self,
@@ -204,68 +236,244 @@ class CitationValidator:
         """
         Parse verse reference into (sura_no, aya_start, aya_end).
 
-        Handles formats:
-        - "2:255" -> (2, 255, 255)
-        - "2:255-260" -> (2, 255, 260)
-        - "Al-Baqarah:255" -> (2, 255, 255) (using sura name mapping)
+        Handles numeric ("2:255", "2:255-260") and named ("Al-Baqarah:255",
+        "Yasin:1", "البقرة:255") formats for all 114 suras.
         """
-        # Sura name to number mapping
-        sura_names = {
-            "al-fatiha": 1, "al-baqarah": 2, "al-imran": 3, "an-nisa": 4,
-            "al-maidah": 5, "al-anam": 6, "al-araf": 7, "al-anfal": 8,
-            "at-tawbah": 9, "yunus": 10, "hud": 11, "yusuf": 12,
-            "ar-rad": 13, "ibrahim": 14, "al-hijr": 15, "an-nahl": 16,
-            "al-isra": 17, "al-kahf": 18, "maryam": 19, "taha": 20,
-            # Add more as needed...
-        }
+        return sura_resolver.parse_reference(ref)
 
-        ref = ref.strip().lower()
-
-        # Try numeric format first: "2:255" or "2:255-260"
-        numeric_match = re.match(r'(\d+):(\d+)(?:-(\d+))?', ref)
-        if numeric_match:
-            sura = int(numeric_match.group(1))
-            aya_start = int(numeric_match.group(2))
-            aya_end = int(numeric_match.group(3)) if numeric_match.group(3) else aya_start
-            return (sura, aya_start, aya_end)
-
-        # Try name format: "Al-Baqarah:255"
-        name_match = re.match(r'([a-z\-]+):(\d+)(?:-(\d+))?', ref)
-        if name_match:
-            sura_name = name_match.group(1)
-            if sura_name in sura_names:
-                sura = sura_names[sura_name]
-                aya_start = int(name_match.group(2))
-                aya_end = int(name_match.group(3)) if name_match.group(3) else aya_start
-                return (sura, aya_start, aya_end)
-
-        return None
-
-    def _check_paragraph_coverage(self, response_text: str) -> List[str]:
+    def _check_paragraph_coverage(
+        self,
+        response_text: str,
+        citations: Optional[List[ParsedCitation]] = None,
+    ) -> List[str]:
         """
         Check that each substantive paragraph has at least one citation.
+
+        Walks paragraphs and citation offsets together, so the answer is
+        not re-scanned per paragraph.
         """
+        if citations is None:
+            citations = parse_citations(response_text)
+        citation_starts = [c.start for c in citations]
+
         missing = []
+        para_no = 0
+        offset = 0
+
+        # Split into paragraphs, tracking each one's offsets
+        for raw in response_text.split('\n\n'):
+            raw_start, offset = offset, offset + len(raw) + 2
+            para = raw.strip()
+            if not para:
+                continue
+            para_no += 1
 
-        # Split into paragraphs
-        paragraphs = [p.strip() for p in response_text.split('\n\n') if p.strip()]
+            if self._paragraph_lacks_citation(para, raw_start, raw_start + len(raw), citation_starts):
+                missing.append(f"Paragraph {para_no}: {self._preview(para)}")
 
-        for i, para in enumerate(paragraphs):
-            # Skip short paragraphs (headers, transitions, etc.)
-            if len(para) < 100:
-                continue
+        return missing
 
-            # Skip paragraphs that are just lists or formatting
-            if para.startswith('-') or para.startswith('*') or para.startswith('#'):
-                continue
+    @staticmethod
+    def _paragraph_lacks_citation(
+        para: str,
+        start: int,
+        end: int,
+        citation_starts: List[int],
+    ) -> bool:
+        """Check if a substantive paragraph has no citation starting in [start, end)."""
+        # Skip short paragraphs (headers, transitions, etc.)
+        if len(para) < 100:
+            return False
 
-            # Check if paragraph has a citation
-            if not self.CITATION_PATTERN.search(para):
-                # Truncate for error message
-                preview = para[:50] + "..." if len(para) > 50 else para
-                missing.append(f"Paragraph {i+1}: {preview}")
+        # Skip paragraphs that are just lists or formatting
+        if para.startswith('-') or para.startswith('*') or para.startswith('#'):
+            return False
 
-        return missing
+        i = bisect_right(citation_starts, start - 1)
+        return i >= len(citation_starts) or citation_starts[i] >= end
+
+    @staticmethod
+    def _preview(para: str) -> str:
+        """Truncate a paragraph for error messages."""
+        return para[:50] + "..." if len(para) > 50 else para
+
+
+class StreamingCitationValidator:
+    """
+    Incremental CitationValidator over a stream of text deltas.
+
+    Completed [Source, ref] spans and paragraph boundaries are detected as
+    text arrives, and each is validated once:
+    1. feed() returns CitationEvents for whatever the delta completed
+    2. `aborted` becomes true once max_invalid_citations invalid citations
+       have been seen, so the caller can stop generating
+    3. finish() returns the same CitationValidationResult the batch
+       validator would produce for the full text
+    """
+
+    def __init__(
+        self,
+        retrieved_chunks: List[RetrievedChunk],
+        max_invalid_citations: Optional[int] = None,
+        validator: Optional[CitationValidator] = None,
+    ):
+        self.validator = validator or CitationValidator()
+        self.matcher = CitationMatcher(retrieved_chunks)
+        self.max_invalid_citations = (
+            settings.rag_stream_max_invalid_citations
+            if max_invalid_citations is None
+            else max_invalid_citations
+        )
+
+        self.text = ""
+        self.citations: List[ParsedCitation] = []
+        self.invalid_count = 0
+        self.aborted = False
+
+        self._citation_starts: List[int] = []
+        self._scan_pos = 0  # No citation can start before this offset
+        self._para_start = 0  # Offset of the current (open) paragraph
+        self._para_no = 0
+
+    def feed(self, delta: str) -> List[CitationEvent]:
+        """Consume a text delta and return the events it completed."""
+        if self.aborted or not delta:
+            return []
+
+        search_from = max(self._para_start, len(self.text) - 1)
+        self.text += delta
+        events: List[CitationEvent] = []
+
+        # A citation is complete once its closing bracket arrives
+        if "]" in delta:
+            self._scan_citations(events)
+
+        # A paragraph is complete at "\n\n", once no citation starting in it can still be open.
+        # A closing bracket can release a boundary deferred by an open "[", so
+        # rescan the open paragraph then, not only when a newline arrives.
+        if "]" in delta:
+            self._scan_paragraphs(self._para_start, events)
+        elif "\n" in delta:
+            self._scan_paragraphs(search_from, events)
+
+        return events
+
+    def finish(self) -> CitationValidationResult:
+        """Validate the complete answer."""
+        if not self.citations:
+            return CitationValidationResult(
+                is_valid=False,
+                valid_citations=[],
+                invalid_citations=[],
+                missing_citations=["Entire response lacks citations"],
+                coverage_score=0.0,
+                errors=["No citations found in response"],
+            )
+        return self.validator.validate_parsed(self.text, self.citations, self.matcher)
+
+    def _scan_citations(self, events: List[CitationEvent]) -> None:
+        last_end = self._scan_pos
+        for match in CITATION_PATTERN.finditer(self.text, self._scan_pos):
+            citation = parse_citation_match(match)
+            self.citations.append(citation)
+            self._citation_starts.append(citation.start)
+            last_end = citation.end
+            events.append(self._check_citation(citation))
+
+            if 0 < self.max_invalid_citations <= self.invalid_count:
+                self.aborted = True
+                events.append(CitationEvent(
+                    type="abort",
+                    message=f"{self.invalid_count} citations could not be validated",
+                ))
+                return
+
+        # Any later match must start after the last closing bracket
+        self._scan_pos = max(last_end, self.text.rfind("]", self._scan_pos) + 1)
+
+    def _check_citation(self, citation: ParsedCitation) -> CitationEvent:
+        chunk = self.matcher.match(citation)
+        if chunk is not None:
+            return CitationEvent(
+                type="citation_valid",
+                message="Citation found in retrieved sources",
+                citation=citation.text,
+                chunk_id=chunk.chunk_id,
+            )
+
+        self.invalid_count += 1
+        return CitationEvent(
+            type="citation_invalid",
+            message=(
+                f"Invalid verse reference ({sura_resolver.reference_error(citation.verse_ref)})"
+                if citation.reference is None
+                else "Citation not found in retrieved sources"
+            ),
+            citation=citation.text,
+        )
+
+    def _scan_paragraphs(self, search_from: int, events: List[CitationEvent]) -> None:
+        # Citations starting before `settled` are all known
+        open_bracket = self.text.find("[", self._scan_pos)
+        settled = len(self.text) if open_bracket == -1 else open_bracket
+
+        while True:
+            end = self.text.find("\n\n", max(search_from, self._para_start))
+            if end == -1 or end > settled:
+                return
+
+            para = self.text[self._para_start:end].strip()
+            if para:
+                self._para_no += 1
+                if self.validator._paragraph_lacks_citation(
+                    para, self._para_start, end, self._citation_starts
+                ):
+                    events.append(CitationEvent(
+                        type="paragraph_uncited",
+                        message=f"Paragraph {self._para_no} has no citation",
+                        paragraph=self._para_no,
+                    ))
+            self._para_start = end + 2
+
+
+# chunk_id -> normalized passage vector, most recently used last
+_chunk_vector_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_chunk_vector_lock = threading.Lock()
+
+
+def _chunk_vectors(chunk_ids: List[str], contents: dict) -> Optional[np.ndarray]:
+    """Passage vectors for chunks, embedding only those not cached."""
+    with _chunk_vector_lock:
+        cached = {c: _chunk_vector_cache[c] for c in chunk_ids if c in _chunk_vector_cache}
+        for chunk_id in cached:
+            _chunk_vector_cache.move_to_end(chunk_id)
+
+    missing = [c for c in chunk_ids if c not in cached]
+    if missing:
+        vectors = embed_texts([contents[c] for c in missing], prefix="passage: ")
+        if vectors is None:
+            return None
+        with _chunk_vector_lock:
+            for chunk_id, vector in zip(missing, vectors):
+                cached[chunk_id] = vector
+                _chunk_vector_cache[chunk_id] = vector
+            while len(_chunk_vector_cache) > settings.claim_support_chunk_cache_size:
+                _chunk_vector_cache.popitem(last=False)
+
+    if not chunk_ids:
+        return np.zeros((0, settings.embedding_dimension), dtype=np.float32)
+    return np.stack([cached[c] for c in chunk_ids])
+
+
+@dataclass
+class ClaimSupport:
+    """Whether a cited chunk supports a claim."""
+    claim: str
+    chunk_id: str
+    is_supported: bool
+    score: float
+    method: str  # "embedding", "keyword" or "missing"
+    explanation: str
 
 
 class CitationCoverageValidator:
@@ -273,10 +481,20 @@ class CitationCoverageValidator:
     Validates that citations actually support the claims made.
 
     This is a more sophisticated validator that checks semantic
-    alignment between claims and cited evidence.
+    alignment between claims and cited evidence:
+    1. All (claim, chunk) pairs of an answer are checked in one batch
+    2. Chunks come from the retrieved set, or one database query
+    3. Support is the cosine similarity of claim and chunk embeddings,
+       computed in one vectorized pass; keyword overlap is the fallback
+       when embeddings are off (the default) or the model is not loaded
+    4. Chunk vectors are cached by chunk ID, so an answer only embeds
+       its claims and chunks not seen before
     """
 
-    def __init__(self, session: AsyncSession):
+    # Minimum keyword overlap ratio for the fallback check
+    KEYWORD_THRESHOLD = 0.3
+
+    def __init__(self, session: Optional[AsyncSession] = None):
         self.session = session
 
     async def validate_claim_support(
@@ -290,25 +508,151 @@ class CitationCoverageValidator:
         Returns:
             (is_supported, confidence, explanation)
         """
-        # Get chunk content
+        support = (await self.validate_claims_support([(claim, cited_chunk_id)]))[0]
+        return (support.is_supported, support.score, support.explanation)
+
+    async def validate_claims_support(
+        self,
+        pairs: List[Tuple[str, str]],
+        retrieved_chunks: Optional[List[RetrievedChunk]] = None,
+    ) -> List[ClaimSupport]:
+        """
+        Check every (claim, cited_chunk_id) pair of an answer at once.
+
+        Args:
+            pairs: (claim, chunk_id) pairs, e.g. from extract_claim_pairs()
+            retrieved_chunks: Chunks already in memory; only chunks missing
+                from this set are loaded from the database
+
+        Returns:
+            One ClaimSupport per pair, in order
+        """
+        if not pairs:
+            return []
+
+        contents = {
+            c.chunk_id: c.content_en or c.content_ar or c.content or ""
+            for c in retrieved_chunks or []
+        }
+        missing_ids = list({chunk_id for _, chunk_id in pairs} - contents.keys())
+        if missing_ids:
+            contents.update(await self._get_chunk_contents(missing_ids))
+
+        found = [(claim, chunk_id) for claim, chunk_id in pairs if chunk_id in contents]
+        scores = await asyncio.to_thread(self._embedding_scores, found, contents)
+
+        results = []
+        found_index = 0
+        for claim, chunk_id in pairs:
+            if chunk_id not in contents:
+                results.append(ClaimSupport(
+                    claim, chunk_id, False, 0.0, "missing", f"Chunk {chunk_id} not found",
+                ))
+                continue
+
+            if scores is not None:
+                score = float(scores[found_index])
+                method = "embedding"
+                is_supported = score >= settings.claim_support_threshold
+            else:
+                score = self._keyword_overlap(claim, contents[chunk_id])
+                method = "keyword"
+                is_supported = score >= self.KEYWORD_THRESHOLD
+            found_index += 1
+
+            results.append(ClaimSupport(
+                claim=claim,
+                chunk_id=chunk_id,
+                is_supported=is_supported,
+                score=score,
+                method=method,
+                explanation=(
+                    "Claim appears to be supported by source"
+                    if is_supported
+                    else "Claim may not be fully supported by source"
+                ),
+            ))
+
+        return results
+
+    @staticmethod
+    def extract_claim_pairs(
+        response_text: str,
+        retrieved_chunks: List[RetrievedChunk],
+    ) -> List[Tuple[str, str]]:
+        """
+        Pair each cited sentence of an answer with the chunk it cites.
+
+        The claim is the sentence with its citations removed.
+        """
+        matcher = CitationMatcher(retrieved_chunks)
+        pairs = []
+
+        for sentence in SENTENCE_SPLIT_PATTERN.split(response_text):
+            citations = parse_citations(sentence)
+            if not citations:
+                continue
+
+            claim = " ".join(CITATION_PATTERN.sub(" ", sentence).split())
+            claim = re.sub(r'\s+([.,;:!?\u061f\u060c])', r'\1', claim)
+            if not claim:
+                continue
+
+            for citation in citations:
+                chunk = matcher.match(citation)
+                if chunk is not None and (claim, chunk.chunk_id) not in pairs:
+                    pairs.append((claim, chunk.chunk_id))
+
+        return pairs
+
+    async def _get_chunk_contents(self, chunk_ids: List[str]) -> dict:
+        """Load chunk contents from the database in one query."""
+        if self.session is None:
+            return {}
+
         result = await self.session.execute(
-            select(TafseerChunk).where(TafseerChunk.chunk_id == cited_chunk_id)
+            select(
+                TafseerChunk.chunk_id,
+                TafseerChunk.content_en,
+                TafseerChunk.content_ar,
+            ).where(TafseerChunk.chunk_id.in_(chunk_ids))
         )
-        chunk = result.scalar_one_or_none()
+        return {
+            row.chunk_id: row.content_en or row.content_ar or ""
+            for row in result.all()
+        }
 
-        if not chunk:
-            return (False, 0.0, f"Chunk {cited_chunk_id} not found")
+    @staticmethod
+    def _embedding_scores(
+        pairs: List[Tuple[str, str]],
+        contents: dict,
+    ) -> Optional[np.ndarray]:
+        """Cosine similarity per pair, or None without an embedding model."""
+        if not settings.claim_support_embeddings_enabled or get_embedder() is None:
+            return None
+
+        claims = list(dict.fromkeys(claim for claim, _ in pairs))
+        chunk_ids = list(dict.fromkeys(chunk_id for _, chunk_id in pairs))
+
+        claim_vectors = embed_texts(claims, prefix="query: ")
+        chunk_vectors = _chunk_vectors(chunk_ids, contents)
+        if claim_vectors is None or chunk_vectors is None:
+            return None
+
+        claim_rows = {claim: i for i, claim in enumerate(claims)}
+        chunk_rows = {chunk_id: i for i, chunk_id in enumerate(chunk_ids)}
+        return pairwise_cosine(
+            claim_vectors,
+            chunk_vectors,
+            [claim_rows[claim] for claim, _ in pairs],
+            [chunk_rows[chunk_id] for _, chunk_id in pairs],
+        )
 
-        # For MVP, we do simple keyword overlap check
-        # In production, use semantic similarity
+    @staticmethod
+    def _keyword_overlap(claim: str, content: str) -> float:
+        """Fraction of claim words that appear in the content."""
         claim_words = set(claim.lower().split())
-        content = (chunk.content_en or chunk.content_ar or "").lower()
-        content_words = set(content.split())
+        content_words = set(content.lower().split())
 
         overlap = len(claim_words & content_words)
-        overlap_ratio = overlap / len(claim_words) if claim_words else 0
-
-        if overlap_ratio >= 0.3:
-            return (True, overlap_ratio, "Claim appears to be supported by source")
-        else:
-            return (False, overlap_ratio, "Claim may not be fully supported by source")
+        return overlap / len(claim_words) if claim_words else 0.0
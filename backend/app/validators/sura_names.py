@@ -0,0 +1,294 @@
+"""
+Sura name resolution for citation verse references.
+
+Resolves sura names in Arabic or English transliteration (with common
+spelling variants) to sura numbers, e.g. "Yasin", "Ya-Sin", "يس" -> 36.
+
+The lookup table covers all 114 suras and is built once at import time;
+names stored in the Quran corpus are added at startup via
+load_from_corpus(). Lookups are O(1) on a normalized key.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# (sura_no, Arabic name, English transliteration, aya count, other variants)
+SURAS: List[Tuple[int, str, str, int, Tuple[str, ...]]] = [
+    (1, "الفاتحة", "Al-Fatihah", 7, ("Fatiha", "The Opening")),
+    (2, "البقرة", "Al-Baqarah", 286, ("Baqara", "The Cow")),
+    (3, "آل عمران", "Ali 'Imran", 200, ("Al-Imran", "Aal-Imran", "Imran")),
+    (4, "النساء", "An-Nisa", 176, ("Nisaa", "The Women")),
+    (5, "المائدة", "Al-Ma'idah", 120, ("Maida", "The Table Spread")),
+    (6, "الأنعام", "Al-An'am", 165, ("The Cattle",)),
+    (7, "الأعراف", "Al-A'raf", 206, ("The Heights",)),
+    (8, "الأنفال", "Al-Anfal", 75, ("The Spoils of War",)),
+    (9, "التوبة", "At-Tawbah", 129, ("Taubah", "Tauba", "Bara'ah", "The Repentance")),
+    (10, "يونس", "Yunus", 109, ("Younus", "Jonah")),
+    (11, "هود", "Hud", 123, ("Hood",)),
+    (12, "يوسف", "Yusuf", 111, ("Yousuf", "Yousef", "Joseph")),
+    (13, "الرعد", "Ar-Ra'd", 43, ("The Thunder",)),
+    (14, "إبراهيم", "Ibrahim", 52, ("Abraham",)),
+    (15, "الحجر", "Al-Hijr", 99, ()),
+    (16, "النحل", "An-Nahl", 128, ("The Bee",)),
+    (17, "الإسراء", "Al-Isra", 111, ("Bani Isra'il", "The Night Journey")),
+    (18, "الكهف", "Al-Kahf", 110, ("The Cave",)),
+    (19, "مريم", "Maryam", 98, ("Mary",)),
+    (20, "طه", "Taha", 135, ("Ta-Ha",)),
+    (21, "الأنبياء", "Al-Anbiya", 112, ("The Prophets",)),
+    (22, "الحج", "Al-Hajj", 78, ("The Pilgrimage",)),
+    (23, "المؤمنون", "Al-Mu'minun", 118, ("Muminoon", "The Believers")),
+    (24, "النور", "An-Nur", 64, ("Noor", "The Light")),
+    (25, "الفرقان", "Al-Furqan", 77, ("The Criterion",)),
+    (26, "الشعراء", "Ash-Shu'ara", 227, ("The Poets",)),
+    (27, "النمل", "An-Naml", 93, ("The Ant",)),
+    (28, "القصص", "Al-Qasas", 88, ("The Stories",)),
+    (29, "العنكبوت", "Al-'Ankabut", 69, ("Ankaboot", "The Spider")),
+    (30, "الروم", "Ar-Rum", 60, ("Room", "The Romans")),
+    (31, "لقمان", "Luqman", 34, ("Lukman",)),
+    (32, "السجدة", "As-Sajdah", 30, ("The Prostration",)),
+    (33, "الأحزاب", "Al-Ahzab", 73, ("The Combined Forces",)),
+    (34, "سبأ", "Saba", 54, ("Sheba",)),
+    (35, "فاطر", "Fatir", 45, ("The Originator",)),
+    (36, "يس", "Ya-Sin", 83, ("Yasin", "Yaseen")),
+    (37, "الصافات", "As-Saffat", 182, ()),
+    (38, "ص", "Sad", 88, ("Saad", "Suad")),
+    (39, "الزمر", "Az-Zumar", 75, ()),
+    (40, "غافر", "Ghafir", 85, ("Al-Mu'min", "The Forgiver")),
+    (41, "فصلت", "Fussilat", 54, ("Ha-Mim Sajdah",)),
+    (42, "الشورى", "Ash-Shura", 53, ("The Consultation",)),
+    (43, "الزخرف", "Az-Zukhruf", 89, ()),
+    (44, "الدخان", "Ad-Dukhan", 59, ("The Smoke",)),
+    (45, "الجاثية", "Al-Jathiyah", 37, ()),
+    (46, "الأحقاف", "Al-Ahqaf", 35, ()),
+    (47, "محمد", "Muhammad", 38, ()),
+    (48, "الفتح", "Al-Fath", 29, ("The Victory",)),
+    (49, "الحجرات", "Al-Hujurat", 18, ()),
+    (50, "ق", "Qaf", 45, ()),
+    (51, "الذاريات", "Adh-Dhariyat", 60, ("Az-Zariyat",)),
+    (52, "الطور", "At-Tur", 49, ("Toor", "The Mount")),
+    (53, "النجم", "An-Najm", 62, ("The Star",)),
+    (54, "القمر", "Al-Qamar", 55, ("The Moon",)),
+    (55, "الرحمن", "Ar-Rahman", 78, ("The Most Merciful",)),
+    (56, "الواقعة", "Al-Waqi'ah", 96, ("The Inevitable",)),
+    (57, "الحديد", "Al-Hadid", 29, ("The Iron",)),
+    (58, "المجادلة", "Al-Mujadila", 22, ("Mujadilah",)),
+    (59, "الحشر", "Al-Hashr", 24, ()),
+    (60, "الممتحنة", "Al-Mumtahanah", 13, ()),
+    (61, "الصف", "As-Saff", 14, ()),
+    (62, "الجمعة", "Al-Jumu'ah", 11, ("Jumuah", "Friday")),
+    (63, "المنافقون", "Al-Munafiqun", 11, ("The Hypocrites",)),
+    (64, "التغابن", "At-Taghabun", 18, ()),
+    (65, "الطلاق", "At-Talaq", 12, ("The Divorce",)),
+    (66, "التحريم", "At-Tahrim", 12, ()),
+    (67, "الملك", "Al-Mulk", 30, ("The Sovereignty",)),
+    (68, "القلم", "Al-Qalam", 52, ("Nun", "The Pen")),
+    (69, "الحاقة", "Al-Haqqah", 52, ()),
+    (70, "المعارج", "Al-Ma'arij", 44, ()),
+    (71, "نوح", "Nuh", 28, ("Nooh", "Noah")),
+    (72, "الجن", "Al-Jinn", 28, ()),
+    (73, "المزمل", "Al-Muzzammil", 20, ()),
+    (74, "المدثر", "Al-Muddaththir", 56, ("Muddathir",)),
+    (75, "القيامة", "Al-Qiyamah", 40, ("The Resurrection",)),
+    (76, "الإنسان", "Al-Insan", 31, ("Ad-Dahr", "The Man")),
+    (77, "المرسلات", "Al-Mursalat", 50, ()),
+    (78, "النبأ", "An-Naba", 40, ("The Tidings",)),
+    (79, "النازعات", "An-Nazi'at", 46, ()),
+    (80, "عبس", "'Abasa", 42, ()),
+    (81, "التكوير", "At-Takwir", 29, ()),
+    (82, "الانفطار", "Al-Infitar", 19, ()),
+    (83, "المطففين", "Al-Mutaffifin", 36, ()),
+    (84, "الانشقاق", "Al-Inshiqaq", 25, ()),
+    (85, "البروج", "Al-Buruj", 22, ()),
+    (86, "الطارق", "At-Tariq", 17, ()),
+    (87, "الأعلى", "Al-A'la", 19, ()),
+    (88, "الغاشية", "Al-Ghashiyah", 26, ()),
+    (89, "الفجر", "Al-Fajr", 30, ("The Dawn",)),
+    (90, "البلد", "Al-Balad", 20, ("The City",)),
+    (91, "الشمس", "Ash-Shams", 15, ("The Sun",)),
+    (92, "الليل", "Al-Layl", 21, ("Al-Lail", "The Night")),
+    (93, "الضحى", "Ad-Duha", 11, ("Ad-Dhuha",)),
+    (94, "الشرح", "Ash-Sharh", 8, ("Al-Inshirah",)),
+    (95, "التين", "At-Tin", 8, ("Teen", "The Fig")),
+    (96, "العلق", "Al-'Alaq", 19, ()),
+    (97, "القدر", "Al-Qadr", 5, ("The Power",)),
+    (98, "البينة", "Al-Bayyinah", 8, ()),
+    (99, "الزلزلة", "Az-Zalzalah", 8, ("Zilzal", "The Earthquake")),
+    (100, "العاديات", "Al-'Adiyat", 11, ()),
+    (101, "القارعة", "Al-Qari'ah", 11, ()),
+    (102, "التكاثر", "At-Takathur", 8, ()),
+    (103, "العصر", "Al-'Asr", 3, ()),
+    (104, "الهمزة", "Al-Humazah", 9, ()),
+    (105, "الفيل", "Al-Fil", 5, ("Feel", "The Elephant")),
+    (106, "قريش", "Quraysh", 4, ("Quraish",)),
+    (107, "الماعون", "Al-Ma'un", 7, ()),
+    (108, "الكوثر", "Al-Kawthar", 3, ("Kauthar",)),
+    (109, "الكافرون", "Al-Kafirun", 6, ("Kafiroon", "The Disbelievers")),
+    (110, "النصر", "An-Nasr", 3, ()),
+    (111, "المسد", "Al-Masad", 5, ("Al-Lahab",)),
+    (112, "الإخلاص", "Al-Ikhlas", 4, ("The Sincerity",)),
+    (113, "الفلق", "Al-Falaq", 5, ("The Daybreak",)),
+    (114, "الناس", "An-Nas", 6, ("Mankind",)),
+]
+
+# Leading words dropped before matching ("Surah Al-Kahf" -> "kahf")
+_LATIN_PREFIXES = {"surah", "sura", "surat", "soorah"}
+_LATIN_ARTICLES = {"al", "an", "ar", "as", "at", "ash", "adh", "ad", "az", "ath", "el", "the"}
+
+_ARABIC_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_ALEFS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه"})
+_ARABIC_CHARS = re.compile("[\u0600-\u06ff]")
+_APOSTROPHES = re.compile("['`\u2018\u2019\u02be\u02bf]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_REPEATED = re.compile(r"(.)\1+")
+
+# "2:255", "Al-Baqarah:255-257", "يس: 1", "Ali 'Imran 3.18"
+VERSE_REFERENCE_PATTERN = re.compile(
+    r"^\s*(?P<sura>[^:]+?)\s*[:.]\s*(?P<start>\d+)(?:\s*[-–]\s*(?P<end>\d+))?\s*$"
+)
+
+
+def normalize_sura_name(name: str) -> str:
+    """
+    Normalize a sura name to its lookup key.
+
+    Arabic: strips diacritics/tatweel, unifies alef/ya/ta-marbuta forms
+    and drops the "سورة" prefix and "ال" article.
+    Latin: strips accents, apostrophes, "Surah" and the article, then
+    collapses common transliteration variants (ee/oo/ou, doubled
+    letters, final -ah).
+    """
+    name = name.strip()
+    if not name:
+        return ""
+
+    if _ARABIC_CHARS.search(name):
+        name = _ARABIC_DIACRITICS.sub("", name).translate(_ARABIC_ALEFS)
+        name = "".join(name.split())
+        if name.startswith("سوره"):
+            name = name[len("سوره"):]
+        if name.startswith("ال") and len(name) > 3:
+            name = name[2:]
+        return name
+
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch)).casefold()
+    name = _APOSTROPHES.sub("", name)
+    tokens = _NON_ALNUM.sub(" ", name).split()
+
+    if len(tokens) > 1 and tokens[0] in _LATIN_PREFIXES:
+        tokens = tokens[1:]
+    if len(tokens) > 1 and tokens[0] in _LATIN_ARTICLES:
+        tokens = tokens[1:]
+
+    key = "".join(tokens)
+    for old, new in (("ee", "i"), ("oo", "u"), ("ou", "u")):
+        key = key.replace(old, new)
+    key = _REPEATED.sub(r"\1", key)
+    if key.endswith("ah"):
+        key = key[:-1]
+    return key
+
+
+class SuraNameResolver:
+    """O(1) sura name -> number lookup over a precomputed normalized table."""
+
+    def __init__(self, suras: Iterable[Tuple[int, str, str, int, Tuple[str, ...]]]):
+        self._by_key: Dict[str, int] = {}
+        self.aya_counts: Dict[int, int] = {}
+        self.names: Dict[int, Tuple[str, str]] = {}
+
+        for sura_no, name_ar, name_en, aya_count, variants in suras:
+            self.aya_counts[sura_no] = aya_count
+            self.names[sura_no] = (name_ar, name_en)
+            for alias in (name_ar, name_en, *variants):
+                self.add_alias(alias, sura_no)
+
+    def add_alias(self, name: str, sura_no: int) -> None:
+        """Register another name for a sura (first registration wins)."""
+        key = normalize_sura_name(name)
+        if key:
+            self._by_key.setdefault(key, sura_no)
+
+    def resolve(self, name: str) -> Optional[int]:
+        """Resolve a sura number or name to its number (1-114), or None."""
+        name = name.strip()
+        if name.isdigit():
+            sura_no = int(name)
+            return sura_no if sura_no in self.aya_counts else None
+        return self._by_key.get(normalize_sura_name(name))
+
+    def parse_reference(self, ref: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Parse a verse reference into (sura_no, aya_start, aya_end).
+
+        Handles formats:
+        - "2:255" -> (2, 255, 255)
+        - "2:255-260" -> (2, 255, 260)
+        - "Al-Baqarah:255" / "البقرة:255" -> (2, 255, 255)
+
+        Returns None for unknown suras or ayas outside the sura.
+        """
+        match = VERSE_REFERENCE_PATTERN.match(ref)
+        if not match:
+            return None
+
+        sura_no = self.resolve(match.group("sura"))
+        if sura_no is None:
+            return None
+
+        aya_start = int(match.group("start"))
+        aya_end = int(match.group("end")) if match.group("end") else aya_start
+        if not 1 <= aya_start <= aya_end <= self.aya_counts[sura_no]:
+            return None
+
+        return (sura_no, aya_start, aya_end)
+
+    def reference_error(self, ref: str) -> Optional[str]:
+        """
+        Explain why a verse reference does not resolve, or None if it does.
+
+        Distinguishes an unknown format or sura from an aya past the sura's
+        end, so "2:999" is reported as out of range, not as unparseable.
+        """
+        match = VERSE_REFERENCE_PATTERN.match(ref)
+        if not match:
+            return "unrecognized verse reference"
+
+        sura_no = self.resolve(match.group("sura"))
+        if sura_no is None:
+            return f"unknown sura '{match.group('sura').strip()}'"
+
+        aya_start = int(match.group("start"))
+        aya_end = int(match.group("end")) if match.group("end") else aya_start
+        if aya_start > aya_end:
+            return f"aya range {aya_start}-{aya_end} is reversed"
+        if aya_start < 1 or aya_end > self.aya_counts[sura_no]:
+            return f"sura {sura_no} has {self.aya_counts[sura_no]} ayas"
+        return None
+
+    async def load_from_corpus(self, session: AsyncSession) -> int:
+        """
+        Add the sura names stored in the Quran corpus as aliases.
+
+        Returns:
+            Number of suras found in the corpus
+        """
+        from app.models.quran import QuranVerse
+
+        result = await session.execute(
+            select(QuranVerse.sura_no, QuranVerse.sura_name_ar, QuranVerse.sura_name_en)
+            .distinct()
+        )
+        rows = result.all()
+        for sura_no, name_ar, name_en in rows:
+            self.add_alias(name_ar or "", sura_no)
+            self.add_alias(name_en or "", sura_no)
+        return len(rows)
+
+
+# Shared resolver, built once at import time
+sura_resolver = SuraNameResolver(SURAS)
@@ -0,0 +1,191 @@
+"""
+Asynchronous RAG jobs on the rq queue.
+
+/rag/jobs enqueues a question and returns immediately; an rq worker
+process runs RAGPipeline.query and stores the result in Redis, where the
+API polls it. This keeps API workers (and their DB sessions) free while
+the LLM call runs, and lets the LLM workload scale on separate processes.
+
+Run a worker:
+    rq worker --url $REDIS_URL default
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from rq import Queue
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.database import DATABASE_URL_ASYNC
+from app.db.redis import get_sync_redis, is_fake_redis
+from app.rag.coalescing import normalize_request_key
+
+
+JOB_ID_PREFIX = "rag-"
+
+# Held while one API worker checks for and enqueues a job ID, so two
+# workers submitting the same question cannot both enqueue it
+ENQUEUE_LOCK_PREFIX = "rag:jobs:enqueue:"
+ENQUEUE_LOCK_SECONDS = 10
+ENQUEUE_POLL_SECONDS = 0.05
+
+# Jobs in these states are replaced by a new submission of the same question
+DEAD_STATUSES = (JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED)
+
+RELEASE_LOCK_LUA = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+def get_rag_queue() -> Queue:
+    """
+    Get the RAG job queue.
+
+    With the fakeredis stand-in there is no worker process, so jobs run
+    synchronously at enqueue time.
+    """
+    return Queue(
+        settings.rag_job_queue,
+        connection=get_sync_redis(),
+        is_async=not is_fake_redis(),
+        default_timeout=settings.rag_job_timeout_seconds,
+    )
+
+
+async def _run_query(params: dict) -> dict:
+    # Each job runs in its own event loop, so use an unpooled engine
+    # rather than the API's pooled one
+    from app.rag.pipeline import RAGPipeline
+
+    engine = create_async_engine(DATABASE_URL_ASYNC, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            pipeline = RAGPipeline(session)
+            start_time = datetime.now()
+            result = await pipeline.query(
+                question=params["question"],
+                language=params["language"],
+                include_scholarly_debate=params["include_scholarly_debate"],
+                preferred_sources=params["preferred_sources"],
+                max_sources=params["max_sources"],
+                priority="low",  # Background work yields to interactive requests
+            )
+            result.processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            return result.to_dict()
+    finally:
+        await engine.dispose()
+
+
+def run_rag_query(params: dict) -> dict:
+    """rq job: run the RAG pipeline and return the response dict."""
+    return asyncio.run(_run_query(params))
+
+
+def enqueue_rag_query(
+    question: str,
+    language: str,
+    include_scholarly_debate: bool,
+    preferred_sources: Optional[List[str]],
+    max_sources: int,
+) -> Job:
+    """
+    Enqueue a RAG question.
+
+    The job ID is derived from the normalized request, so an identical
+    question that is still queued, running or recently finished returns
+    the existing job instead of starting a new LLM call. A short Redis
+    lock on the job ID makes the check-then-enqueue atomic across API
+    workers.
+    """
+    params = {
+        "question": question,
+        "language": language,
+        "include_scholarly_debate": include_scholarly_debate,
+        "preferred_sources": preferred_sources or [],
+        "max_sources": max_sources,
+    }
+    job_id = JOB_ID_PREFIX + normalize_request_key(**params)[:32]
+    connection = get_sync_redis()
+
+    existing = _fetch_job(job_id)
+    if existing is not None and existing.get_status() not in DEAD_STATUSES:
+        return existing
+
+    lock_key = ENQUEUE_LOCK_PREFIX + job_id
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + ENQUEUE_LOCK_SECONDS
+    while not connection.set(lock_key, token, nx=True, ex=ENQUEUE_LOCK_SECONDS):
+        # Another worker is enqueueing the same question - use its job
+        time.sleep(ENQUEUE_POLL_SECONDS)
+        existing = _fetch_job(job_id)
+        if existing is not None and existing.get_status() not in DEAD_STATUSES:
+            return existing
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Timed out waiting to enqueue {job_id}")
+
+    try:
+        # Re-check under the lock; the job may have been enqueued since
+        existing = _fetch_job(job_id)
+        if existing is not None:
+            if existing.get_status() not in DEAD_STATUSES:
+                return existing
+            existing.delete()
+
+        return get_rag_queue().enqueue(
+            run_rag_query,
+            params,
+            job_id=job_id,
+            result_ttl=settings.rag_job_result_ttl_seconds,
+            failure_ttl=settings.rag_job_result_ttl_seconds,
+        )
+    finally:
+        # Only delete the lock if we still hold it
+        connection.eval(RELEASE_LOCK_LUA, 1, lock_key, token)
+
+
+def _fetch_job(job_id: str) -> Optional[Job]:
+    try:
+        return Job.fetch(job_id, connection=get_sync_redis())
+    except NoSuchJobError:
+        return None
+
+
+def get_rag_job_state(job_id: str) -> Optional[dict]:
+    """
+    Get a job's status, plus its result or error once finished.
+
+    Returns None if the job does not exist (or has expired).
+    """
+    if not job_id.startswith(JOB_ID_PREFIX):
+        return None
+
+    try:
+        job = Job.fetch(job_id, connection=get_sync_redis())
+    except NoSuchJobError:
+        return None
+
+    status = job.get_status()
+    state = {
+        "job_id": job.id,
+        "status": status.value if hasattr(status, "value") else str(status),
+        "enqueued_at": job.enqueued_at.isoformat() if job.enqueued_at else None,
+        "result": None,
+        "error": None,
+    }
+
+    if status == JobStatus.FINISHED:
+        state["result"] = job.return_value()
+    elif status == JobStatus.FAILED:
+        # Don't leak tracebacks to clients; keep the final line only
+        exc_info = (job.latest_result().exc_string if job.latest_result() else "") or ""
+        lines = exc_info.strip().splitlines()
+        state["error"] = lines[-1] if lines else "Job failed"
+
+    return state
@@ -29,6 +29,7 @@ except ImportError:
 
 from app.models.tafseer import TafseerChunk, TafseerSource
 from app.core.config import settings
+from app.db.data_version import bump_data_version
 
 
 def get_db_url() -> str:
@@ -175,6 +176,13 @@ def main():
                 )
                 session.commit()
 
+            # Invalidate cached tafseer responses (HTTP ETags)
+            try:
+                version = bump_data_version("tafseer")
+                print(f"  Tafseer data version: {version}")
+            except Exception as e:
+                print(f"  WARNING: Could not bump tafseer data version ({e}); clients may keep stale copies")
+
         duration = (datetime.now() - start_time).total_seconds()
         print("\n" + "=" * 60)
         print(f"SUCCESS: Indexed {len(indexed_ids)} chunks in {duration:.2f}s")
@@ -22,6 +22,7 @@ from sqlalchemy.orm import Session
 
 from app.models.quran import QuranVerse
 from app.models.audit import AuditLog
+from app.db.data_version import bump_data_version
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
@@ -169,6 +170,13 @@ def main():
             )
             session.commit()
 
+        # Invalidate cached verse responses (HTTP ETags); rerun `make artifacts` too
+        try:
+            version = bump_data_version("quran")
+            print(f"  Quran data version: {version}")
+        except Exception as e:
+            print(f"  WARNING: Could not bump Quran data version ({e}); clients may keep stale copies")
+
         # Summary
         duration = (datetime.now() - start_time).total_seconds()
         print("\n" + "=" * 60)
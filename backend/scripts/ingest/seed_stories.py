@@ -6,6 +6,7 @@ This script:
 1. Reads the stories.json manifest
 2. Creates stories, segments, themes, and connections
 3. Links segments to verse ranges
+4. Rebuilds the theme hierarchy closure table
 """
 import sys
 import os
@@ -15,12 +16,20 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from sqlalchemy import create_engine, select
+from sqlalchemy import create_engine, delete, insert, select
 from sqlalchemy.orm import Session
 
-from app.models.story import Story, StorySegment, Theme, StoryConnection
+from app.models.story import (
+    Story,
+    StorySegment,
+    Theme,
+    ThemeClosure,
+    StoryConnection,
+    compute_theme_closure,
+)
 from app.models.quran import QuranVerse
 from app.models.audit import AuditLog
+from app.db.data_version import bump_data_version
 
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent.parent
@@ -50,23 +59,49 @@ def get_verse_ids_for_range(session: Session, sura_no: int, aya_start: int, aya_
 
 
 def seed_themes(session: Session, themes: list) -> int:
-    """Seed themes."""
+    """Seed themes (parents before children)."""
+    parents = {t["id"]: t.get("parent_theme_id") for t in themes}
+    depth = {}
+    for ancestor_id, descendant_id, d in compute_theme_closure(parents):
+        depth[descendant_id] = max(depth.get(descendant_id, 0), d)
+
     count = 0
-    for theme_data in themes:
+    for theme_data in sorted(themes, key=lambda t: depth.get(t["id"], 0)):
         theme = Theme(
             id=theme_data["id"],
             name_ar=theme_data["name_ar"],
             name_en=theme_data["name_en"],
+            parent_theme_id=theme_data.get("parent_theme_id"),
             description_ar=theme_data.get("description_ar"),
             description_en=theme_data.get("description_en"),
+            related_themes=theme_data.get("related_themes"),
             created_at=datetime.utcnow(),
         )
         session.merge(theme)
+        session.flush()
         count += 1
     session.commit()
     return count
 
 
+def rebuild_theme_closure(session: Session) -> int:
+    """Rebuild the theme closure table from the themes table."""
+    parents = dict(session.execute(select(Theme.id, Theme.parent_theme_id)).all())
+    rows = compute_theme_closure(parents)
+
+    session.execute(delete(ThemeClosure))
+    if rows:
+        session.execute(
+            insert(ThemeClosure),
+            [
+                {"ancestor_id": a, "descendant_id": d, "depth": depth}
+                for a, d, depth in rows
+            ],
+        )
+    session.commit()
+    return len(rows)
+
+
 def seed_stories(session: Session, stories: list) -> tuple[int, int]:
     """Seed stories and segments."""
     story_count = 0
@@ -150,6 +185,9 @@ def main():
             theme_count = seed_themes(session, manifest.get("themes", []))
             print(f"  Seeded {theme_count} themes")
 
+            closure_count = rebuild_theme_closure(session)
+            print(f"  Rebuilt theme closure ({closure_count} rows)")
+
             # Seed stories
             story_count, segment_count = seed_stories(session, manifest.get("stories", []))
             print(f"  Seeded {story_count} stories with {segment_count} segments")
@@ -165,6 +203,13 @@ def main():
             )
             session.commit()
 
+        # Tell API workers to rebuild their in-memory story graphs
+        try:
+            version = bump_data_version("stories")
+            print(f"  Story data version: {version}")
+        except Exception as e:
+            print(f"  WARNING: Could not bump story data version ({e}); restart the API to refresh graphs")
+
         duration = (datetime.now() - start_time).total_seconds()
         print("\n" + "=" * 60)
         print(f"SUCCESS: Seeding complete in {duration:.2f}s")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Maintain the monthly audit_logs partitions.
+
+The API does this itself every few hours; run this from cron when the
+API is not always up, or to apply a new retention setting right away:
+1. Creates partitions for this month and the next AUDIT_PARTITION_MONTHS_AHEAD,
+   moving any of their rows out of the default partition
+2. Detaches and drops months older than AUDIT_RETENTION_MONTHS and deletes
+   expired rows from the default partition (runs even if step 1 failed)
+3. Lists the partitions that remain
+
+Usage:
+    python scripts/maintenance/audit_partitions.py [--retention-months N]
+"""
+import sys
+import os
+import argparse
+import asyncio
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.db.audit_partitions import (
+    ensure_audit_partitions,
+    drop_expired_audit_partitions,
+    list_audit_partitions,
+    lock_audit_maintenance,
+)
+from app.db.database import get_async_session_context
+
+
+async def run(retention_months: int) -> int:
+    async with get_async_session_context() as session:
+        print("\n[1/3] Creating upcoming partitions...")
+        create_error = None
+        try:
+            await lock_audit_maintenance(session)
+            created = await ensure_audit_partitions(session)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            created, create_error = [], e
+            print(f"  Failed: {e}")
+        for name in created:
+            print(f"  Created {name}")
+        if not created and create_error is None:
+            print("  Nothing to create")
+
+        print(f"\n[2/3] Dropping partitions older than {retention_months} months...")
+        await lock_audit_maintenance(session)
+        dropped = await drop_expired_audit_partitions(session, retention_months=retention_months)
+        for name in dropped:
+            print(f"  Dropped {name}")
+        if not dropped:
+            print("  Nothing to drop")
+        await session.commit()
+
+        print("\n[3/3] Current partitions:")
+        partitions = await list_audit_partitions(session)
+        for name in partitions:
+            print(f"  {name}")
+
+        if create_error is not None:
+            raise create_error
+        return len(partitions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain audit_logs partitions")
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.audit_retention_months,
+        help="Months of audit history to keep (0 = keep all)",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Audit Log Partition Maintenance")
+    print("=" * 60)
+
+    start_time = datetime.now()
+    try:
+        count = asyncio.run(run(args.retention_months))
+
+        duration = (datetime.now() - start_time).total_seconds()
+        print("\n" + "=" * 60)
+        print(f"SUCCESS: {count} monthly partitions after maintenance ({duration:.2f}s)")
+        print("=" * 60)
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Shared test setup.
+
+Tests run against the in-process Redis stand-in and the stub LLM client,
+so no services or API keys are needed.
+"""
+import os
+
+os.environ.setdefault("REDIS_URL", "fakeredis://")
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+import pytest
+
+from app.db import redis as redis_module
+
+
+@pytest.fixture(autouse=True)
+def fresh_redis():
+    """Give every test an empty fake Redis and new clients (bound to its event loop)."""
+    redis_module._fake_server = None
+    redis_module._async_redis = None
+    redis_module._sync_redis = None
+    yield
+    redis_module._fake_server = None
+    redis_module._async_redis = None
+    redis_module._sync_redis = None
@@ -0,0 +1,123 @@
+"""
+Tests for audit_logs partition maintenance (SQL issued, against a fake session).
+"""
+from datetime import date
+
+import pytest
+
+from app.db.audit_partitions import (
+    drop_expired_audit_partitions,
+    ensure_audit_partitions,
+    maintain_audit_partitions,
+)
+
+
+class FakeResult:
+    def __init__(self, value=None, rows=()):
+        self.value = value
+        self.rows = list(rows)
+
+    def scalar(self):
+        return self.value
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Records statements and answers the catalog and EXISTS queries."""
+
+    def __init__(self, partitions=(), default_rows=(), fail_on=None):
+        self.partitions = list(partitions)
+        self.default_rows = list(default_rows)  # created_at dates in the default partition
+        self.fail_on = fail_on
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"failed: {sql}")
+        if "FROM pg_inherits" in sql:
+            return FakeResult(rows=self.partitions + ["audit_logs_default"])
+        if "to_regclass" in sql:
+            return FakeResult(True)
+        if "SELECT EXISTS" in sql:
+            return FakeResult(any(params["start"] <= row < params["end"] for row in self.default_rows))
+        return FakeResult()
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def ddl(session):
+    """Statements other than the catalog lookups and locks."""
+    skip = ("pg_inherits", "to_regclass", "SELECT EXISTS", "pg_advisory_xact_lock")
+    return [s for s in session.statements if not any(k in s for k in skip)]
+
+
+async def test_ensure_creates_missing_months_only():
+    session = FakeSession(partitions=["audit_logs_p202610"])
+
+    created = await ensure_audit_partitions(session, months_ahead=2, today=date(2026, 10, 18))
+
+    assert created == ["audit_logs_p202611", "audit_logs_p202612"]
+    assert all(s.startswith("CREATE TABLE IF NOT EXISTS") for s in ddl(session))
+
+
+async def test_ensure_moves_rows_out_of_the_default_partition():
+    session = FakeSession(
+        partitions=["audit_logs_p202610"],
+        default_rows=[date(2026, 11, 3)],
+    )
+
+    await ensure_audit_partitions(session, months_ahead=2, today=date(2026, 10, 18))
+
+    statements = ddl(session)
+    assert [s.split(" WHERE")[0] for s in statements[:5]] == [
+        "ALTER TABLE audit_logs DETACH PARTITION audit_logs_default",
+        "CREATE TABLE IF NOT EXISTS audit_logs_p202611 PARTITION OF audit_logs "
+        "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')",
+        "INSERT INTO audit_logs_p202611 SELECT * FROM audit_logs_default",
+        "DELETE FROM audit_logs_default",
+        "ALTER TABLE audit_logs ATTACH PARTITION audit_logs_default DEFAULT",
+    ]
+    # December has no stranded rows, so it is created directly
+    assert statements[5].startswith("CREATE TABLE IF NOT EXISTS audit_logs_p202612")
+    assert len(statements) == 6
+
+
+async def test_retention_drops_old_months_and_default_rows():
+    session = FakeSession(partitions=["audit_logs_p202603", "audit_logs_p202604", "audit_logs_p202605"])
+
+    dropped = await drop_expired_audit_partitions(session, retention_months=6, today=date(2026, 10, 18))
+
+    assert dropped == ["audit_logs_p202603"]
+    assert ddl(session) == [
+        "ALTER TABLE audit_logs DETACH PARTITION audit_logs_p202603",
+        "DROP TABLE audit_logs_p202603",
+        "DELETE FROM audit_logs_default WHERE created_at < :cutoff",
+    ]
+
+
+async def test_drops_still_run_when_creating_fails():
+    session = FakeSession(partitions=["audit_logs_p200001"], fail_on="CREATE TABLE")
+
+    with pytest.raises(RuntimeError):
+        await maintain_audit_partitions(session, retention_months=6)
+
+    assert session.rollbacks == 1
+    assert session.commits == 1
+    assert "DROP TABLE audit_logs_p200001" in session.statements
+    # The drop transaction takes the lock again after the rollback released it
+    locks = [i for i, s in enumerate(session.statements) if "pg_advisory_xact_lock" in s]
+    assert len(locks) == 2
+    assert locks[1] > session.statements.index(next(s for s in session.statements if "CREATE TABLE" in s))
@@ -0,0 +1,135 @@
+"""
+Tests for the batched background audit sink.
+"""
+import asyncio
+
+import pytest
+
+from app.db import audit_sink as audit_sink_module
+from app.db.audit_sink import DROP_NEWEST, DROP_OLDEST, AuditSink
+
+
+class FakeDatabase:
+    """Session factory that records committed batches; steps can be made to hang."""
+
+    def __init__(self):
+        self.committed = []
+        self.hang_execute = False
+        self.hang_commit = False
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+        self.pending = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        if self.db.hang_execute:
+            await asyncio.Event().wait()
+        self.pending.extend(params)
+
+    async def commit(self):
+        if self.db.hang_commit:
+            await asyncio.Event().wait()
+        self.db.committed.extend(self.pending)
+
+
+@pytest.fixture(autouse=True)
+def no_partition_maintenance(monkeypatch):
+    async def maintain(session):
+        return [], []
+
+    monkeypatch.setattr(audit_sink_module, "maintain_audit_partitions", maintain)
+
+
+def messages(rows):
+    return [row["message"] for row in rows]
+
+
+async def test_stop_writes_everything_still_queued():
+    db = FakeDatabase()
+    sink = AuditSink(session_factory=db, batch_size=2, flush_seconds=60)
+    await sink.start()
+
+    for i in range(5):
+        sink.emit("rag_query", message=str(i))
+    await sink.stop()
+
+    assert messages(db.committed) == ["0", "1", "2", "3", "4"]
+    assert sink.snapshot()["queued"] == 0
+    assert sink.written == 5
+    assert sink.snapshot()["running"] is False
+
+
+async def test_stop_requeues_a_batch_cancelled_before_commit(monkeypatch):
+    monkeypatch.setattr(audit_sink_module, "STOP_TIMEOUT_SECONDS", 0.05)
+    db = FakeDatabase()
+    sink = AuditSink(session_factory=db, batch_size=2, flush_seconds=60)
+    await sink.start()
+
+    db.hang_execute = True
+    for i in range(2):
+        sink.emit("rag_query", message=str(i))  # Fills a batch, wakes the flusher
+    await asyncio.sleep(0.01)
+    sink.emit("rag_query", message="2")
+
+    # The hung insert is cancelled; the final flush writes its rows again
+    stop = asyncio.create_task(sink.stop())
+    await asyncio.sleep(0.02)
+    db.hang_execute = False
+    await stop
+
+    assert messages(db.committed) == ["0", "1", "2"]
+    assert sink.failed == 0
+
+
+async def test_stop_does_not_requeue_a_batch_cancelled_during_commit(monkeypatch):
+    monkeypatch.setattr(audit_sink_module, "STOP_TIMEOUT_SECONDS", 0.05)
+    db = FakeDatabase()
+    sink = AuditSink(session_factory=db, batch_size=2, flush_seconds=60)
+    await sink.start()
+
+    db.hang_commit = True
+    for i in range(2):
+        sink.emit("rag_query", message=str(i))
+    await asyncio.sleep(0.01)
+    sink.emit("rag_query", message="2")
+
+    stop = asyncio.create_task(sink.stop())
+    await asyncio.sleep(0.02)
+    db.hang_commit = False
+    await stop
+
+    # The cancelled commit may have landed, so its batch is not written twice
+    assert messages(db.committed) == ["2"]
+    assert sink.failed == 2
+
+
+def test_drop_oldest_keeps_the_newest_rows():
+    sink = AuditSink(session_factory=FakeDatabase(), max_queue=3, drop_policy=DROP_OLDEST)
+
+    results = [sink.emit("rag_query", message=str(i)) for i in range(5)]
+
+    assert results == [True] * 5
+    assert messages(sink._queue) == ["2", "3", "4"]
+    assert sink.dropped == 2
+
+
+def test_drop_newest_keeps_the_oldest_rows():
+    sink = AuditSink(session_factory=FakeDatabase(), max_queue=3, drop_policy=DROP_NEWEST)
+
+    results = [sink.emit("rag_query", message=str(i)) for i in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert messages(sink._queue) == ["0", "1", "2"]
+    assert sink.dropped == 2
+    assert sink.emitted == 3
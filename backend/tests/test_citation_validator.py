@@ -0,0 +1,45 @@
+"""
+Tests for batch and streaming citation validation.
+"""
+from app.rag.types import RetrievedChunk
+from app.validators.citation_validator import CitationValidator, StreamingCitationValidator
+
+
+def make_chunk(aya: int) -> RetrievedChunk:
+    return RetrievedChunk(
+        chunk_id=f"ibn_kathir_2_{aya}",
+        source_id="ibn_kathir",
+        source_name="Ibn Kathir",
+        source_name_ar="",
+        verse_reference=f"2:{aya}",
+        sura_no=2,
+        aya_start=aya,
+        aya_end=aya,
+        content="",
+    )
+
+
+def paragraph_events(validator: StreamingCitationValidator, deltas) -> list:
+    events = []
+    for delta in deltas:
+        events.extend(validator.feed(delta))
+    return [e.paragraph for e in events if e.type == "paragraph_uncited"]
+
+
+def test_stream_rescans_boundary_released_by_closing_bracket():
+    # A stray "[" in paragraph 1 defers its "\n\n" boundary until the "]"
+    # of the citation in paragraph 2, which arrives in a delta without "\n"
+    uncited = "This paragraph has no citation at all and is long enough to count " * 2
+    text = (
+        f"A stray [bracket opens here. {uncited}\n\n"
+        f"Cited [Ibn Kathir, 2:255] here.\n\n"
+        f"{uncited}\n\n{uncited}\n\nEnd."
+    )
+
+    streamed = StreamingCitationValidator([make_chunk(255)], max_invalid_citations=0)
+    stream_paragraphs = paragraph_events(streamed, list(text))  # One character per delta
+    batch = CitationValidator().validate_parsed(text, streamed.citations, streamed.matcher)
+
+    batch_paragraphs = [int(m.split(":")[0].split()[1]) for m in batch.missing_citations]
+    # The stray bracket starts a (bad) citation, so paragraph 1 counts as cited
+    assert stream_paragraphs == batch_paragraphs == [3, 4]
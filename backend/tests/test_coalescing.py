@@ -0,0 +1,128 @@
+"""
+Tests for RAG request coalescing (single-flight).
+"""
+import asyncio
+
+from app.core.config import settings
+from app.rag.coalescing import RAGRequestCoalescer, SingleFlight, normalize_request_key
+from app.rag.types import GroundedResponse
+
+
+def make_response(answer: str = "answer") -> GroundedResponse:
+    return GroundedResponse(answer=answer, citations=[], confidence=0.9, intent="verse_meaning")
+
+
+class CountingComputation:
+    """An async computation that counts its runs and can be held open."""
+
+    def __init__(self, result="result"):
+        self.result = result
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.result
+
+
+def test_normalize_request_key_ignores_case_and_whitespace():
+    a = normalize_request_key("What is  Sabr?", "en", True, ["b", "a"], 5)
+    b = normalize_request_key("what is sabr?", "en", True, ["a", "b"], 5)
+    c = normalize_request_key("what is sabr?", "ar", True, ["a", "b"], 5)
+    assert a == b
+    assert a != c
+
+
+async def test_concurrent_duplicates_share_one_computation():
+    flight = SingleFlight()
+    computation = CountingComputation()
+
+    callers = [asyncio.create_task(flight.do("key", computation)) for _ in range(5)]
+    await asyncio.sleep(0)
+    computation.release.set()
+    results = await asyncio.gather(*callers)
+
+    assert computation.calls == 1
+    assert [r for r, _ in results] == ["result"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.inflight_count == 0
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+    computation = CountingComputation()
+
+    leader = asyncio.create_task(flight.do("key", computation))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", computation))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    computation.release.set()
+
+    assert await follower == ("result", True)
+    assert leader.cancelled()
+    assert computation.calls == 1
+
+
+async def test_failed_computation_is_not_cached():
+    flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("upstream down")
+
+    for _ in range(2):
+        try:
+            await flight.do("key", failing)
+        except RuntimeError:
+            pass
+
+    assert calls == 2
+    assert flight.inflight_count == 0
+
+
+async def test_coalescing_disabled_runs_every_request(monkeypatch):
+    monkeypatch.setattr(settings, "rag_coalesce_enabled", False)
+    coalescer = RAGRequestCoalescer()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return make_response()
+
+    await asyncio.gather(coalescer.run("key", compute), coalescer.run("key", compute))
+
+    assert calls == 2
+
+
+async def test_redis_coalescing_shares_result_across_workers(monkeypatch):
+    monkeypatch.setattr(settings, "rag_coalesce_enabled", True)
+    monkeypatch.setattr(settings, "rag_coalesce_redis", True)
+    monkeypatch.setattr(RAGRequestCoalescer, "POLL_INTERVAL_SECONDS", 0.01)
+    worker_a, worker_b = RAGRequestCoalescer(), RAGRequestCoalescer()
+    release = asyncio.Event()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return make_response("from leader")
+
+    leader = asyncio.create_task(worker_a.run("key", compute))
+    await asyncio.sleep(0.02)
+    follower = asyncio.create_task(worker_b.run("key", compute))
+    await asyncio.sleep(0.02)
+    release.set()
+
+    leader_response, _ = await leader
+    follower_response, _ = await follower
+
+    assert calls == 1
+    assert leader_response.answer == follower_response.answer == "from leader"
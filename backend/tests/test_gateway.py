@@ -0,0 +1,178 @@
+"""
+Tests for the LLM gateway (concurrency limit, lanes and retries).
+"""
+import asyncio
+import importlib
+
+import anthropic
+
+from app.core.config import settings
+from app.rag.gateway import LLMGateway, LLMSaturatedError, LLMUnavailableError
+from app.rag.llm import create_llm_client
+
+
+def make_gateway(**overrides) -> LLMGateway:
+    options = dict(
+        max_concurrency=1,
+        max_queue=4,
+        queue_timeout=5.0,
+        max_retries=settings.llm_max_retries,
+        retry_base=0.001,
+        retry_max=0.002,
+    )
+    options.update(overrides)
+    return LLMGateway(**options)
+
+
+def sdk_http_module(client):
+    """The httpx-compatible module the Anthropic client was built on."""
+    for cls in type(client._client).__mro__:
+        if cls.__module__.startswith("httpx"):
+            return importlib.import_module(cls.__module__.partition(".")[0])
+    raise AssertionError("Anthropic client is not httpx based")
+
+
+async def test_rate_limited_call_costs_max_retries_plus_one_attempts(monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "anthropic")
+    monkeypatch.setattr(settings, "anthropic_api_key", "test-key")
+    client = create_llm_client()
+    assert client.max_retries == 0
+
+    # Serve every request a 429 through the SDK's own HTTP library
+    # (httpx, or httpx2 in newer SDK releases)
+    http = sdk_http_module(client)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return http.Response(429, json={"type": "error", "error": {"type": "rate_limit_error", "message": "slow down"}})
+
+    client = client.with_options(http_client=http.Client(transport=http.MockTransport(handler)))
+
+    gateway = make_gateway()
+    try:
+        await gateway.call(
+            client.messages.create,
+            model="test-model",
+            max_tokens=10,
+            messages=[{"role": "user", "content": "hi"}],
+        )
+    except LLMUnavailableError as e:
+        assert isinstance(e.__cause__, anthropic.RateLimitError)
+    else:
+        raise AssertionError("expected LLMUnavailableError")
+
+    assert len(requests) == settings.llm_max_retries + 1
+    assert gateway.retried == settings.llm_max_retries
+    assert gateway.failed == 1
+
+
+async def wait_until_queued(gateway: LLMGateway, count: int) -> None:
+    while gateway.queued < count:
+        await asyncio.sleep(0)
+
+
+async def test_queued_waiter_gets_the_slot_on_release():
+    gateway = make_gateway()
+    await gateway._acquire("default")
+
+    waiter = asyncio.create_task(gateway.call(lambda: "done"))
+    await wait_until_queued(gateway, 1)
+    assert not waiter.done()
+
+    gateway._release()
+
+    assert await waiter == "done"
+    assert gateway.queued == 0
+    assert gateway._active == 0
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    gateway = make_gateway()
+    await gateway._acquire("default")
+
+    waiter = asyncio.create_task(gateway._acquire("default"))
+    await wait_until_queued(gateway, 1)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    assert gateway.queued == 0
+    gateway._release()
+    assert gateway._active == 0
+
+
+async def test_waiter_cancelled_after_handover_gives_the_slot_back():
+    gateway = make_gateway()
+    await gateway._acquire("default")
+
+    waiter = asyncio.create_task(gateway._acquire("default"))
+    await wait_until_queued(gateway, 1)
+    gateway._release()  # Hands the slot to the waiter...
+    waiter.cancel()  # ...which is cancelled before it wakes up
+    results = await asyncio.gather(waiter, return_exceptions=True)
+
+    if not isinstance(results[0], asyncio.CancelledError):
+        gateway._release()  # The waiter kept the slot; its caller frees it
+    assert gateway._active == 0
+    assert gateway.queued == 0
+
+
+async def test_full_lane_rejects_with_retry_after():
+    gateway = make_gateway(max_queue=1)
+    await gateway._acquire("default")
+    waiter = asyncio.create_task(gateway._acquire("default"))
+    await wait_until_queued(gateway, 1)
+
+    try:
+        await gateway.call(lambda: "never", priority="default")
+    except LLMSaturatedError as e:
+        assert e.retry_after >= 1
+    else:
+        raise AssertionError("expected LLMSaturatedError")
+    assert gateway.rejected == 1
+
+    # Other lanes still accept waiters
+    other = asyncio.create_task(gateway._acquire("high"))
+    await wait_until_queued(gateway, 2)
+
+    for task in (waiter, other):
+        task.cancel()
+    await asyncio.gather(waiter, other, return_exceptions=True)
+
+
+async def test_high_priority_is_served_before_low():
+    gateway = make_gateway()
+    await gateway._acquire("default")
+    served = []
+
+    low = asyncio.create_task(gateway.call(served.append, "low", priority="low"))
+    await wait_until_queued(gateway, 1)
+    high = asyncio.create_task(gateway.call(served.append, "high", priority="high"))
+    await wait_until_queued(gateway, 2)
+
+    gateway._release()
+    await asyncio.gather(low, high)
+
+    assert served == ["high", "low"]
+    assert gateway._active == 0
+
+
+async def test_non_retryable_error_is_not_retried():
+    gateway = make_gateway(max_retries=3)
+    attempts = []
+
+    def fail():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    try:
+        await gateway.call(fail)
+    except LLMUnavailableError as e:
+        assert isinstance(e.__cause__, ValueError)
+        assert e.retry_after == 5
+    else:
+        raise AssertionError("expected LLMUnavailableError")
+
+    assert len(attempts) == 1
+    assert gateway.retried == 0
+    assert gateway._active == 0
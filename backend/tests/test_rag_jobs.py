@@ -0,0 +1,84 @@
+"""
+Tests for RAG job submission on the rq queue.
+"""
+import pytest
+
+from app.db.redis import get_sync_redis
+from app.workers import rag_jobs
+
+
+QUESTION = dict(
+    question="What is sabr?",
+    language="en",
+    include_scholarly_debate=True,
+    preferred_sources=None,
+    max_sources=5,
+)
+
+
+class FakeClock:
+    """Stands in for the time module; sleeping advances the clock."""
+
+    def __init__(self, on_sleep=None):
+        self.now = 0.0
+        self.on_sleep = on_sleep
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep()
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Replace the pipeline run (fakeredis runs jobs at enqueue time)."""
+    calls = []
+
+    async def fake_run_query(params):
+        calls.append(params)
+        return {"answer": "answer"}
+
+    monkeypatch.setattr(rag_jobs, "_run_query", fake_run_query)
+    return calls
+
+
+def test_identical_questions_share_one_job(runs):
+    first = rag_jobs.enqueue_rag_query(**QUESTION)
+    second = rag_jobs.enqueue_rag_query(**dict(QUESTION, question="what is  SABR?"))
+
+    assert first.id == second.id
+    assert len(runs) == 1
+    assert not get_sync_redis().exists(rag_jobs.ENQUEUE_LOCK_PREFIX + first.id)
+
+
+def test_waits_for_the_worker_holding_the_enqueue_lock(runs, monkeypatch):
+    job = rag_jobs.enqueue_rag_query(**QUESTION)
+    job.delete()
+
+    # Another API worker holds the lock and enqueues the job while we wait
+    redis = get_sync_redis()
+    redis.set(rag_jobs.ENQUEUE_LOCK_PREFIX + job.id, "other")
+
+    def other_worker_enqueues():
+        if rag_jobs._fetch_job(job.id) is None:
+            rag_jobs.get_rag_queue().enqueue(rag_jobs.run_rag_query, {"question": "x"}, job_id=job.id)
+
+    monkeypatch.setattr(rag_jobs, "time", FakeClock(on_sleep=other_worker_enqueues))
+
+    assert rag_jobs.enqueue_rag_query(**QUESTION).id == job.id
+    # The first submission, then the other worker's job; ours never ran
+    assert [params["question"] for params in runs] == ["What is sabr?", "x"]
+    assert redis.get(rag_jobs.ENQUEUE_LOCK_PREFIX + job.id) == b"other"
+
+
+def test_gives_up_when_the_enqueue_lock_is_never_released(runs, monkeypatch):
+    monkeypatch.setattr(rag_jobs, "time", FakeClock())
+    job_id = rag_jobs.enqueue_rag_query(**QUESTION).id
+    rag_jobs._fetch_job(job_id).delete()
+    get_sync_redis().set(rag_jobs.ENQUEUE_LOCK_PREFIX + job_id, "other")
+
+    with pytest.raises(RuntimeError):
+        rag_jobs.enqueue_rag_query(**QUESTION)
@@ -0,0 +1,142 @@
+"""
+Tests for the token-bucket rate limiter and its middleware.
+"""
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    InMemoryTokenBuckets,
+    RateLimitMiddleware,
+    RateLimitRule,
+    RateLimiter,
+)
+from app.db.redis import get_async_redis
+
+
+def make_rule(limit_per_minute: int = 5) -> RateLimitRule:
+    return RateLimitRule(name="test", limit_per_minute=limit_per_minute, path_prefixes=("/",))
+
+
+def make_client(limiter: RateLimiter = None) -> httpx.AsyncClient:
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[
+        Route("/api/v1/rag/ask", ok, methods=["POST"]),
+        Route("/api/v1/quran/verses", ok),
+        Route("/api/v1/search", ok),
+    ])
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def test_redis_bucket_denies_when_empty():
+    limiter = RateLimiter()
+    rule = make_rule(5)
+
+    decisions = [await limiter.hit("client", rule) for _ in range(6)]
+
+    assert [d.allowed for d in decisions] == [True] * 5 + [False]
+    assert [d.remaining for d in decisions] == [4, 3, 2, 1, 0, 0]
+    assert decisions[-1].retry_after == 12  # One token per 12s at 5/min
+    assert await get_async_redis().exists("ratelimit:test:client")
+    assert limiter._redis_down_until == 0.0
+
+
+async def test_redis_bucket_refills_over_time():
+    limiter = RateLimiter()
+    rule = make_rule(5)
+    for _ in range(5):
+        await limiter.hit("client", rule)
+    assert not (await limiter.hit("client", rule)).allowed
+
+    # Age the bucket by 12s, worth one token at 5 per minute
+    redis = get_async_redis()
+    ts = int(await redis.hget("ratelimit:test:client", "ts"))
+    await redis.hset("ratelimit:test:client", "ts", ts - 12000)
+
+    assert (await limiter.hit("client", rule)).allowed
+    assert not (await limiter.hit("client", rule)).allowed
+
+
+async def test_clients_have_separate_buckets():
+    limiter = RateLimiter()
+    rule = make_rule(1)
+
+    assert (await limiter.hit("a", rule)).allowed
+    assert not (await limiter.hit("a", rule)).allowed
+    assert (await limiter.hit("b", rule)).allowed
+
+
+async def test_falls_back_to_memory_when_redis_fails(monkeypatch):
+    limiter = RateLimiter()
+
+    async def redis_down(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(limiter, "_take_redis", redis_down)
+    rule = make_rule(2)
+
+    decisions = [await limiter.hit("client", rule) for _ in range(3)]
+
+    assert [d.allowed for d in decisions] == [True, True, False]
+    assert limiter._redis_down_until > 0
+    assert "test:client" in limiter._fallback._buckets
+
+
+def test_in_memory_buckets_refill_and_evict(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+    buckets = InMemoryTokenBuckets(max_keys=2)
+    rate_per_ms = 1 / 1000.0  # One token per second
+
+    assert buckets.take("a", 1, rate_per_ms) == (True, 0.0)
+    assert buckets.take("a", 1, rate_per_ms)[0] is False
+    now[0] += 1.0
+    assert buckets.take("a", 1, rate_per_ms)[0] is True
+
+    buckets.take("b", 1, rate_per_ms)
+    buckets.take("c", 1, rate_per_ms)
+    assert list(buckets._buckets) == ["b", "c"]
+
+
+async def test_middleware_sets_rate_limit_headers():
+    async with make_client() as client:
+        response = await client.get("/api/v1/search")
+
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Limit"] == str(settings.rate_limit_per_minute)
+    assert response.headers["RateLimit-Remaining"] == str(settings.rate_limit_per_minute - 1)
+    assert int(response.headers["RateLimit-Reset"]) > 0
+    assert "Retry-After" not in response.headers
+
+
+async def test_rag_ask_has_its_own_budget():
+    budget = settings.rate_limit_rag_per_minute
+    async with make_client() as client:
+        responses = [await client.post("/api/v1/rag/ask") for _ in range(budget + 1)]
+        other = await client.get("/api/v1/search")
+
+    assert [r.status_code for r in responses] == [200] * budget + [429]
+    rejected = responses[-1]
+    assert rejected.headers["RateLimit-Limit"] == str(budget)
+    assert rejected.headers["RateLimit-Remaining"] == "0"
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert "rag_ask" in rejected.json()["detail"]
+
+    # The default budget is untouched by questions
+    assert other.status_code == 200
+    assert other.headers["RateLimit-Remaining"] == str(settings.rate_limit_per_minute - 1)
+
+
+async def test_middleware_skips_unmatched_routes_and_disabled(monkeypatch):
+    async with make_client() as client:
+        preflight = await client.options("/api/v1/rag/ask")
+        assert "RateLimit-Limit" not in preflight.headers
+
+        monkeypatch.setattr(settings, "rate_limit_enabled", False)
+        response = await client.get("/api/v1/search")
+        assert "RateLimit-Limit" not in response.headers
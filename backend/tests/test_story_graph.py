@@ -0,0 +1,65 @@
+"""
+Tests for StoryGraph traversal.
+"""
+from app.graph.story_graph import GraphEdge, GraphSegment, StoryGraph
+
+
+def make_graph(edges):
+    """Build a graph of bare segments from (source, target, strength) tuples."""
+    names = sorted({name for source, target, _ in edges for name in (source, target)})
+    segments = [
+        GraphSegment(name, "story", order, None, None, 1, order + 1, order + 1, None, None)
+        for order, name in enumerate(names)
+    ]
+    graph_edges = [
+        GraphEdge(i, source, target, "continuation", strength, [])
+        for i, (source, target, strength) in enumerate(edges)
+    ]
+    return StoryGraph(stories=[], segments=segments, edges=graph_edges)
+
+
+def test_shortest_path_prefers_strong_connections():
+    graph = make_graph([
+        ("S", "T", 0.5),  # Cost 2
+        ("S", "A", 2.0),  # Cost 0.5
+        ("A", "T", 2.0),  # Cost 0.5
+    ])
+
+    path = graph.shortest_path("S", "T")
+
+    assert path.segment_ids == ["S", "A", "T"]
+    assert path.cost == 1.0
+
+
+def test_shortest_path_unweighted_counts_hops():
+    graph = make_graph([("S", "T", 0.5), ("S", "A", 2.0), ("A", "T", 2.0)])
+
+    path = graph.shortest_path("S", "T", weighted=False)
+
+    assert path.segment_ids == ["S", "T"]
+
+
+def test_shortest_path_keeps_costlier_path_with_fewer_hops():
+    # X is reached most cheaply in 4 hops, which leaves no hop for X-T
+    # under max_depth=4; the costlier direct S-X edge must still be used
+    graph = make_graph([
+        ("S", "X", 0.5),  # Cost 2
+        ("S", "A", 10.0),  # Cost 0.1 per strong hop
+        ("A", "B", 10.0),
+        ("B", "C", 10.0),
+        ("C", "X", 10.0),
+        ("X", "T", 1.0),
+    ])
+
+    path = graph.shortest_path("S", "T", max_depth=4)
+
+    assert path is not None
+    assert path.segment_ids == ["S", "X", "T"]
+    assert path.cost == 3.0
+
+
+def test_shortest_path_respects_max_depth():
+    graph = make_graph([("S", "A", 1.0), ("A", "B", 1.0), ("B", "T", 1.0)])
+
+    assert graph.shortest_path("S", "T", max_depth=2) is None
+    assert graph.shortest_path("S", "T", max_depth=3).segment_ids == ["S", "A", "B", "T"]